@@ -0,0 +1,37 @@
+"""
+Imports of the optional dependencies.
+
+Each helper imports its dependency when first needed, and otherwise raises an
+ImportError naming the extra that installs it.
+"""
+
+import importlib
+from types import ModuleType
+
+
+def _import(name: str, extra: str) -> ModuleType:
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:  # pragma: no cover
+        package = name.partition(".")[0]
+        raise ImportError(
+            f"{package} is not installed: pip install swap-anything[{extra}]"
+        ) from e
+
+
+def import_pyarrow(*submodules: str) -> ModuleType:
+    """pyarrow, with its `submodules`, e.g. "parquet", imported as attributes."""
+    pyarrow = _import("pyarrow", "arrow")
+    for submodule in submodules:
+        _import(f"pyarrow.{submodule}", "arrow")
+    return pyarrow
+
+
+def import_scipy_sparse() -> ModuleType:
+    """scipy.sparse."""
+    return _import("scipy.sparse", "sparse")
+
+
+def import_sqlalchemy() -> ModuleType:
+    """SQLAlchemy."""
+    return _import("sqlalchemy", "sql")
@@ -0,0 +1,362 @@
+"""
+Matching algorithms working on integer-coded edge arrays.
+
+Nodes are integers in `range(n_nodes)` and edges are given as two arrays of
+endpoints, `u` and `v`. All the algorithms return the sorted positions of the
+selected edges in the input arrays.
+"""
+
+from collections import deque
+from typing import List, Tuple
+
+import numpy as np
+
+
+def pair_keys(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Encode each unordered pair of codes as a single int64 key.
+
+    The key is `(min_code << 32) | max_code`, so that keys sort by their lower
+    code then by their higher code, and decode with `split_pair_keys`.
+    """
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    return (np.minimum(a, b) << 32) | np.maximum(a, b)
+
+
+def split_pair_keys(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Lower and higher codes of keys from `pair_keys`."""
+    keys = np.asarray(keys, dtype=np.int64)
+    return keys >> 32, keys & 0xFFFFFFFF
+
+
+def find(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Positions of `keys` in `sorted_keys`, by binary search, -1 if missing."""
+    keys = np.asarray(keys)
+    if not len(sorted_keys):
+        return np.full(keys.shape, -1, dtype=np.int64)
+    position = np.searchsorted(sorted_keys, keys)
+    position[position == len(sorted_keys)] = 0
+    return np.where(sorted_keys[position] == keys, position, -1)
+
+
+def contains(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Boolean mask of the `keys` found in `sorted_keys`."""
+    return find(sorted_keys, keys) >= 0
+
+
+def adjacency(
+    n_nodes: int, u: np.ndarray, v: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    CSR adjacency of an undirected graph.
+
+    Returns `indptr`, `neighbors` and `edges`, so that the neighbors of node `i`
+    are `neighbors[indptr[i]:indptr[i + 1]]`, reached through the input edges
+    at positions `edges[indptr[i]:indptr[i + 1]]`. Self loops are ignored.
+    """
+    u = np.asarray(u, dtype=np.int64)
+    v = np.asarray(v, dtype=np.int64)
+    edge_ids = np.flatnonzero(u != v)
+    sources = np.concatenate([u[edge_ids], v[edge_ids]])
+    targets = np.concatenate([v[edge_ids], u[edge_ids]])
+    edges = np.concatenate([edge_ids, edge_ids])
+
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n_nodes), out=indptr[1:])
+    return indptr, targets[order], edges[order]
+
+
+def mask_adjacency(
+    indptr: np.ndarray, neighbors: np.ndarray, edges: np.ndarray, alive: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    CSR adjacency restricted to the edges where `alive` is True.
+
+    The entries keep their order, so the adjacency is compacted without sorting it
+    again: an adjacency can be built once, then masked as edges are removed.
+    """
+    n_nodes = len(indptr) - 1
+    keep = alive[edges]
+    sources = np.repeat(np.arange(n_nodes), np.diff(indptr))
+    masked_indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources[keep], minlength=n_nodes), out=masked_indptr[1:])
+    return masked_indptr, neighbors[keep], edges[keep]
+
+
+def connected_components(n_nodes: int, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """
+    Label each node with the smallest node of its connected component.
+
+    Vectorized hooking and pointer jumping: every edge hooks the root of its
+    larger label to the root of the smaller one, then every node jumps to its
+    root, until no label changes.
+    """
+    u = np.asarray(u, dtype=np.int64)
+    v = np.asarray(v, dtype=np.int64)
+    labels = np.arange(n_nodes)
+    while True:
+        hooked = labels.copy()
+        smaller = np.minimum(labels[u], labels[v])
+        np.minimum.at(hooked, labels[u], smaller)
+        np.minimum.at(hooked, labels[v], smaller)
+        while True:
+            jumped = hooked[hooked]
+            if (jumped == hooked).all():
+                break
+            hooked = jumped
+        if (hooked == labels).all():
+            return labels
+        labels = hooked
+
+
+def mates_to_edges(
+    mate: List[int], n_nodes: int, u: np.ndarray, v: np.ndarray
+) -> np.ndarray:
+    """Positions of the edges joining each node to its mate."""
+    mate = np.asarray(mate, dtype=np.int64)
+    nodes = np.flatnonzero(mate > np.arange(len(mate)))
+    if not len(nodes):
+        return np.empty(0, dtype=np.int64)
+
+    keys = pair_keys(u, v)
+    order = np.argsort(keys, kind="stable")
+    matched = np.searchsorted(keys[order], pair_keys(nodes, mate[nodes]))
+    return np.sort(order[matched])
+
+
+def greedy_matching(
+    n_nodes: int,
+    u: np.ndarray,
+    v: np.ndarray,
+    weight: np.ndarray,
+) -> np.ndarray:
+    """
+    Greedy matching: take edges by decreasing weight if both ends are free.
+
+    This is a 1/2-approximation of the maximum weight matching. Edges with a
+    negative weight are never selected.
+    """
+    weight = np.asarray(weight, dtype=float)
+    order = np.argsort(-weight, kind="stable")
+    return greedy_matching_ordered(n_nodes, u, v, order[weight[order] >= 0])
+
+
+def greedy_matching_ordered(
+    n_nodes: int, u: np.ndarray, v: np.ndarray, order: np.ndarray
+) -> np.ndarray:
+    """Greedy matching taking the edges at positions `order`, in that order."""
+    u = np.asarray(u, dtype=np.int64)
+    v = np.asarray(v, dtype=np.int64)
+    free = np.ones(n_nodes, dtype=bool)
+    selected = []
+    for edge, a, b in zip(
+        order.tolist(), u[order].tolist(), v[order].tolist(), strict=True
+    ):
+        if a != b and free[a] and free[b]:
+            free[a] = free[b] = False
+            selected.append(edge)
+    return np.sort(np.asarray(selected, dtype=np.int64))
+
+
+def _best_path_matching(path_weights: List[float]) -> List[int]:
+    # Maximum weight matching of a path, i.e. no two consecutive edges
+    taken, skipped = 0.0, 0.0
+    choices = []
+    for w in path_weights:
+        take = skipped + max(w, 0.0)
+        choices.append(take > taken)
+        taken, skipped = max(take, taken), taken
+    selected = []
+    i = len(path_weights) - 1
+    while i >= 0:
+        if choices[i]:
+            selected.append(i)
+            i -= 2
+        else:
+            i -= 1
+    return selected
+
+
+def path_growing_matching(
+    n_nodes: int,
+    u: np.ndarray,
+    v: np.ndarray,
+    weight: np.ndarray,
+) -> np.ndarray:
+    """
+    Path growing matching, a 1/2-approximation of the maximum weight matching.
+
+    Paths are grown from every unvisited node by following the heaviest edge to
+    an unvisited neighbor (Drake and Hougardy, 2003). Instead of alternating
+    the path edges, the best matching of each path is taken by dynamic
+    programming, which is never worse. Runs in O(edges).
+    """
+    weight = np.asarray(weight, dtype=float)
+    indptr, neighbors, edges = adjacency(n_nodes, u, v)
+
+    # Visit the neighbors of each node by decreasing weight
+    order = np.lexsort((-weight[edges], np.repeat(np.arange(n_nodes), np.diff(indptr))))
+    neighbors, edges = neighbors[order].tolist(), edges[order].tolist()
+    indptr = indptr.tolist()
+    weights = weight.tolist()
+
+    visited = [False] * n_nodes
+    cursor = indptr[:-1]
+    selected = []
+    for start in range(n_nodes):
+        node = start
+        path_edges = []
+        while not visited[node]:
+            visited[node] = True
+            while cursor[node] < indptr[node + 1] and visited[neighbors[cursor[node]]]:
+                cursor[node] += 1
+            if cursor[node] == indptr[node + 1]:
+                break
+            path_edges.append(edges[cursor[node]])
+            node = neighbors[cursor[node]]
+        path_weights = [weights[e] for e in path_edges]
+        selected.extend(path_edges[i] for i in _best_path_matching(path_weights))
+    return np.sort(np.asarray(selected, dtype=np.int64))
+
+
+def weight_upper_bound(
+    n_nodes: int, u: np.ndarray, v: np.ndarray, weight: np.ndarray
+) -> float:
+    """
+    Upper bound of the maximum weight matching.
+
+    Each matched edge weighs at most the mean of the heaviest edges of its two
+    ends, so no matching weighs more than half of the sum of the heaviest edge
+    of every node.
+    """
+    weight = np.clip(np.asarray(weight, dtype=float), 0, None)
+    heaviest = np.zeros(n_nodes, dtype=float)
+    np.maximum.at(heaviest, np.asarray(u, dtype=np.int64), weight)
+    np.maximum.at(heaviest, np.asarray(v, dtype=np.int64), weight)
+    return float(heaviest.sum() / 2)
+
+
+def _greedy_mates(indptr: np.ndarray, neighbors: np.ndarray) -> List[int]:
+    # Min-degree heuristic: the nodes with fewer options are matched first,
+    # with their free neighbor having fewer options.
+    n_nodes = len(indptr) - 1
+    degree = np.diff(indptr)
+    mate = [-1] * n_nodes
+    for node in np.argsort(degree, kind="stable").tolist():
+        if mate[node] != -1:
+            continue
+        best, best_degree = -1, -1
+        for other in neighbors[indptr[node] : indptr[node + 1]].tolist():
+            if mate[other] == -1 and (best == -1 or degree[other] < best_degree):
+                best, best_degree = other, degree[other]
+        if best != -1:
+            mate[node], mate[best] = best, node
+    return mate
+
+
+def greedy_cardinality_matching(
+    n_nodes: int, u: np.ndarray, v: np.ndarray
+) -> np.ndarray:
+    """Maximal matching built with the min-degree greedy heuristic."""
+    indptr, neighbors, _ = adjacency(n_nodes, u, v)
+    return mates_to_edges(_greedy_mates(indptr, neighbors), n_nodes, u, v)
+
+
+def greedy_cardinality_mates(indptr: np.ndarray, neighbors: np.ndarray) -> List[int]:
+    """Mates of `greedy_cardinality_matching`, given the CSR adjacency."""
+    return _greedy_mates(indptr, neighbors)
+
+
+def augment_from(root: int, adj: List[List[int]], mate: List[int]) -> bool:
+    """
+    Search an augmenting path from the free node `root` and apply it to `mate`.
+
+    This is one phase of Edmonds' blossom algorithm, where blossoms are
+    contracted by relabelling the `base` of their nodes. The search state only
+    holds the nodes it reaches, so a search costs O(size of the component).
+    """
+    base = {}
+    parent = {}
+    outer = {root}
+    queue = deque([root])
+
+    def find_base(node: int) -> int:
+        return base.get(node, node)
+
+    def lowest_common_ancestor(a: int, b: int) -> int:
+        seen = set()
+        while True:
+            a = find_base(a)
+            seen.add(a)
+            if mate[a] == -1:
+                break
+            a = parent[mate[a]]
+        while True:
+            b = find_base(b)
+            if b in seen:
+                return b
+            b = parent[mate[b]]
+
+    def mark_path(node: int, blossom_base: int, child: int, blossom: set) -> None:
+        while find_base(node) != blossom_base:
+            blossom.add(find_base(node))
+            blossom.add(find_base(mate[node]))
+            parent[node] = child
+            child = mate[node]
+            node = parent[mate[node]]
+
+    while queue:
+        node = queue.popleft()
+        for other in adj[node]:
+            if find_base(node) == find_base(other) or mate[node] == other:
+                continue
+            if other == root or (mate[other] != -1 and mate[other] in parent):
+                # Odd cycle: contract the blossom on its base
+                blossom_base = lowest_common_ancestor(node, other)
+                blossom = set()
+                mark_path(node, blossom_base, other, blossom)
+                mark_path(other, blossom_base, node, blossom)
+                for member in outer | parent.keys():
+                    if find_base(member) in blossom:
+                        base[member] = blossom_base
+                        if member not in outer:
+                            outer.add(member)
+                            queue.append(member)
+            elif other not in parent:
+                parent[other] = node
+                if mate[other] == -1:
+                    # Flip the alternating path ending in `other`
+                    while other != -1:
+                        previous = parent[other]
+                        next_other = mate[previous]
+                        mate[other], mate[previous] = previous, other
+                        other = next_other
+                    return True
+                outer.add(mate[other])
+                queue.append(mate[other])
+    return False
+
+
+def max_cardinality_matching(n_nodes: int, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """
+    Maximum cardinality matching of an unweighted graph.
+
+    Edmonds' blossom algorithm on integer adjacency lists, started from a
+    min-degree greedy matching. A node with no augmenting path will never
+    get one later, so each free node is searched at most once.
+    """
+    indptr, neighbors, _ = adjacency(n_nodes, u, v)
+    return mates_to_edges(max_cardinality_mates(indptr, neighbors), n_nodes, u, v)
+
+
+def max_cardinality_mates(indptr: np.ndarray, neighbors: np.ndarray) -> List[int]:
+    """Mates of `max_cardinality_matching`, given the CSR adjacency."""
+    n_nodes = len(indptr) - 1
+    mate = _greedy_mates(indptr, neighbors)
+    adj = [neighbors[indptr[i] : indptr[i + 1]].tolist() for i in range(n_nodes)]
+    for root in range(n_nodes):
+        if mate[root] == -1 and adj[root]:
+            augment_from(root, adj, mate)
+    return mate
@@ -0,0 +1,192 @@
+"""
+Assignment of a single slot to each selected match.
+
+`select.select_matches` keeps all the slots shared by each selected pair.
+`assign_slots` picks one of them per pair, without exceeding the capacity of the
+slots, e.g. rooms or hosts, and spreading the pairs over the slots. Pairs whose
+slots are all full are reported as unassignable.
+
+The assignment is a greedy on integer arrays, by rounds: each pending pair asks for
+its least loaded open slot, and each slot accepts the pairs with fewest alternatives
+first, up to its remaining capacity and to an even share of the pending pairs, so
+that the loads are updated before the next round.
+"""
+
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from . import trace
+
+
+class AssignmentReport(NamedTuple):
+    """
+    Outcome of a slot assignment.
+
+    Attributes
+    ----------
+    n_assigned: int
+                Number of pairs assigned to a slot.
+    unassigned: pandas.DataFrame
+                Pairs not assigned, because they share no slot with free capacity.
+    load: pandas.Series
+          Number of pairs assigned to each slot.
+    """
+
+    n_assigned: int
+    unassigned: pd.DataFrame
+    load: pd.Series
+
+
+def _slot_options(slots: pd.Series) -> tuple:
+    # Slots of each pair as (pair position, slot code) arrays, for tuples of slots
+    # as well as Arrow lists of the columnar layout
+    exploded = pd.Series(slots.to_numpy(), index=np.arange(len(slots))).explode()
+    exploded = exploded[exploded.notna()]
+    codes, slot_values = pd.factorize(exploded.to_numpy(dtype=object))
+    return exploded.index.to_numpy(np.int64), codes.astype(np.int64), slot_values
+
+
+def assign_slot_codes(
+    pair_ix: np.ndarray,
+    slot_code: np.ndarray,
+    n_pairs: int,
+    capacity: np.ndarray,
+) -> np.ndarray:
+    """
+    Assign one slot to each pair, given integer-coded options.
+
+    Parameters
+    ----------
+    pair_ix: numpy.ndarray
+             Pair of each option.
+    slot_code: numpy.ndarray
+               Slot of each option.
+    n_pairs: int
+             Number of pairs.
+    capacity: numpy.ndarray
+              Capacity of each slot, `numpy.inf` if unlimited.
+
+    Returns
+    -------
+    assigned: numpy.ndarray
+              Slot code assigned to each pair, -1 if unassignable.
+    """
+    n_slots = len(capacity)
+    capacity = np.asarray(capacity, dtype=float)
+    remaining = capacity.copy()
+    load = np.zeros(n_slots, dtype=np.int64)
+    n_options = np.bincount(pair_ix, minlength=n_pairs)
+    assigned = np.full(n_pairs, -1, dtype=np.int64)
+
+    while True:
+        live = np.flatnonzero((assigned[pair_ix] == -1) & (remaining[slot_code] > 0))
+        if not len(live):
+            break
+        pairs, slots = pair_ix[live], slot_code[live]
+
+        # Each pending pair asks for its least loaded open slot, relative to its
+        # capacity then in absolute terms. Ties are broken by a rotation of the
+        # slots per pair, so that pairs with the same options spread over them
+        rotation = (slots - pairs) % n_slots
+        fill = load[slots] / capacity[slots]
+        order = np.lexsort((rotation, load[slots], fill, pairs))
+        pairs, slots = pairs[order], slots[order]
+        first = np.r_[True, pairs[1:] != pairs[:-1]]
+        pairs, slots = pairs[first], slots[first]
+
+        # Each slot accepts the most constrained pairs first, up to its remaining
+        # capacity and an even share of the pending pairs
+        share = -(-len(pairs) // len(np.unique(slot_code[live])))
+        order = np.lexsort((pairs, n_options[pairs], slots))
+        pairs, slots = pairs[order], slots[order]
+        starts = np.r_[0, np.flatnonzero(slots[1:] != slots[:-1]) + 1]
+        rank = np.arange(len(slots)) - np.repeat(
+            starts, np.diff(np.r_[starts, len(slots)])
+        )
+        accepted = (rank < remaining[slots]) & (rank < share)
+
+        assigned[pairs[accepted]] = slots[accepted]
+        counts = np.bincount(slots[accepted], minlength=n_slots)
+        load += counts
+        remaining -= counts
+    return assigned
+
+
+def assign_slots(
+    selected: pd.DataFrame,
+    slots_col: str,
+    capacities: Optional[Union[pd.Series, int]] = None,
+    default_capacity: Optional[int] = None,
+    assigned_col: str = "assigned_slot",
+    return_report: bool = False,
+) -> pd.DataFrame:
+    """
+    Pick one slot per selected match, within the capacity of the slots.
+
+    Parameters
+    ----------
+    selected: pandas.DataFrame
+              Selected matches, as returned by `select.select_matches`.
+    slots_col: str
+               Name of the column with the slots shared by each pair, as tuples or
+               as the Arrow lists of the columnar layout.
+    capacities: pandas.Series or int, default=None
+                Maximum number of pairs per slot, indexed by slot, or the same for
+                all the slots. Unlimited if None.
+    default_capacity: int, default=None
+                      Capacity of the slots missing from `capacities`, unlimited if
+                      None.
+    assigned_col: str, default="assigned_slot"
+                  Name of the output column with the assigned slot.
+    return_report: bool, default=False
+                   If True the function also returns an `AssignmentReport`.
+
+    Returns
+    -------
+    assigned: pandas.DataFrame
+              `selected` with the assigned slot of each pair in `assigned_col`,
+              missing for the unassignable pairs.
+    report: AssignmentReport, optional
+
+    Examples
+    --------
+    selected = select.select_matches(matches, "subject", "slot")
+    capacities = pd.Series({"13:00": 2, "14:00": 5})
+    assigned, report = assign_slots(selected, "slot", capacities, return_report=True)
+    report.unassigned
+    """
+    with trace.span("assign.slots", rows_in=len(selected)) as s:
+        pair_ix, slot_code, slot_values = _slot_options(selected[slots_col])
+        if capacities is None:
+            capacity = np.full(len(slot_values), np.inf)
+        elif isinstance(capacities, pd.Series):
+            default = np.inf if default_capacity is None else default_capacity
+            capacity = (
+                capacities.reindex(slot_values).astype(float).fillna(default).to_numpy()
+            )
+        else:
+            capacity = np.full(len(slot_values), float(capacities))
+
+        codes = assign_slot_codes(pair_ix, slot_code, len(selected), capacity)
+        is_assigned = codes >= 0
+        assigned = selected.copy()
+        assigned_slots = np.full(len(codes), None, dtype=object)
+        assigned_slots[is_assigned] = slot_values[codes[is_assigned]]
+        assigned[assigned_col] = assigned_slots
+        s.rows_out = int(is_assigned.sum())
+
+    if not return_report:
+        return assigned
+    load = pd.Series(
+        np.bincount(codes[is_assigned], minlength=len(slot_values)),
+        index=pd.Index(slot_values, name=slots_col),
+        name="load",
+    )
+    report = AssignmentReport(
+        n_assigned=int(is_assigned.sum()),
+        unassigned=selected[~is_assigned],
+        load=load,
+    )
+    return assigned, report
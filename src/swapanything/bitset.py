@@ -0,0 +1,211 @@
+"""
+Availabilities as bitsets.
+
+The slots of each subject are a row of uint64 words, bit `j` of the row being set if
+the subject is available in slot `j`. Event calendars have at most a few hundred
+slots, so a subject takes a few words, and the slots shared by subjects are a
+bitwise AND, counted with a popcount, for any number of subjects at once.
+
+Examples
+--------
+bitsets = AvailabilityBitsets.from_availabilities(availabilities, "subject", "slot")
+bitsets.top_overlaps("KungFury", k=5)
+"""
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# Number of set bits of each byte
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def n_words(n_slots: int) -> int:
+    """Number of uint64 words holding `n_slots` bits."""
+    return max(-(-n_slots // 64), 1)
+
+
+def pack(
+    subject_codes: np.ndarray, slot_codes: np.ndarray, n_subjects: int, n_slots: int
+) -> np.ndarray:
+    """
+    Bitsets of the slots of each subject, from (subject, slot) code pairs.
+
+    Returns
+    -------
+    bitsets: numpy.ndarray
+             (n_subjects, n_words) uint64 array.
+    """
+    bitsets = np.zeros((n_subjects, n_words(n_slots)), dtype=np.uint64)
+    subject_codes = np.asarray(subject_codes, dtype=np.int64)
+    slot_codes = np.asarray(slot_codes, dtype=np.int64)
+    np.bitwise_or.at(
+        bitsets,
+        (subject_codes, slot_codes // 64),
+        np.left_shift(np.uint64(1), (slot_codes % 64).astype(np.uint64)),
+    )
+    return bitsets
+
+
+def unpack(bitsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Set bits of a 2D array of bitsets.
+
+    Returns
+    -------
+    rows: numpy.ndarray
+          Row of each set bit, increasing.
+    slot_codes: numpy.ndarray
+                Slot of each set bit, increasing within each row.
+    """
+    # Only the non-empty words are decoded, as most of them are empty
+    rows, word_ix = np.nonzero(bitsets)
+    words = np.ascontiguousarray(bitsets[rows, word_ix])
+    bits = np.unpackbits(words.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    bit_ix, bit = np.nonzero(bits)
+    return rows[bit_ix], word_ix[bit_ix] * 64 + bit
+
+
+def popcount(bitsets: np.ndarray) -> np.ndarray:
+    """Number of set bits of each bitset, along the last axis."""
+    as_bytes = np.ascontiguousarray(bitsets, dtype=np.uint64).view(np.uint8)
+    return _POPCOUNT[as_bytes].sum(axis=-1, dtype=np.int64)
+
+
+class AvailabilityBitsets:
+    """
+    Slots of each subject as a bitset, with overlap queries.
+
+    Parameters
+    ----------
+    bitsets: numpy.ndarray
+             (n_subjects, n_words) uint64 array, see `pack`.
+    subjects: pandas.Index
+              Subject of each row.
+    slots: pandas.Index
+           Slot of each bit.
+
+    Examples
+    --------
+    bitsets = AvailabilityBitsets.from_availabilities(availabilities, "subject", "slot")
+    bitsets.overlaps("KungFury")
+    | subject     |   shared |
+    --------------------------
+    | Thor        |        2 |
+    | Triceracop  |        1 |
+    """
+
+    def __init__(
+        self, bitsets: np.ndarray, subjects: pd.Index, slots: pd.Index
+    ) -> None:
+        self.bitsets = bitsets
+        self.subjects = subjects
+        self.slots = slots
+
+    @classmethod
+    def from_availabilities(
+        cls,
+        availabilities: pd.DataFrame,
+        subject_col: str,
+        slot_col: str,
+        availabilities_by_slot: bool = False,
+    ) -> "AvailabilityBitsets":
+        """Bitsets of availabilities, as accepted by `prep.get_all_matches`."""
+        from .prep import encode_availabilities
+
+        coded, subjects, slots = encode_availabilities(
+            availabilities,
+            subject_col=subject_col,
+            slot_col=slot_col,
+            availabilities_by_slot=availabilities_by_slot,
+        )
+        bitsets = pack(coded["subject"], coded["slot"], len(subjects), len(slots))
+        return cls(bitsets, subjects, slots)
+
+    def __len__(self) -> int:
+        return len(self.subjects)
+
+    def get_codes(self, subjects) -> np.ndarray:
+        """Codes of `subjects`, raising a KeyError for unknown ones."""
+        codes = self.subjects.get_indexer(subjects)
+        if (codes < 0).any():
+            unknown = np.asarray(subjects, dtype=object)[codes < 0].tolist()
+            raise KeyError(f"Unknown subjects {unknown}")
+        return codes
+
+    def shared_counts_codes(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Number of slots shared by subjects `a[i]` and `b[i]`, given codes."""
+        return popcount(self.bitsets[a] & self.bitsets[b])
+
+    def shared_counts(self, first, second) -> np.ndarray:
+        """Number of slots shared by subjects `first[i]` and `second[i]`."""
+        return self.shared_counts_codes(self.get_codes(first), self.get_codes(second))
+
+    def shared_slots(self, first, second) -> Tuple:
+        """Slots shared by two subjects."""
+        a, b = self.get_codes([first, second])
+        _, slot_codes = unpack(self.bitsets[[a]] & self.bitsets[[b]])
+        return tuple(self.slots[slot_codes])
+
+    def overlaps(self, subject, min_shared: int = 1) -> pd.Series:
+        """
+        Subjects sharing slots with `subject`.
+
+        Parameters
+        ----------
+        subject:
+                 Subject to compare with all the others.
+        min_shared: int, default=1
+                    Least number of shared slots.
+
+        Returns
+        -------
+        shared: pandas.Series
+                Number of shared slots, indexed by subject, by decreasing number
+                then by subject.
+        """
+        code = self.get_codes([subject])[0]
+        counts = popcount(self.bitsets & self.bitsets[code])
+        counts[code] = 0
+        found = np.flatnonzero(counts >= max(min_shared, 1))
+        found = found[np.argsort(-counts[found], kind="stable")]
+        return pd.Series(
+            counts[found],
+            index=self.subjects[found],
+            name="shared",
+        )
+
+    def top_overlaps(self, subject, k: int = 10) -> pd.Series:
+        """The `k` subjects sharing the most slots with `subject`, see `overlaps`."""
+        return self.overlaps(subject).iloc[:k]
+
+    def pair_codes(self, block_words: int = 1 << 22) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Codes of all the pairs of subjects sharing at least one slot.
+
+        The AND of every pair is computed by blocks of subjects, holding about
+        `block_words` words at once, which suits a few thousand subjects.
+
+        Returns
+        -------
+        subject_a, subject_b: numpy.ndarray
+                              Codes of the pairs, `subject_a < subject_b`, sorted.
+        """
+        n_subjects, width = self.bitsets.shape
+        # Subjects without slots can't share any
+        active = np.flatnonzero(self.bitsets.any(axis=1))
+        bitsets = self.bitsets[active]
+        block = max(block_words // max(len(active) * width, 1), 1)
+        firsts, seconds = [], []
+        for start in range(0, len(active), block):
+            rows = bitsets[start : start + block]
+            overlapping = (rows[:, None, :] & bitsets[None, start + 1 :, :]).any(axis=2)
+            a, b = np.nonzero(overlapping)
+            # Keep each pair once, b is offset from the row after `start`
+            keep = b >= a
+            firsts.append(active[start + a[keep]])
+            seconds.append(active[start + 1 + b[keep]])
+        if not firsts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(firsts), np.concatenate(seconds)
@@ -0,0 +1,219 @@
+"""
+Result cache of the pipeline stages.
+
+`get_all_matches`, `score_matches` and `select_matches` take an opt-in `cache=`. A
+call is keyed by a content hash of its arguments, frames included, so re-running a
+stage on unchanged inputs returns the cached result instead of computing it again.
+Each stage has its own LRU in memory and, optionally, a tier of pickles on disk.
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import types
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class CacheStats(NamedTuple):
+    """
+    Usage of the cache of a stage.
+
+    Attributes
+    ----------
+    hits: int
+          Calls served from memory.
+    disk_hits: int
+               Calls served from disk.
+    misses: int
+            Calls computed.
+    size: int
+          Results in memory.
+    """
+
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    size: int = 0
+
+
+def _update(digest: "hashlib._Hash", value: Any) -> None:
+    digest.update(type(value).__qualname__.encode())
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode())
+            digest.update(repr(value.dtypes.tolist()).encode())
+        else:
+            digest.update(repr((value.name, value.dtype)).encode())
+        try:
+            hashes = pd.util.hash_pandas_object(value, index=True)
+            digest.update(np.asarray(hashes).tobytes())
+        except TypeError:
+            # Unhashable cells, e.g. lists
+            digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype, value.shape)).encode())
+        if value.dtype == object:
+            digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        else:
+            digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(str(len(value)).encode())
+        for item in value:
+            _update(digest, item)
+    elif isinstance(value, dict):
+        digest.update(str(len(value)).encode())
+        for key in sorted(value, key=repr):
+            _update(digest, key)
+            _update(digest, value[key])
+    elif value is None or isinstance(value, (str, bytes, int, float, bool)):
+        digest.update(repr(value).encode())
+    elif isinstance(value, types.MethodType):
+        _update(digest, (value.__self__, value.__func__))
+    elif isinstance(value, types.FunctionType):
+        # By name and code, as every function has an empty `vars()`
+        digest.update(f"{value.__module__}.{value.__qualname__}".encode())
+        closure = [cell.cell_contents for cell in value.__closure__ or ()]
+        _update(
+            digest, (value.__code__, value.__defaults__, value.__kwdefaults__, closure)
+        )
+    elif isinstance(value, types.CodeType):
+        digest.update(value.co_code)
+        _update(digest, (value.co_consts, value.co_names))
+    elif hasattr(value, "__dict__"):
+        _update(digest, vars(value))
+    else:
+        digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def content_hash(*args, **kwargs) -> str:
+    """Hash of the content of the arguments, frames and arrays included."""
+    digest = hashlib.blake2b(digest_size=20)
+    _update(digest, args)
+    _update(digest, kwargs)
+    return digest.hexdigest()
+
+
+def _copy(value: Any) -> Any:
+    # Callers get their own copy of cached frames, which they may modify
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if type(value) is tuple:
+        return tuple(_copy(v) for v in value)
+    return value
+
+
+class ResultCache:
+    """
+    LRU caches of the results of the pipeline stages.
+
+    Parameters
+    ----------
+    max_entries: int, default=32
+                 Results kept in memory per stage.
+    directory: str, default=None
+               If given, results are also pickled to this directory and read back
+               when they are not in memory anymore, e.g. in a new process. Old files
+               are not removed automatically, see `clear`.
+
+    Examples
+    --------
+    cache = ResultCache(directory=".swapanything-cache")
+    matches = prep.get_all_matches(availabilities, "subject", "slot", cache=cache)
+    selected = select.select_matches(matches, "subject", "slot", cache=cache)
+    cache.stats()
+    """
+
+    def __init__(self, max_entries: int = 32, directory: Optional[str] = None) -> None:
+        self.max_entries = max_entries
+        self.directory = os.fspath(directory) if directory is not None else None
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+        self._results: Dict[str, OrderedDict] = {}
+        self._stats: Dict[str, CacheStats] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.directory, f"{stage}-{key}.pkl")
+
+    def _count(self, stage: str, **increments: int) -> None:
+        stats = self._stats.get(stage, CacheStats())
+        self._stats[stage] = stats._replace(
+            **{name: getattr(stats, name) + n for name, n in increments.items()}
+        )
+
+    def _store(self, stage: str, key: str, result: Any) -> None:
+        results = self._results.setdefault(stage, OrderedDict())
+        results[key] = result
+        results.move_to_end(key)
+        while len(results) > self.max_entries:
+            results.popitem(last=False)
+
+    def memoize(self, stage: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Result of `func(*args, **kwargs)`, computed only if not cached.
+
+        Parameters
+        ----------
+        stage: str
+               Stage of the pipeline, e.g. "prep", with its own LRU and stats.
+        func: callable
+              Function computing the result, part of the key with the arguments.
+
+        Returns
+        -------
+        result:
+            Result of the call. Frames are copies of the cached ones, other objects,
+            e.g. graphs, are shared by the calls.
+        """
+        key = content_hash(func.__module__, func.__qualname__, *args, **kwargs)
+        with self._lock:
+            results = self._results.get(stage, {})
+            if key in results:
+                results.move_to_end(key)
+                self._count(stage, hits=1)
+                return _copy(results[key])
+
+        if self.directory is not None and os.path.exists(self._path(stage, key)):
+            with open(self._path(stage, key), "rb") as f:
+                result = pickle.load(f)
+            with self._lock:
+                self._store(stage, key, result)
+                self._count(stage, disk_hits=1)
+            return _copy(result)
+
+        result = func(*args, **kwargs)
+        if self.directory is not None:
+            # Written aside and renamed, so that readers never see partial files
+            path = self._path(stage, key)
+            with open(f"{path}.{os.getpid()}.tmp", "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        with self._lock:
+            self._store(stage, key, result)
+            self._count(stage, misses=1)
+        return _copy(result)
+
+    def stats(self) -> Dict[str, CacheStats]:
+        """Hits, misses and size of each stage."""
+        with self._lock:
+            return {
+                stage: stats._replace(size=len(self._results.get(stage, ())))
+                for stage, stats in self._stats.items()
+            }
+
+    def clear(self, stage: Optional[str] = None) -> None:
+        """Drop the results, and stats, of `stage` or of all the stages if None."""
+        with self._lock:
+            stages = [stage] if stage is not None else list(self._stats)
+            for name in stages:
+                self._results.pop(name, None)
+                self._stats.pop(name, None)
+            if self.directory is not None:
+                for filename in os.listdir(self.directory):
+                    if stage is None or filename.startswith(f"{stage}-"):
+                        os.remove(os.path.join(self.directory, filename))
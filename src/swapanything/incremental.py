@@ -0,0 +1,274 @@
+"""
+Incremental matching module. In this module you'll find a stateful session keeping the
+candidate matches and the selected ones up to date while subjects join, leave or change
+their availabilities, without recomputing everything from scratch.
+"""
+
+from collections import defaultdict
+from typing import Annotated, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import _matching, prep
+
+
+def _pair(a: Hashable, b: Hashable) -> Tuple[Hashable, Hashable]:
+    return (a, b) if a <= b else (b, a)
+
+
+class AvailabilityIndex:
+    """
+    Slot -> subjects and subject -> slots posting lists, with the excluded pairs.
+
+    The in-memory state shared by `Matcher` and `lookup.CandidateIndex`. Excluded
+    pairs are kept as sorted tuples of subjects.
+    """
+
+    def __init__(self) -> None:
+        self.subjects_by_slot: Dict[Hashable, Set[Hashable]] = defaultdict(set)
+        self.slots_by_subject: Dict[Hashable, Set[Hashable]] = defaultdict(set)
+        self.excluded: Set[Tuple[Hashable, Hashable]] = set()
+
+    def __len__(self) -> int:
+        return len(self.slots_by_subject)
+
+    def __contains__(self, subject: Hashable) -> bool:
+        return subject in self.slots_by_subject
+
+    def add(self, subject: Hashable, slot: Hashable) -> bool:
+        """Make `subject` available in `slot`, returning False if it already was."""
+        if slot in self.slots_by_subject[subject]:
+            return False
+        self.subjects_by_slot[slot].add(subject)
+        self.slots_by_subject[subject].add(slot)
+        return True
+
+    def remove(self, subject: Hashable, slot: Hashable) -> bool:
+        """Make `subject` unavailable in `slot`, returning False if it already was."""
+        if slot not in self.slots_by_subject.get(subject, ()):
+            return False
+        self.slots_by_subject[subject].discard(slot)
+        self.subjects_by_slot[slot].discard(subject)
+        if not self.subjects_by_slot[slot]:
+            del self.subjects_by_slot[slot]
+        return True
+
+    def add_exclusion(self, a: Hashable, b: Hashable) -> Tuple[Hashable, Hashable]:
+        """Forbid matching `a` with `b`, returning the excluded pair."""
+        pair = _pair(a, b)
+        self.excluded.add(pair)
+        return pair
+
+    def is_excluded(self, a: Hashable, b: Hashable) -> bool:
+        """Whether matching `a` with `b` is forbidden."""
+        return _pair(a, b) in self.excluded
+
+    def shared_slots(self, subject: Hashable) -> Dict[Hashable, List[Hashable]]:
+        """Slots shared with each other subject, excluded pairs left out."""
+        shared: Dict[Hashable, List[Hashable]] = defaultdict(list)
+        for slot in self.slots_by_subject.get(subject, ()):
+            for other in self.subjects_by_slot[slot]:
+                shared[other].append(slot)
+        shared.pop(subject, None)
+        if self.excluded:
+            for other in [o for o in shared if self.is_excluded(subject, o)]:
+                del shared[other]
+        return shared
+
+
+class Matcher:
+    """
+    Matching session accepting deltas on availabilities and exclusions.
+
+    The session keeps an `AvailabilityIndex`, the candidate pairs with their shared
+    slots and a maximum cardinality matching between subjects. Each delta only updates
+    the pairs of the touched subjects, then repairs the matching by searching augmenting
+    paths from the touched subjects.
+
+    The repair is exact for removals and for subjects without a match. When a new pair
+    joins two subjects that are both already matched, a better matching may need a global
+    search: call `rematch` to recompute it from scratch.
+
+    Parameters
+    ----------
+    availabilities: pandas.DataFrame
+                    Initial availabilities, one row per subject and slot.
+    subject_col: str
+                 Name of the column where subjects are stored.
+    slot_col: str
+              Name of the column where slots are stored.
+    exclusions: pandas.DataFrame, default=None
+                Initial exclusions, one excluded pair per row.
+    exclusions_subject_columns: (str, str), default=None
+                                Names of the columns holding the excluded subjects.
+
+    Examples
+    --------
+    matcher = Matcher(availabilities, subject_col="subject", slot_col="availability")
+    matcher.add_availability("Katana", "13:00")
+    matcher.remove_subject("Thor")
+    matcher.get_selected()
+    """
+
+    def __init__(
+        self,
+        availabilities: pd.DataFrame,
+        subject_col: str,
+        slot_col: str,
+        exclusions: Optional[pd.DataFrame] = None,
+        exclusions_subject_columns: Optional[Annotated[Iterable[str], 2]] = None,
+    ) -> None:
+        self.subject_col = subject_col
+        self.slot_col = slot_col
+
+        self._index = AvailabilityIndex()
+        self._pairs: Dict[Tuple[Hashable, Hashable], Set[Hashable]] = {}
+
+        # Subjects are graph nodes 0..n-1, never recycled once assigned
+        self._nodes: Dict[Hashable, int] = {}
+        self._node_subjects: List[Hashable] = []
+        self._adj: List[Set[int]] = []
+        self._mate: List[int] = []
+
+        availabilities = availabilities[[subject_col, slot_col]].dropna()
+        for subject, slot in availabilities.itertuples(index=False):
+            self._index.add(subject, slot)
+        if exclusions is not None:
+            first_col, second_col = exclusions_subject_columns
+            for a, b in exclusions[[first_col, second_col]].dropna().values:
+                self._index.add_exclusion(a, b)
+
+        # Bulk-build the candidate pairs with the vectorized prep engine
+        matches = prep.get_all_matches(
+            availabilities,
+            subject_col=subject_col,
+            slot_col=slot_col,
+            engine="numpy",
+        )
+        for pair, slots in matches.itertuples(index=False):
+            if pair not in self._index.excluded:
+                self._pairs[pair] = set(slots)
+        for subject in self._index.slots_by_subject:
+            self._node(subject)
+        for a, b in self._pairs:
+            self._adj[self._nodes[a]].add(self._nodes[b])
+            self._adj[self._nodes[b]].add(self._nodes[a])
+        self.rematch()
+
+    def _node(self, subject: Hashable) -> int:
+        if subject not in self._nodes:
+            self._nodes[subject] = len(self._node_subjects)
+            self._node_subjects.append(subject)
+            self._adj.append(set())
+            self._mate.append(-1)
+        return self._nodes[subject]
+
+    def _add_pair_slot(self, a: Hashable, b: Hashable, slot: Hashable) -> bool:
+        pair = _pair(a, b)
+        if pair in self._index.excluded:
+            return False
+        if pair in self._pairs:
+            self._pairs[pair].add(slot)
+            return False
+        self._pairs[pair] = {slot}
+        node_a, node_b = self._nodes[a], self._nodes[b]
+        self._adj[node_a].add(node_b)
+        self._adj[node_b].add(node_a)
+        return True
+
+    def _remove_pair(self, pair: Tuple[Hashable, Hashable]) -> List[int]:
+        # Returns the nodes left without a match
+        del self._pairs[pair]
+        node_a, node_b = self._nodes[pair[0]], self._nodes[pair[1]]
+        self._adj[node_a].discard(node_b)
+        self._adj[node_b].discard(node_a)
+        if self._mate[node_a] == node_b:
+            self._mate[node_a] = self._mate[node_b] = -1
+            return [node_a, node_b]
+        return []
+
+    def _repair(self, nodes: Iterable[int]) -> None:
+        for node in nodes:
+            if self._mate[node] == -1 and self._adj[node]:
+                _matching.augment_from(node, self._adj, self._mate)
+
+    def add_availability(self, subject: Hashable, slot: Hashable) -> None:
+        """Make `subject` available in `slot`, adding the subject if new."""
+        touched = [self._node(subject)]
+        if not self._index.add(subject, slot):
+            return
+        for other in self._index.subjects_by_slot[slot] - {subject}:
+            if self._add_pair_slot(subject, other, slot):
+                touched.append(self._nodes[other])
+        self._repair(touched)
+
+    def remove_availability(self, subject: Hashable, slot: Hashable) -> None:
+        """Make `subject` unavailable in `slot`."""
+        if not self._index.remove(subject, slot):
+            return
+
+        touched = []
+        for other in self._index.subjects_by_slot.get(slot, ()):
+            pair = _pair(subject, other)
+            if pair not in self._pairs:
+                continue
+            self._pairs[pair].discard(slot)
+            if not self._pairs[pair]:
+                touched.extend(self._remove_pair(pair))
+        self._repair(touched)
+
+    def add_subject(self, subject: Hashable, slots: Iterable[Hashable] = ()) -> None:
+        """Add `subject`, available in `slots`."""
+        self._node(subject)
+        self._index.slots_by_subject[subject]
+        for slot in slots:
+            self.add_availability(subject, slot)
+
+    def remove_subject(self, subject: Hashable) -> None:
+        """Remove `subject` and all its availabilities."""
+        for slot in list(self._index.slots_by_subject.get(subject, ())):
+            self.remove_availability(subject, slot)
+        self._index.slots_by_subject.pop(subject, None)
+
+    def add_exclusion(self, a: Hashable, b: Hashable) -> None:
+        """Forbid matching `a` with `b`."""
+        pair = self._index.add_exclusion(a, b)
+        if pair in self._pairs:
+            self._repair(self._remove_pair(pair))
+
+    def rematch(self) -> None:
+        """Recompute the maximum cardinality matching from scratch."""
+        u, v = [], []
+        for node, neighbors in enumerate(self._adj):
+            u.extend([node] * len(neighbors))
+            v.extend(neighbors)
+        n_nodes = len(self._adj)
+        u, v = np.asarray(u, dtype=np.int64), np.asarray(v, dtype=np.int64)
+        positions = _matching.max_cardinality_matching(n_nodes, u, v)
+        self._mate = [-1] * n_nodes
+        for a, b in zip(u[positions].tolist(), v[positions].tolist(), strict=True):
+            self._mate[a], self._mate[b] = b, a
+
+    def _to_frame(self, pairs: Iterable[Tuple[Hashable, Hashable]]) -> pd.DataFrame:
+        pairs = sorted(pairs)
+        return pd.DataFrame(
+            {
+                self.subject_col: pairs,
+                self.slot_col: [tuple(sorted(self._pairs[pair])) for pair in pairs],
+            },
+            columns=[self.subject_col, self.slot_col],
+        )
+
+    def get_matches(self) -> pd.DataFrame:
+        """All the candidate matches, as returned by `prep.get_all_matches`."""
+        return self._to_frame(self._pairs)
+
+    def get_selected(self) -> pd.DataFrame:
+        """The selected matches, as returned by `select.select_matches`."""
+        subjects = self._node_subjects
+        return self._to_frame(
+            _pair(subjects[node], subjects[mate])
+            for node, mate in enumerate(self._mate)
+            if mate > node
+        )
@@ -0,0 +1,167 @@
+"""
+Candidate lookup module. In this module you'll find an in-memory index answering the
+candidate matches of a single subject, e.g. to show a new subject their possible
+partners, without computing the matches of all the subjects.
+"""
+
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Union,
+)
+
+import numpy as np
+import pandas as pd
+
+from ._matching import split_pair_keys
+from .incremental import AvailabilityIndex
+from .prep import ExclusionIndex
+
+if TYPE_CHECKING:
+    from .score import MatchScorer
+
+
+class CandidateIndex:
+    """
+    Candidate matches of single subjects, from an `incremental.AvailabilityIndex`.
+
+    The index is built from the same inputs as `prep.get_all_matches`, but pairs
+    are only computed for the queried subject, from the posting lists of its slots.
+    New availabilities and exclusions are inserted in place.
+
+    Parameters
+    ----------
+    availabilities: pandas.DataFrame
+                    Availabilities, as accepted by `prep.get_all_matches`.
+    subject_col: str
+                 Name of the column where subjects are stored.
+    slot_col: str
+              Name of the column where slots are stored.
+    exclusions: pandas.DataFrame or ExclusionIndex, default=None
+                Pairs of subjects that must not be matched.
+    exclusions_subject_columns: (str, str), default=None
+                                Names of the subject columns of `exclusions`, if a
+                                DataFrame.
+    availabilities_by_slot: bool, default=False
+                            As in `prep.get_all_matches`.
+    scorer: MatchScorer, default=None
+            If given, candidates are scored and sorted by decreasing score.
+
+    Examples
+    --------
+    index = CandidateIndex(availabilities, subject_col="subject", slot_col="slot")
+    index.add_availability("Katana", "13:00")
+    index.candidates_for("Katana")
+    |   |  subject |      slot |
+    ----------------------------
+    | 0 | KungFury |  (13:00,) |
+    | 1 |     Thor |  (13:00,) |
+    """
+
+    def __init__(
+        self,
+        availabilities: pd.DataFrame,
+        subject_col: str,
+        slot_col: str,
+        exclusions: Union[pd.DataFrame, ExclusionIndex, None] = None,
+        exclusions_subject_columns: Optional[Annotated[Iterable[str], 2]] = None,
+        availabilities_by_slot: bool = False,
+        scorer: Optional["MatchScorer"] = None,
+    ) -> None:
+        self.subject_col = subject_col
+        self.slot_col = slot_col
+        self.scorer = scorer
+
+        self._index = AvailabilityIndex()
+
+        if availabilities_by_slot:
+            availabilities = availabilities[[slot_col, subject_col]].explode(
+                subject_col
+            )
+        self.add_availabilities(availabilities)
+
+        if isinstance(exclusions, pd.DataFrame):
+            first_col, second_col = exclusions_subject_columns
+            pairs = exclusions[[first_col, second_col]].dropna().values
+        elif isinstance(exclusions, ExclusionIndex):
+            subjects = exclusions.subjects.to_numpy()
+            first, second = split_pair_keys(exclusions.keys)
+            pairs = zip(subjects[first], subjects[second], strict=True)
+        else:
+            pairs = ()
+        for a, b in pairs:
+            self.add_exclusion(a, b)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, subject: Hashable) -> bool:
+        return subject in self._index
+
+    def add_availability(self, subject: Hashable, slot: Hashable) -> None:
+        """Make `subject` available in `slot`, adding the subject if new."""
+        self._index.add(subject, slot)
+
+    def add_availabilities(self, availabilities: pd.DataFrame) -> None:
+        """Insert availabilities, one row per subject and slot."""
+        rows = availabilities[[self.subject_col, self.slot_col]].dropna()
+        for subject, slot in rows.itertuples(index=False):
+            self.add_availability(subject, slot)
+
+    def add_exclusion(self, a: Hashable, b: Hashable) -> None:
+        """Forbid matching `a` with `b`."""
+        self._index.add_exclusion(a, b)
+
+    def is_excluded(self, a: Hashable, b: Hashable) -> bool:
+        """Whether matching `a` with `b` is forbidden."""
+        return self._index.is_excluded(a, b)
+
+    def shared_slots(self, subject: Hashable) -> Dict[Hashable, List[Hashable]]:
+        """Slots shared with each candidate of `subject`, excluded pairs left out."""
+        return self._index.shared_slots(subject)
+
+    def candidates_for(self, subject: Hashable) -> pd.DataFrame:
+        """
+        Candidate matches of `subject`.
+
+        Parameters
+        ----------
+        subject:
+                 Subject to find candidates for. Unknown subjects have none.
+
+        Returns
+        -------
+        candidates: pandas.DataFrame
+                    One row per candidate, with the candidate in `subject_col` and
+                    the sorted tuple of shared slots in `slot_col`, by decreasing
+                    number of shared slots. With a `scorer`, also the score of each
+                    pair in a "score" column, by decreasing score.
+        """
+        shared = self.shared_slots(subject)
+        others = sorted(shared, key=lambda other: (-len(shared[other]), other))
+        candidates = {
+            self.subject_col: others,
+            self.slot_col: [tuple(sorted(shared[other])) for other in others],
+        }
+        if self.scorer is None:
+            return pd.DataFrame(candidates, columns=list(candidates))
+
+        codes = self.scorer.subjects.get_indexer([subject] + others)
+        scores = np.full(len(others), np.nan)
+        if codes[0] >= 0:
+            known = codes[1:] >= 0
+            scores[known] = self.scorer.score_codes(
+                np.full(known.sum(), codes[0]), codes[1:][known]
+            )
+        candidates["score"] = scores
+        order = np.argsort(-np.nan_to_num(scores, nan=-np.inf), kind="stable")
+        return (
+            pd.DataFrame(candidates, columns=list(candidates))
+            .iloc[order]
+            .reset_index(drop=True)
+        )
@@ -1,8 +1,30 @@
 from itertools import combinations
-from typing import Annotated, Iterable, Optional, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Iterable,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    get_args,
+)
 
+import numpy as np
 import pandas as pd
 
+from . import _matching, bitset, trace
+from ._compat import import_pyarrow, import_scipy_sparse
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+    from .cache import ResultCache
+
+Engine = Literal["pandas", "numpy", "sparse", "bitset"]
+Layout = Literal["tuple", "columnar"]
+
 
 class BackendError(Exception):
     pass
@@ -14,7 +36,7 @@ def get_matching_subjects_by_slot(
     subject_col: str,
 ) -> pd.DataFrame:
     matching_subjects_by_slot = (
-        availabilities.groupby(slot_col)
+        availabilities.groupby(slot_col, observed=True)
         .agg({subject_col: lambda x: tuple(x)})
         .reset_index(col_level=1)
     )
@@ -39,69 +61,896 @@ def get_matches_from_slots(
     return matches
 
 
+class ExclusionIndex:
+    """
+    Unordered pairs of subjects that must not be matched.
+
+    Each pair is encoded as a single int64 key, `(min_code << 32) | max_code`,
+    over the sorted subjects of the exclusions. Build it once and reuse it
+    across calls of `apply_exclusions` and `get_all_matches`.
+
+    Parameters
+    ----------
+    exclusions: pandas.DataFrame
+                Table with one excluded pair per row.
+    exclusions_subject_columns: (str, str)
+                                Names of the two columns holding the subjects.
+
+    Examples
+    --------
+    index = ExclusionIndex(exclusions, ["subj1", "subj2"])
+    get_all_matches(availabilities, "subject", "availability", exclusions=index)
+    """
+
+    def __init__(
+        self,
+        exclusions: pd.DataFrame,
+        exclusions_subject_columns: Annotated[Iterable[str], 2],
+    ) -> None:
+        first_col, second_col = exclusions_subject_columns
+        first = exclusions[first_col].to_numpy()
+        second = exclusions[second_col].to_numpy()
+
+        self.subjects: pd.Index = (
+            pd.Index(pd.unique(np.concatenate([first, second]))).dropna().sort_values()
+        )
+        keys = self._encode(self.get_codes(first), self.get_codes(second))
+        self.keys: np.ndarray = np.unique(keys[keys >= 0])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @staticmethod
+    def _encode(first_codes: np.ndarray, second_codes: np.ndarray) -> np.ndarray:
+        first_codes = np.asarray(first_codes, dtype=np.int64)
+        second_codes = np.asarray(second_codes, dtype=np.int64)
+        keys = _matching.pair_keys(first_codes, second_codes)
+        # Pairs involving a subject without exclusions can't be excluded
+        keys[(first_codes < 0) | (second_codes < 0)] = -1
+        return keys
+
+    def get_codes(self, subjects: Iterable) -> np.ndarray:
+        """Codes of `subjects` in this index, -1 for subjects without exclusions."""
+        return self.subjects.get_indexer(subjects)
+
+    def is_excluded_codes(
+        self, first_codes: np.ndarray, second_codes: np.ndarray
+    ) -> np.ndarray:
+        """Boolean mask of the excluded pairs, given codes from `get_codes`."""
+        keys = self._encode(first_codes, second_codes)
+        return _matching.contains(self.keys, keys) & (keys >= 0)
+
+    def is_excluded(self, first: Iterable, second: Iterable) -> np.ndarray:
+        """Boolean mask of the excluded pairs `(first[i], second[i])`."""
+        return self.is_excluded_codes(self.get_codes(first), self.get_codes(second))
+
+
+def _split_pairs(pairs: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    pairs = np.array(pairs.tolist(), dtype=object).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
 def apply_exclusions(
     matches: pd.DataFrame,
-    exclusions: pd.DataFrame,
+    exclusions: Union[pd.DataFrame, ExclusionIndex],
     subject_col: str,
-    exclusions_subject_columns: Annotated[Iterable[str], 2],
+    exclusions_subject_columns: Optional[Annotated[Iterable[str], 2]] = None,
 ) -> pd.DataFrame:
-    exclude_matchings = exclusions[exclusions_subject_columns]
-    exclude_matchings = [tuple(sorted(x)) for x in exclude_matchings.values]
-    exluded_mask = matches[subject_col].isin(exclude_matchings)
+    if not isinstance(exclusions, ExclusionIndex):
+        exclusions = ExclusionIndex(exclusions, exclusions_subject_columns)
+    exluded_mask = exclusions.is_excluded(*_split_pairs(matches[subject_col]))
     matches = matches.loc[~exluded_mask]
     return matches
 
 
+def encode_availabilities(
+    availabilities: pd.DataFrame,
+    subject_col: str,
+    slot_col: str,
+    availabilities_by_slot: bool = False,
+) -> Tuple[pd.DataFrame, pd.Index, pd.Index]:
+    """
+    Factorize subjects and slots to integer codes.
+
+    Parameters
+    ----------
+    availabilities: pandas.DataFrame
+                    Availabilities, one row per subject and slot, or one row per
+                    slot with a tuple of subjects if `availabilities_by_slot`.
+    subject_col: str
+                 Name of the column containing the subjects.
+    slot_col: str
+              Name of the column containing the slots.
+    availabilities_by_slot: bool, default=False
+                            If True, `availabilities` is in the format returned by
+                            `get_matching_subjects_by_slot`.
+
+    Returns
+    -------
+    coded: pandas.DataFrame
+           Unique `slot` and `subject` int32 codes, sorted by slot and subject.
+           Duplicated availabilities are kept only once.
+    subjects: pandas.Index
+              Sorted subjects, position `i` is decoded from code `i`.
+    slots: pandas.Index
+           Sorted slots, position `i` is decoded from code `i`.
+    """
+    if availabilities_by_slot:
+        availabilities = availabilities[[slot_col, subject_col]].explode(subject_col)
+
+    subject_codes, subjects = pd.factorize(availabilities[subject_col], sort=True)
+    slot_codes, slots = pd.factorize(availabilities[slot_col], sort=True)
+
+    # Missing values are coded as -1 and dropped, as `groupby` would do
+    valid = (subject_codes >= 0) & (slot_codes >= 0)
+    keys = np.unique(
+        slot_codes[valid].astype(np.int64) * len(subjects) + subject_codes[valid]
+    )
+    coded = pd.DataFrame(
+        {
+            "slot": (keys // max(len(subjects), 1)).astype(np.int32),
+            "subject": (keys % max(len(subjects), 1)).astype(np.int32),
+        }
+    )
+    return coded, subjects, slots
+
+
+def get_coded_matches_from_slots(coded_availabilities: pd.DataFrame) -> pd.DataFrame:
+    """
+    Integer-coded version of `get_matches_from_slots`.
+
+    All the pairs of subjects sharing a slot are generated at once for all the
+    slots with the same number of subjects, by offsetting the upper triangular
+    indices of that size.
+
+    Parameters
+    ----------
+    coded_availabilities: pandas.DataFrame
+                          Unique `slot` and `subject` codes sorted by slot and
+                          subject, as returned by `encode_availabilities`.
+
+    Returns
+    -------
+    coded_matches: pandas.DataFrame
+                   `slot`, `subject_a` and `subject_b` int32 columns, with
+                   `subject_a < subject_b`.
+    """
+    slot_codes = coded_availabilities["slot"].to_numpy()
+    subject_codes = coded_availabilities["subject"].to_numpy()
+
+    starts = np.flatnonzero(np.r_[True, slot_codes[1:] != slot_codes[:-1]])
+    sizes = np.diff(np.r_[starts, len(slot_codes)])
+
+    slot_parts, subject_a_parts, subject_b_parts = [], [], []
+    for size in np.unique(sizes[sizes > 1]):
+        ix_a, ix_b = np.triu_indices(size, k=1)
+        group_starts = starts[sizes == size][:, None]
+        ix_a = (group_starts + ix_a).ravel()
+        ix_b = (group_starts + ix_b).ravel()
+        slot_parts.append(slot_codes[ix_a])
+        subject_a_parts.append(subject_codes[ix_a])
+        subject_b_parts.append(subject_codes[ix_b])
+
+    def _concat(parts):
+        return np.concatenate(parts).astype(np.int32, copy=False) if parts else []
+
+    coded_matches = pd.DataFrame(
+        {
+            "slot": _concat(slot_parts),
+            "subject_a": _concat(subject_a_parts),
+            "subject_b": _concat(subject_b_parts),
+        },
+        dtype=np.int32,
+    )
+    return coded_matches
+
+
+def decode_matches(
+    coded_matches: pd.DataFrame,
+    subjects: pd.Index,
+    slots: pd.Index,
+    subject_col: str,
+    slot_col: str,
+    layout: Layout = "tuple",
+) -> pd.DataFrame:
+    """
+    Group integer-coded matches by subject pair and decode them.
+
+    Parameters
+    ----------
+    coded_matches: pandas.DataFrame
+                   Matches as returned by `get_coded_matches_from_slots`.
+    subjects: pandas.Index
+              Subjects as returned by `encode_availabilities`.
+    slots: pandas.Index
+           Slots as returned by `encode_availabilities`.
+    subject_col: str
+                 Name of the output column with the tuples of subjects.
+    slot_col: str
+              Name of the output column with the tuples of shared slots.
+    layout: {"tuple", "columnar"}, default="tuple"
+            Layout of the output, see `get_all_matches`.
+
+    Returns
+    -------
+    matches: pandas.DataFrame
+             Same format as `get_all_matches` with the default engine.
+    """
+    slot_codes = coded_matches["slot"].to_numpy()
+    subject_a = coded_matches["subject_a"].to_numpy()
+    subject_b = coded_matches["subject_b"].to_numpy()
+
+    # Sort by pair, then slot, to guarantee idempotency downstream
+    order = np.lexsort((slot_codes, subject_b, subject_a))
+    slot_codes = slot_codes[order]
+    subject_a = subject_a[order]
+    subject_b = subject_b[order]
+
+    new_pair = (subject_a[1:] != subject_a[:-1]) | (subject_b[1:] != subject_b[:-1])
+    starts = np.flatnonzero(np.r_[True, new_pair]) if len(order) else order
+
+    if layout == "columnar":
+        # Subjects stay codes over the shared sorted categories, slots an Arrow list
+        # with the pair boundaries as offsets: no Python object per pair
+        pa = import_pyarrow()
+        categories = pd.Index(np.asarray(subjects))
+        first_col, second_col = pair_columns(subject_col)
+        slot_lists = pa.ListArray.from_arrays(
+            pa.array(np.r_[starts, len(order)], type=pa.int32()),
+            pa.array(np.asarray(slots)[slot_codes]),
+        )
+        return pd.DataFrame(
+            {
+                first_col: pd.Categorical.from_codes(
+                    subject_a[starts], categories=categories
+                ),
+                second_col: pd.Categorical.from_codes(
+                    subject_b[starts], categories=categories
+                ),
+                slot_col: pd.arrays.ArrowExtensionArray(slot_lists),
+            }
+        )
+    if layout != "tuple":
+        raise ValueError(f"Unknown layout '{layout}'")
+
+    bounds = np.r_[starts, len(order)].tolist()
+    subject_values = subjects.to_numpy()
+    slot_values = slots.to_numpy()[slot_codes].tolist()
+
+    pairs = list(
+        zip(
+            subject_values[subject_a[starts]],
+            subject_values[subject_b[starts]],
+            strict=True,
+        )
+    )
+    shared_slots = [
+        tuple(slot_values[start:end])
+        for start, end in zip(bounds[:-1], bounds[1:], strict=True)
+    ]
+
+    # Object columns even without matches, as with the pandas engine
+    matches = pd.DataFrame(
+        {subject_col: pairs, slot_col: shared_slots},
+        columns=[subject_col, slot_col],
+        dtype=object,
+    )
+    return matches
+
+
+def pair_columns(subject_col: str) -> Tuple[str, str]:
+    """Names of the two subject columns of the columnar layout."""
+    return f"{subject_col}_a", f"{subject_col}_b"
+
+
+def to_columnar(matches: pd.DataFrame, subject_col: str, slot_col: str) -> pd.DataFrame:
+    """
+    Convert matches from the tuple to the columnar layout of `get_all_matches`.
+
+    Parameters
+    ----------
+    matches: pandas.DataFrame
+             Matches with a column of subject pairs and a column of slot tuples.
+    subject_col: str
+                 Name of the column with the pairs of subjects.
+    slot_col: str
+              Name of the column with the tuples of slots.
+
+    Returns
+    -------
+    matches: pandas.DataFrame
+             Matches with two categorical subject columns, named by `pair_columns`,
+             and an Arrow list column of slots.
+    """
+    pa = import_pyarrow()
+    first, second = _split_pairs(matches[subject_col])
+    codes, subjects = pd.factorize(np.concatenate([first, second]), sort=True)
+    first_col, second_col = pair_columns(subject_col)
+    columnar = matches.drop(columns=[subject_col, slot_col])
+    columnar.insert(
+        0, first_col, pd.Categorical.from_codes(codes[: len(first)], subjects)
+    )
+    columnar.insert(
+        1, second_col, pd.Categorical.from_codes(codes[len(first) :], subjects)
+    )
+    columnar[slot_col] = pd.arrays.ArrowExtensionArray(
+        pa.array([list(slots) for slots in matches[slot_col]])
+    )
+    return columnar
+
+
+def to_tuples(
+    matches: pd.DataFrame,
+    subject_cols: Sequence[str],
+    slot_col: str,
+    subject_col: str,
+) -> pd.DataFrame:
+    """
+    Convert matches from the columnar to the tuple layout of `get_all_matches`.
+
+    Parameters
+    ----------
+    matches: pandas.DataFrame
+             Matches with two subject columns and a list column of slots.
+    subject_cols: (str, str)
+                  Names of the two subject columns.
+    slot_col: str
+              Name of the column with the lists of slots.
+    subject_col: str
+                 Name of the output column with the pairs of subjects.
+
+    Returns
+    -------
+    matches: pandas.DataFrame
+             Matches with a column of subject tuples and a column of slot tuples.
+    """
+    first_col, second_col = subject_cols
+    pairs = list(
+        zip(
+            matches[first_col].to_numpy(dtype=object),
+            matches[second_col].to_numpy(dtype=object),
+            strict=True,
+        )
+    )
+    tuples = matches.drop(columns=[first_col, second_col])
+    tuples.insert(0, subject_col, pairs)
+    tuples[slot_col] = [tuple(slots) for slots in matches[slot_col].tolist()]
+    return tuples
+
+
+def get_incidence_matrix(
+    availabilities: pd.DataFrame,
+    subject_col: str,
+    slot_col: str,
+    availabilities_by_slot: bool = False,
+) -> Tuple["sparse.csr_matrix", pd.Index, pd.Index]:
+    """
+    Build the sparse subject x slot incidence matrix.
+
+    Parameters
+    ----------
+    availabilities: pandas.DataFrame
+                    Availabilities, as accepted by `encode_availabilities`.
+    subject_col: str
+                 Name of the column containing the subjects.
+    slot_col: str
+              Name of the column containing the slots.
+    availabilities_by_slot: bool, default=False
+                            If True, `availabilities` is in the format returned by
+                            `get_matching_subjects_by_slot`.
+
+    Returns
+    -------
+    incidence: scipy.sparse.csr_matrix
+               int32 matrix with a 1 where subject `i` is available in slot `j`.
+    subjects: pandas.Index
+              Subjects, one per row.
+    slots: pandas.Index
+           Slots, one per column.
+    """
+    sparse = import_scipy_sparse()
+    coded, subjects, slots = encode_availabilities(
+        availabilities,
+        subject_col=subject_col,
+        slot_col=slot_col,
+        availabilities_by_slot=availabilities_by_slot,
+    )
+    incidence = sparse.csr_matrix(
+        (
+            np.ones(len(coded), dtype=np.int32),
+            (coded["subject"].to_numpy(), coded["slot"].to_numpy()),
+        ),
+        shape=(len(subjects), len(slots)),
+    )
+    incidence.sort_indices()
+    return incidence, subjects, slots
+
+
+def get_shared_slots_counts(
+    incidence: "sparse.csr_matrix",
+) -> "sparse.csr_matrix":
+    """
+    Count the slots shared by each pair of subjects.
+
+    Parameters
+    ----------
+    incidence: scipy.sparse.csr_matrix
+               Subject x slot matrix, as returned by `get_incidence_matrix`.
+
+    Returns
+    -------
+    counts: scipy.sparse.csr_matrix
+            Strictly upper triangular subject x subject matrix, where `(i, j)`
+            is the number of slots shared by subjects `i` and `j`. Only pairs
+            sharing at least one slot are stored.
+    """
+    sparse = import_scipy_sparse()
+    counts = sparse.triu(incidence @ incidence.T, k=1, format="csr")
+    counts.eliminate_zeros()
+    return counts
+
+
+def get_coded_matches_from_incidence(
+    incidence: "sparse.csr_matrix",
+    counts: "sparse.csr_matrix",
+) -> pd.DataFrame:
+    """
+    Sparse version of `get_coded_matches_from_slots`.
+
+    The shared slots of each pair in `counts` are found by looking up the slots
+    of the subject with fewer availabilities in the row of the other one, so
+    memory grows with the number of overlaps rather than with slot sizes.
+
+    Parameters
+    ----------
+    incidence: scipy.sparse.csr_matrix
+               Subject x slot matrix, as returned by `get_incidence_matrix`.
+    counts: scipy.sparse.csr_matrix
+            Pairs to expand, as returned by `get_shared_slots_counts`.
+
+    Returns
+    -------
+    coded_matches: pandas.DataFrame
+                   `slot`, `subject_a` and `subject_b` int32 columns, with
+                   `subject_a < subject_b`.
+    """
+    counts = counts.tocoo()
+    subject_a = counts.row.astype(np.int64)
+    subject_b = counts.col.astype(np.int64)
+
+    indptr = incidence.indptr.astype(np.int64)
+    degree = np.diff(indptr)
+    lookup_from_a = degree[subject_a] <= degree[subject_b]
+    expanded = np.where(lookup_from_a, subject_a, subject_b)
+    other = np.where(lookup_from_a, subject_b, subject_a)
+
+    # Positions, in incidence.indices, of every slot of the expanded subjects
+    n_candidates = degree[expanded]
+    pair_ix = np.repeat(np.arange(len(expanded)), n_candidates)
+    offsets = np.arange(len(pair_ix)) - np.repeat(
+        np.cumsum(n_candidates) - n_candidates, n_candidates
+    )
+    candidate_slots = incidence.indices[indptr[expanded][pair_ix] + offsets]
+
+    # Keep the candidate slots that also appear in the row of the other subject
+    n_slots = np.int64(incidence.shape[1])
+    incidence_keys = (
+        np.repeat(np.arange(incidence.shape[0]), degree) * n_slots + incidence.indices
+    )
+    candidate_keys = other[pair_ix] * n_slots + candidate_slots
+    shared = _matching.contains(incidence_keys, candidate_keys)
+
+    coded_matches = pd.DataFrame(
+        {
+            "slot": candidate_slots[shared],
+            "subject_a": subject_a[pair_ix[shared]],
+            "subject_b": subject_b[pair_ix[shared]],
+        },
+        dtype=np.int32,
+    )
+    return coded_matches
+
+
+def get_coded_matches_from_bitsets(
+    bitsets: "bitset.AvailabilityBitsets",
+) -> pd.DataFrame:
+    """
+    Bitset version of `get_coded_matches_from_slots`.
+
+    The pairs sharing a slot are found by AND-ing the bitsets of all the pairs of
+    subjects, by blocks, and their shared slots are decoded from the ANDs. The cost
+    grows with the square of the number of subjects, rather than with slot sizes,
+    which suits crowded slots of a few thousand subjects.
+
+    Parameters
+    ----------
+    bitsets: AvailabilityBitsets
+             Slots of each subject, see `bitset.AvailabilityBitsets`.
+
+    Returns
+    -------
+    coded_matches: pandas.DataFrame
+                   `slot`, `subject_a` and `subject_b` int32 columns, with
+                   `subject_a < subject_b`.
+    """
+    subject_a, subject_b = bitsets.pair_codes()
+    pair_ix, slot_codes = bitset.unpack(
+        bitsets.bitsets[subject_a] & bitsets.bitsets[subject_b]
+    )
+    coded_matches = pd.DataFrame(
+        {
+            "slot": slot_codes,
+            "subject_a": subject_a[pair_ix],
+            "subject_b": subject_b[pair_ix],
+        },
+        dtype=np.int32,
+    )
+    return coded_matches
+
+
+def _apply_coded_exclusions(
+    coded_matches: pd.DataFrame,
+    subjects: pd.Index,
+    exclusions: ExclusionIndex,
+) -> pd.DataFrame:
+    # Translate subject codes once, then filter on integer keys only
+    translation = exclusions.get_codes(subjects)
+    excluded_mask = exclusions.is_excluded_codes(
+        translation[coded_matches["subject_a"].to_numpy()],
+        translation[coded_matches["subject_b"].to_numpy()],
+    )
+    return coded_matches.loc[~excluded_mask]
+
+
+def _get_all_matches_coded(
+    availabilities: pd.DataFrame,
+    subject_col: str,
+    slot_col: str,
+    exclusions: Union[pd.DataFrame, ExclusionIndex, None],
+    exclusions_subject_columns: Tuple[str, str],
+    availabilities_by_slot: bool,
+    engine: Engine,
+    layout: Layout = "tuple",
+) -> pd.DataFrame:
+    with trace.span(
+        "prep.group_by_slot", rows_in=len(availabilities), engine=engine
+    ) as s:
+        if engine == "sparse":
+            incidence, subjects, slots = get_incidence_matrix(
+                availabilities,
+                subject_col=subject_col,
+                slot_col=slot_col,
+                availabilities_by_slot=availabilities_by_slot,
+            )
+            s.rows_out = incidence.nnz
+        elif engine == "bitset":
+            bitsets = bitset.AvailabilityBitsets.from_availabilities(
+                availabilities,
+                subject_col=subject_col,
+                slot_col=slot_col,
+                availabilities_by_slot=availabilities_by_slot,
+            )
+            subjects, slots = bitsets.subjects, bitsets.slots
+            s.rows_out = len(bitsets)
+        else:
+            coded_availabilities, subjects, slots = encode_availabilities(
+                availabilities,
+                subject_col=subject_col,
+                slot_col=slot_col,
+                availabilities_by_slot=availabilities_by_slot,
+            )
+            s.rows_out = len(coded_availabilities)
+
+    with trace.span("prep.pairs", rows_in=s.rows_out, engine=engine) as s:
+        if engine == "sparse":
+            coded_matches = get_coded_matches_from_incidence(
+                incidence, get_shared_slots_counts(incidence)
+            )
+        elif engine == "bitset":
+            coded_matches = get_coded_matches_from_bitsets(bitsets)
+        else:
+            coded_matches = get_coded_matches_from_slots(coded_availabilities)
+        s.rows_out = len(coded_matches)
+
+    if isinstance(exclusions, pd.DataFrame):
+        exclusions = ExclusionIndex(exclusions, exclusions_subject_columns)
+    if isinstance(exclusions, ExclusionIndex):
+        with trace.span("prep.exclusions", rows_in=len(coded_matches)) as s:
+            coded_matches = _apply_coded_exclusions(
+                coded_matches,
+                subjects=subjects,
+                exclusions=exclusions,
+            )
+            s.rows_out = len(coded_matches)
+
+    with trace.span("prep.group_by_pair", rows_in=len(coded_matches)) as s:
+        matches = decode_matches(
+            coded_matches,
+            subjects=subjects,
+            slots=slots,
+            subject_col=subject_col,
+            slot_col=slot_col,
+            layout=layout,
+        )
+        s.rows_out = len(matches)
+    return matches
+
+
+def get_coded_groups(
+    coded_availabilities: pd.DataFrame,
+    n_subjects: int,
+    n_slots: int,
+    group_size: int,
+    exclusions: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Integer-coded groups of subjects sharing at least one slot.
+
+    Groups are grown one subject at a time from the pairs sharing a slot, as in
+    Apriori: a group of size `k + 1` extends a group of size `k` with a subject
+    paired with all its members, and is kept only if the AND of the slot bitsets
+    of its members is not empty. Groups that share no slot are never enumerated.
+
+    Parameters
+    ----------
+    coded_availabilities: pandas.DataFrame
+                          Unique `slot` and `subject` codes sorted by slot and
+                          subject, as returned by `encode_availabilities`.
+    n_subjects: int
+                Number of subject codes.
+    n_slots: int
+             Number of slot codes.
+    group_size: int
+                Number of subjects per group, 2 or more.
+    exclusions: (numpy.ndarray, numpy.ndarray), default=None
+                Codes of the pairs of subjects that must not be in the same group.
+
+    Returns
+    -------
+    members: numpy.ndarray
+             (n_groups, group_size) subject codes, increasing along each row.
+    bitsets: numpy.ndarray
+             (n_groups, n_words) uint64 bitsets of the slots shared by each group.
+    """
+    if group_size < 2:
+        raise ValueError("Groups have at least 2 subjects")
+    bitsets = bitset.pack(
+        coded_availabilities["subject"],
+        coded_availabilities["slot"],
+        n_subjects,
+        n_slots,
+    )
+
+    pairs = get_coded_matches_from_slots(coded_availabilities)
+    keys = np.unique(_matching.pair_keys(pairs["subject_a"], pairs["subject_b"]))
+    if exclusions is not None:
+        excluded = np.unique(_matching.pair_keys(*exclusions))
+        keys = keys[~_matching.contains(excluded, keys)]
+    subject_a, subject_b = _matching.split_pair_keys(keys)
+
+    # Higher paired subjects of each subject, as CSR
+    indptr = np.zeros(n_subjects + 1, dtype=np.int64)
+    np.cumsum(np.bincount(subject_a, minlength=n_subjects), out=indptr[1:])
+
+    members = np.stack([subject_a, subject_b], axis=1)
+    shared = bitsets[subject_a] & bitsets[subject_b]
+    for _ in range(group_size - 2):
+        # Extend each group with the higher partners of its last member
+        last = members[:, -1]
+        n_extensions = np.diff(indptr)[last]
+        group_ix = np.repeat(np.arange(len(members)), n_extensions)
+        offsets = np.arange(len(group_ix)) - np.repeat(
+            np.cumsum(n_extensions) - n_extensions, n_extensions
+        )
+        extension = subject_b[indptr[last][group_ix] + offsets]
+
+        # Prune on the pairs with the other members, then on the shared slots
+        keep = np.ones(len(group_ix), dtype=bool)
+        for column in range(members.shape[1] - 1):
+            keep &= _matching.contains(
+                keys, _matching.pair_keys(members[group_ix, column], extension)
+            )
+        group_ix, extension = group_ix[keep], extension[keep]
+        extended = shared[group_ix] & bitsets[extension]
+        keep = extended.any(axis=1)
+
+        members = np.column_stack([members[group_ix[keep]], extension[keep]])
+        shared = extended[keep]
+    return members, shared
+
+
+def get_all_groups(
+    availabilities: pd.DataFrame,
+    subject_col: str,
+    slot_col: str,
+    group_size: int = 3,
+    exclusions: Union[pd.DataFrame, ExclusionIndex, None] = None,
+    exclusions_subject_columns: Tuple[str, str] = None,
+    availabilities_by_slot: bool = False,
+) -> pd.DataFrame:
+    """
+    Groups of `group_size` subjects sharing at least one slot.
+
+    Generalization of `get_all_matches` to groups of more than 2 subjects, e.g.
+    roundtables. See `get_coded_groups` for how the groups are enumerated.
+
+    Parameters
+    ----------
+    availabilities: pandas.DataFrame
+                    Availabilities, as accepted by `get_all_matches`.
+    subject_col: str
+                 Name of the column containing the subjects.
+    slot_col: str
+              Name of the column containing the slots.
+    group_size: int, default=3
+                Number of subjects per group. With 2 the groups are the matches of
+                `get_all_matches`.
+    exclusions: pandas.DataFrame or ExclusionIndex, default=None
+                Pairs of subjects that must not be in the same group.
+    exclusions_subject_columns: (str, str), default=None
+                                Names of the subject columns of `exclusions`, if a
+                                DataFrame.
+    availabilities_by_slot: bool, default=False
+                            As in `get_all_matches`.
+
+    Returns
+    -------
+    groups: pandas.DataFrame
+            One row per group, with the sorted tuple of its subjects in
+            `subject_col` and the tuple of the slots shared by all of them in
+            `slot_col`, sorted by group.
+
+    Examples
+    --------
+    get_all_groups(availabilities, "subject", "slot", group_size=3)
+    |   |              subject |           slot |
+    ---------------------------------------------
+    | 0 | (KungFury, T-Rex, Thor) | (13:00, 14:00) |
+    """
+    with trace.span("prep.group_by_slot", rows_in=len(availabilities)) as s:
+        coded_availabilities, subjects, slots = encode_availabilities(
+            availabilities,
+            subject_col=subject_col,
+            slot_col=slot_col,
+            availabilities_by_slot=availabilities_by_slot,
+        )
+        s.rows_out = len(coded_availabilities)
+
+    excluded_codes = None
+    if isinstance(exclusions, pd.DataFrame):
+        exclusions = ExclusionIndex(exclusions, exclusions_subject_columns)
+    if isinstance(exclusions, ExclusionIndex) and len(exclusions):
+        # Exclusions recoded over the subjects of the availabilities
+        translation = subjects.get_indexer(exclusions.subjects)
+        first, second = (
+            translation[codes] for codes in _matching.split_pair_keys(exclusions.keys)
+        )
+        valid = (first >= 0) & (second >= 0)
+        excluded_codes = (first[valid], second[valid])
+
+    with trace.span(
+        "prep.groups", rows_in=len(coded_availabilities), group_size=group_size
+    ) as s:
+        members, shared = get_coded_groups(
+            coded_availabilities,
+            n_subjects=len(subjects),
+            n_slots=len(slots),
+            group_size=group_size,
+            exclusions=excluded_codes,
+        )
+        s.rows_out = len(members)
+
+    group_ix, slot_codes = bitset.unpack(shared)
+    bounds = np.searchsorted(group_ix, np.arange(len(members) + 1)).tolist()
+    slot_values = slots.to_numpy()[slot_codes].tolist()
+    subject_values = subjects.to_numpy()[members]
+    return pd.DataFrame(
+        {
+            subject_col: [tuple(group) for group in subject_values.tolist()],
+            slot_col: [
+                tuple(slot_values[start:end])
+                for start, end in zip(bounds[:-1], bounds[1:], strict=True)
+            ],
+        }
+    )
+
+
 def get_all_matches(
     availabilities: pd.DataFrame,
     subject_col: str,
     slot_col: str,
     subjects_new_col_name: Optional[str] = None,
     slots_new_col_name: Optional[str] = None,
-    exclusions: Union[pd.DataFrame, None] = None,
+    exclusions: Union[pd.DataFrame, ExclusionIndex, None] = None,
     exclusions_subject_columns: Tuple[str, str] = None,
     return_matching_subjects_by_slot: bool = False,
     availabilities_by_slot: bool = False,
+    engine: Engine = "pandas",
+    layout: Layout = "tuple",
+    cache: Optional["ResultCache"] = None,
 ) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]:
-    if not availabilities_by_slot:
-        matching_subjects_by_slot = get_matching_subjects_by_slot(
-            availabilities,
-            slot_col=slot_col,
-            subject_col=subject_col,
-        )
-    else:
-        matching_subjects_by_slot = availabilities
+    if cache is not None:
+        arguments = locals().copy()
+        del arguments["cache"]
+        return cache.memoize("prep", get_all_matches, **arguments)
+    if engine not in get_args(Engine):
+        raise ValueError(f"Unknown engine '{engine}'")
+    if layout not in get_args(Layout):
+        raise ValueError(f"Unknown layout '{layout}'")
 
-    matches = get_matches_from_slots(
-        matching_subjects_by_slot,
-        slot_col=slot_col,
-        subject_col=subject_col,
-    )
+    if engine == "pandas" or return_matching_subjects_by_slot:
+        if not availabilities_by_slot:
+            with trace.span("prep.group_by_slot", rows_in=len(availabilities)) as s:
+                matching_subjects_by_slot = get_matching_subjects_by_slot(
+                    availabilities,
+                    slot_col=slot_col,
+                    subject_col=subject_col,
+                )
+                s.rows_out = len(matching_subjects_by_slot)
+        else:
+            matching_subjects_by_slot = availabilities
 
-    if isinstance(exclusions, pd.DataFrame):
-        matches = apply_exclusions(
-            matches,
-            exclusions=exclusions,
+    if engine != "pandas":
+        matches = _get_all_matches_coded(
+            availabilities,
             subject_col=subject_col,
+            slot_col=slot_col,
+            exclusions=exclusions,
             exclusions_subject_columns=exclusions_subject_columns,
+            availabilities_by_slot=availabilities_by_slot,
+            engine=engine,
+            layout=layout,
         )
+    else:
+        with trace.span("prep.pairs", rows_in=len(matching_subjects_by_slot)) as s:
+            matches = get_matches_from_slots(
+                matching_subjects_by_slot,
+                slot_col=slot_col,
+                subject_col=subject_col,
+            )
+            s.rows_out = len(matches)
 
-    # go from:
-    #  [{"avail": "A", "subj": (1, 2)},
-    #   {"avail": "B", "subj": (1, 2)}]
-    # to:
-    #  [{"subj": (1, 2), "avail": ("A", "B")}]
-    matches = matches.sort_values(
-        # Sort to guarantee idempotency downstream
-        [slot_col]
-    )
-    matches = matches.groupby(subject_col)[[slot_col]].agg(tuple).reset_index()
+        if isinstance(exclusions, (pd.DataFrame, ExclusionIndex)):
+            with trace.span("prep.exclusions", rows_in=len(matches)) as s:
+                matches = apply_exclusions(
+                    matches,
+                    exclusions=exclusions,
+                    subject_col=subject_col,
+                    exclusions_subject_columns=exclusions_subject_columns,
+                )
+                s.rows_out = len(matches)
+
+        # go from:
+        #  [{"avail": "A", "subj": (1, 2)},
+        #   {"avail": "B", "subj": (1, 2)}]
+        # to:
+        #  [{"subj": (1, 2), "avail": ("A", "B")}]
+        with trace.span("prep.group_by_pair", rows_in=len(matches)) as s:
+            matches = matches.sort_values(
+                # Sort to guarantee idempotency downstream
+                [slot_col]
+            )
+            matches = matches.groupby(subject_col)[[slot_col]].agg(tuple).reset_index()
+            if layout == "columnar":
+                matches = to_columnar(matches, subject_col, slot_col)
+            s.rows_out = len(matches)
 
     if slots_new_col_name:
         matches = matches.rename(columns={slot_col: slots_new_col_name})
 
     if subjects_new_col_name:
-        matches = matches.rename(columns={subject_col: subjects_new_col_name})
+        if layout == "columnar":
+            matches = matches.rename(
+                columns=dict(
+                    zip(
+                        pair_columns(subject_col),
+                        pair_columns(subjects_new_col_name),
+                        strict=True,
+                    )
+                )
+            )
+        else:
+            matches = matches.rename(columns={subject_col: subjects_new_col_name})
 
     if return_matching_subjects_by_slot:
         return matches, matching_subjects_by_slot
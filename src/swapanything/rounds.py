@@ -0,0 +1,211 @@
+"""
+Schedules of recurring swaps.
+
+Each round of a recurring swap selects matches among the candidate pairs not
+selected in the earlier rounds. Rather than excluding the selected pairs and
+running `prep.get_all_matches` and `select.select_matches` again for every round,
+`plan_rounds` codes the subjects and builds the adjacency of the candidates once,
+then masks the selected pairs in place after each round.
+"""
+
+from typing import TYPE_CHECKING, Iterable, Optional, Tuple, Union, get_args
+
+import numpy as np
+import pandas as pd
+
+from . import _matching, trace
+from .select import Algorithm, _select_positions, _subject_codes
+
+if TYPE_CHECKING:
+    from .cache import ResultCache
+
+
+class RoundPlanner:
+    """
+    Matchings of successive rounds over the same candidate matches.
+
+    A pair selected in a round is not a candidate in the later rounds. The subject
+    codes, the adjacency of the candidates and, with scores, their order by score are
+    computed once and shared by the rounds, so that a round only costs the matching
+    of the remaining candidates.
+
+    Parameters
+    ----------
+    matches: pandas.DataFrame
+             Candidate matches, as returned by `prep.get_all_matches`.
+    subjects_col: str or (str, str)
+                  As in `select.select_matches`.
+    match_scores: pandas.Series, default=None
+                  As in `select.select_matches`.
+    maxcardinality: bool, default=None
+                    As in `select.select_matches`.
+    algorithm: {"networkx", "greedy", "path-growing", "blossom-fast"}, default="blossom-fast"
+               As in `select.select_matches`. "blossom-fast" and "greedy" run on the
+               shared adjacency, the other algorithms on the remaining candidates.
+
+    Raises
+    ------
+    ValueError
+        If the algorithm is unknown, or "blossom-fast" is used with `match_scores`
+    """
+
+    def __init__(
+        self,
+        matches: pd.DataFrame,
+        subjects_col: Union[str, Tuple[str, str]],
+        match_scores: Optional[pd.Series] = None,
+        maxcardinality: Optional[bool] = None,
+        algorithm: Algorithm = "blossom-fast",
+    ) -> None:
+        self.weighted = isinstance(match_scores, Iterable)
+        if algorithm not in get_args(Algorithm):
+            raise ValueError(f"Unknown algorithm '{algorithm}'")
+        if self.weighted and algorithm == "blossom-fast":
+            raise ValueError(
+                "The 'blossom-fast' algorithm does not support match_scores"
+            )
+        self.algorithm = algorithm
+
+        with trace.span("rounds.graph", rows_in=len(matches)) as s:
+            self.u, self.v, self.subjects = _subject_codes(matches, subjects_col)
+            self.u = self.u.astype(np.int64, copy=False)
+            self.v = self.v.astype(np.int64, copy=False)
+            self.n_nodes = len(self.subjects)
+            if self.weighted:
+                self.weights = np.array(match_scores, dtype=float)
+                self.maxcardinality = maxcardinality or False
+            else:
+                self.weights = np.ones(len(self.u), dtype=float)
+                self.maxcardinality = True
+            # Candidates not selected yet, masked in place after each round
+            self.alive = np.ones(len(self.u), dtype=bool)
+
+            self._order = None
+            self._adjacency = None
+            if algorithm == "greedy" and self.weighted:
+                order = np.argsort(-self.weights, kind="stable")
+                self._order = order[self.weights[order] >= 0]
+            elif algorithm in ("greedy", "blossom-fast"):
+                self._adjacency = _matching.adjacency(self.n_nodes, self.u, self.v)
+            s.rows_out = self.n_nodes
+
+    def next_round(self) -> np.ndarray:
+        """
+        Select the matches of the next round, and mask them from the later rounds.
+
+        Returns
+        -------
+        positions: numpy.ndarray
+                   Sorted positions of the selected matches in `matches`.
+        """
+        with trace.span(
+            "rounds.matching", rows_in=int(self.alive.sum()), algorithm=self.algorithm
+        ) as s:
+            if self._order is not None:
+                order = self._order[self.alive[self._order]]
+                positions = _matching.greedy_matching_ordered(
+                    self.n_nodes, self.u, self.v, order
+                )
+            elif self._adjacency is not None:
+                indptr, neighbors, _ = _matching.mask_adjacency(
+                    *self._adjacency, self.alive
+                )
+                if self.algorithm == "greedy":
+                    mate = _matching.greedy_cardinality_mates(indptr, neighbors)
+                else:
+                    mate = _matching.max_cardinality_mates(indptr, neighbors)
+                positions = _matching.mates_to_edges(mate, self.n_nodes, self.u, self.v)
+            else:
+                remaining = np.flatnonzero(self.alive)
+                positions = remaining[
+                    _select_positions(
+                        self.u[remaining],
+                        self.v[remaining],
+                        self.weights[remaining],
+                        self.n_nodes,
+                        self.maxcardinality,
+                        self.weighted,
+                        self.algorithm,
+                    )
+                ]
+            self.alive[positions] = False
+            s.rows_out = len(positions)
+        return positions
+
+
+def plan_rounds(
+    matches: pd.DataFrame,
+    subjects_col: Union[str, Tuple[str, str]],
+    n_rounds: int,
+    match_scores: Optional[pd.Series] = None,
+    maxcardinality: Optional[bool] = None,
+    algorithm: Algorithm = "blossom-fast",
+    round_col: str = "round",
+    cache: Optional["ResultCache"] = None,
+) -> pd.DataFrame:
+    """
+    Select the matches of `n_rounds` successive rounds, never repeating a pair.
+
+    Parameters
+    ----------
+    matches: pandas.DataFrame
+             Candidate matches, as returned by `prep.get_all_matches`.
+    subjects_col: str or (str, str)
+                  As in `select.select_matches`.
+    n_rounds: int
+              Number of rounds to plan. Rounds stop early when no candidate is left.
+    match_scores: pandas.Series, default=None
+                  As in `select.select_matches`.
+    maxcardinality: bool, default=None
+                    As in `select.select_matches`.
+    algorithm: {"networkx", "greedy", "path-growing", "blossom-fast"}, default="blossom-fast"
+               As in `select.select_matches`.
+    round_col: str, default="round"
+               Name of the column with the round of each match, counted from 0.
+    cache: ResultCache, default=None
+           If given, the schedule is memoized in the "rounds" stage of the cache.
+
+    Returns
+    -------
+    schedule: pandas.DataFrame
+              Selected matches of all the rounds, sorted by round and subjects, with
+              their round in `round_col`. The first round is the selection of
+              `select.select_matches` with the same arguments.
+
+    Examples
+    --------
+    matches = prep.get_all_matches(availabilities, "subject", "slot")
+    schedule = plan_rounds(matches, "subject", n_rounds=10)
+    for n, selected in schedule.groupby("round"):
+        ...
+    """
+    if cache is not None:
+        arguments = locals().copy()
+        del arguments["cache"]
+        return cache.memoize("rounds", plan_rounds, **arguments)
+
+    planner = RoundPlanner(
+        matches,
+        subjects_col,
+        match_scores=match_scores,
+        maxcardinality=maxcardinality,
+        algorithm=algorithm,
+    )
+    positions, rounds = [], []
+    for n in range(n_rounds):
+        selected = planner.next_round()
+        if not len(selected):
+            break
+        positions.append(selected)
+        rounds.append(np.full(len(selected), n))
+
+    sort_by = [round_col] + (
+        [subjects_col] if isinstance(subjects_col, str) else list(subjects_col)
+    )
+    positions = np.concatenate(positions) if positions else np.empty(0, dtype=int)
+    return (
+        matches.iloc[positions]
+        .assign(**{round_col: np.concatenate(rounds) if rounds else []})
+        .sort_values(sort_by, kind="stable")
+        .reset_index(drop=True)
+    )
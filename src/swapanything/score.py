@@ -0,0 +1,272 @@
+"""
+Match scores from subject features.
+
+Features are one-hot encoded once per run into sparse subject-by-value matrices, so
+that single and multi-valued cells, e.g. the lists of Airtable multiple selects, are
+handled alike. The similarities of all the candidate pairs are then computed in
+batches of sparse row products, and combined with their weights into the
+`match_scores` of `select.select_matches`.
+"""
+
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    get_args,
+)
+
+import numpy as np
+import pandas as pd
+
+from ._compat import import_scipy_sparse
+from .prep import _split_pairs
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+    from .cache import ResultCache
+
+Similarity = Literal["jaccard", "overlap", "equal", "ordinal"]
+
+
+@dataclass(frozen=True)
+class Feature:
+    """
+    Similarity of the subjects on a feature.
+
+    Parameters
+    ----------
+    column: str
+            Column of the subjects table, with single values or lists of values.
+    similarity: {"jaccard", "overlap", "equal", "ordinal"}, default="jaccard"
+                "jaccard" is the number of shared values over the number of values of
+                the pair, "overlap" over the number of values of the subject with
+                fewer. "equal" is 1 if both subjects have the same values. "ordinal" is
+                1 minus the distance of the mean ranks of the values in `order`,
+                scaled to [0, 1].
+    weight: float, default=1.0
+            Weight of the similarity in the score.
+    order: list, default=None
+           Ordered values of an "ordinal" feature, e.g. growth stages.
+    """
+
+    column: str
+    similarity: Similarity = "jaccard"
+    weight: float = 1.0
+    order: Optional[Tuple] = None
+
+    def __post_init__(self) -> None:
+        if self.similarity not in get_args(Similarity):
+            raise ValueError(f"Unknown similarity '{self.similarity}'")
+        if self.similarity == "ordinal":
+            if not self.order or len(self.order) < 2:
+                raise ValueError("Ordinal features need an order of 2 values or more")
+            object.__setattr__(self, "order", tuple(self.order))
+
+
+def one_hot(
+    values: pd.Series, categories: Optional[Sequence] = None
+) -> Tuple["sparse.csr_matrix", pd.Index]:
+    """
+    Binary sparse encoding of a column with single values or lists of values.
+
+    Parameters
+    ----------
+    values: pandas.Series
+            Cells with a value, a list of values, or missing.
+    categories: list, default=None
+                Values to encode, in order. By default the sorted values of the column.
+
+    Returns
+    -------
+    encoded: scipy.sparse.csr_matrix
+             One row per cell and one column per category, 1 where the cell holds
+             the category.
+    categories: pandas.Index
+                Category of each column.
+
+    Raises
+    ------
+    ValueError
+        If a value is not in `categories`.
+    """
+    sparse = import_scipy_sparse()
+    exploded = pd.Series(values.to_numpy(), index=np.arange(len(values))).explode()
+    exploded = exploded[exploded.notna()]
+    if categories is None:
+        codes, categories = pd.factorize(exploded, sort=True)
+    else:
+        categories = pd.Index(categories)
+        codes = categories.get_indexer(exploded)
+        if (codes < 0).any():
+            unknown = exploded[codes < 0].unique().tolist()
+            raise ValueError(f"Values {unknown} are not in the categories")
+
+    encoded = sparse.csr_matrix(
+        (np.ones(len(codes), dtype=np.float32), (exploded.index.to_numpy(), codes)),
+        shape=(len(values), len(categories)),
+    )
+    # Repeated values in a cell count once
+    encoded.sum_duplicates()
+    encoded.data[:] = 1
+    return encoded, pd.Index(categories)
+
+
+class MatchScorer:
+    """
+    Weighted similarity of candidate matches on subject features.
+
+    The features are encoded when the scorer is built, then any number of candidate
+    tables can be scored against them.
+
+    Parameters
+    ----------
+    subjects: pandas.DataFrame
+              Subjects table indexed by subject, as returned by
+              `BackendBase.get_subjects`.
+    features: list of Feature or str
+              Features to compare, a column name stands for a "jaccard" feature.
+    batch_size: int, default=100_000
+                Pairs compared at once, to bound the memory of the sparse products.
+
+    Examples
+    --------
+    scorer = MatchScorer(
+        subjects,
+        [
+            Feature("Industry", weight=2.0),
+            Feature("Languages", "overlap"),
+            Feature("Growth Stage", "ordinal", order=["Pre-Seed", "Seed", "Series A"]),
+        ],
+    )
+    matches = prep.get_all_matches(availabilities, "subject", "slot")
+    scores = scorer.score(matches, "subject")
+    select.select_matches(matches, "subject", "slot", match_scores=scores)
+    """
+
+    def __init__(
+        self,
+        subjects: pd.DataFrame,
+        features: Iterable[Union[Feature, str]],
+        batch_size: int = 100_000,
+    ) -> None:
+        self.subjects: pd.Index = subjects.index
+        self.features = [Feature(f) if isinstance(f, str) else f for f in features]
+        self.batch_size = batch_size
+
+        self._encoded = []
+        for feature in self.features:
+            encoded, _ = one_hot(subjects[feature.column], feature.order)
+            counts = np.asarray(encoded.sum(axis=1)).ravel()
+            ranks = None
+            if feature.similarity == "ordinal":
+                # Mean rank of the values of each subject, scaled to [0, 1]
+                scale = np.arange(len(feature.order)) / (len(feature.order) - 1)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    ranks = encoded @ scale / counts
+            self._encoded.append((encoded, counts, ranks))
+
+    def _similarity(
+        self,
+        feature: Feature,
+        encoded: "sparse.csr_matrix",
+        counts: np.ndarray,
+        ranks: Optional[np.ndarray],
+        u: np.ndarray,
+        v: np.ndarray,
+    ) -> np.ndarray:
+        if feature.similarity == "ordinal":
+            distance = np.abs(ranks[u] - ranks[v])
+            return np.nan_to_num(1.0 - distance, nan=0.0)
+
+        shared = np.asarray(encoded[u].multiply(encoded[v]).sum(axis=1)).ravel()
+        count_u, count_v = counts[u], counts[v]
+        if feature.similarity == "equal":
+            return ((shared == count_u) & (shared == count_v) & (shared > 0)).astype(
+                float
+            )
+        if feature.similarity == "jaccard":
+            total = count_u + count_v - shared
+        else:
+            total = np.minimum(count_u, count_v)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(total > 0, shared / total, 0.0)
+
+    def score_codes(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Scores of the pairs `(subjects[u[i]], subjects[v[i]])`, given positions."""
+        scores = np.zeros(len(u), dtype=float)
+        for start in range(0, len(u), self.batch_size):
+            batch = slice(start, start + self.batch_size)
+            for feature, (encoded, counts, ranks) in zip(
+                self.features, self._encoded, strict=True
+            ):
+                scores[batch] += feature.weight * self._similarity(
+                    feature, encoded, counts, ranks, u[batch], v[batch]
+                )
+        return scores
+
+    def score(
+        self,
+        matches: pd.DataFrame,
+        subjects_col: Union[str, Tuple[str, str]],
+    ) -> pd.Series:
+        """
+        Scores of candidate matches.
+
+        Parameters
+        ----------
+        matches: pandas.DataFrame
+                 Candidate matches, as returned by `prep.get_all_matches`.
+        subjects_col: str or (str, str)
+                      Column with the pairs of subjects, or the two subject columns
+                      of the columnar layout.
+
+        Returns
+        -------
+        scores: pandas.Series
+                Weighted sum of the similarities, aligned with `matches`.
+
+        Raises
+        ------
+        ValueError
+            If a subject of the matches is not in the subjects table.
+        """
+        if isinstance(subjects_col, str):
+            first, second = _split_pairs(matches[subjects_col])
+        else:
+            first_col, second_col = subjects_col
+            first, second = matches[first_col], matches[second_col]
+        u = self.subjects.get_indexer(first)
+        v = self.subjects.get_indexer(second)
+        if (u < 0).any() or (v < 0).any():
+            raise ValueError("Some subjects of the matches are not in the subjects")
+        return pd.Series(self.score_codes(u, v), index=matches.index, name="score")
+
+
+def score_matches(
+    matches: pd.DataFrame,
+    subjects: pd.DataFrame,
+    features: Iterable[Union[Feature, str]],
+    subjects_col: Union[str, Tuple[str, str]],
+    batch_size: int = 100_000,
+    cache: Optional["ResultCache"] = None,
+) -> pd.Series:
+    """
+    Weighted similarity of candidate matches on subject features.
+
+    Shortcut for `MatchScorer(subjects, features, batch_size).score(matches,
+    subjects_col)`, see `MatchScorer`. If `cache` is given, the scores are memoized
+    in its "score" stage.
+    """
+    if cache is not None:
+        arguments = locals().copy()
+        del arguments["cache"]
+        return cache.memoize("score", score_matches, **arguments)
+    return MatchScorer(subjects, features, batch_size=batch_size).score(
+        matches, subjects_col
+    )
@@ -1,32 +1,91 @@
-from typing import Iterable, Optional
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Literal,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+)
 
 import networkx as nx
 import numpy as np
 import pandas as pd
 
+from . import _matching, trace
+
+if TYPE_CHECKING:
+    from .cache import ResultCache
+
 """
 Select matches module. In this module you'll find everything related to the selection
 of matches between individuals. This means you'll obtain a subset of the found matches among
 all the feasible ones.
 """
 
+Algorithm = Literal["networkx", "greedy", "path-growing", "blossom-fast"]
+Aggregate = Literal["mean", "sum", "min"]
+
+
+class MatchingReport(NamedTuple):
+    """
+    Quality of a selection of matches.
+
+    Attributes
+    ----------
+    algorithm: str
+               Matching backend that produced the selection.
+    weight: float
+            Sum of the scores of the selected matches (their number without scores).
+    upper_bound: float
+                 Upper bound of the best achievable weight. It equals `weight` for exact
+                 algorithms.
+    n_matches: int
+               Number of selected matches.
+    """
+
+    algorithm: str
+    weight: float
+    upper_bound: float
+    n_matches: int
+
+    @property
+    def ratio(self) -> float:
+        """Guaranteed fraction of the optimal weight reached by the selection."""
+        return self.weight / self.upper_bound if self.upper_bound else 1.0
+
+
 def select_matches(
     matches: pd.DataFrame,
-    subjects_col: str,
+    subjects_col: Union[str, Tuple[str, str]],
     slots_col: str,
     match_scores: Optional[pd.Series] = None,
     maxcardinality: Optional[bool] = None,
     return_graph: bool = False,
-) -> pd.DataFrame:
+    algorithm: Algorithm = "networkx",
+    return_report: bool = False,
+    n_jobs: Optional[int] = None,
+    min_component_size: int = 1000,
+    cache: Optional["ResultCache"] = None,
+) -> Union[
+    pd.DataFrame,
+    Tuple[pd.DataFrame, nx.Graph],
+    Tuple[pd.DataFrame, MatchingReport],
+    Tuple[pd.DataFrame, nx.Graph, MatchingReport],
+]:
     """
     Parameters
     ----------
     matches: pandas.DataFrame
              Dataframe containing the matches to be selected. The df is expected to have a column containing the time slots and
              a column couples of subjects. Each time slot has a unique couple assigned to it.
-    subjects_col: str
+    subjects_col: str or (str, str)
                   Name of the column where subjects, namely individuals, are stored. The subjects are
-                  expected to be unique.
+                  expected to be unique. Matches in the columnar layout of `get_all_matches` have
+                  the subjects in two columns, given as a pair of names.
     slots_col: str
                Name of the column where time slots indicating subjects availabilities are stored.
     match_scores: pandas.Series, default=None
@@ -38,16 +97,37 @@ def select_matches(
     return_graph: bool, default=False
                   If True the function returns the graph obtained from the matches between individuals other than the
                   selected matches.
+    algorithm: {"networkx", "greedy", "path-growing", "blossom-fast"}, default="networkx"
+               Matching backend. "networkx" runs `networkx.max_weight_matching`. "greedy" takes
+               the matches by decreasing score (by fewest alternatives without scores), a 1/2-approximation.
+               "path-growing" is a linear time 1/2-approximation, usually closer to the optimum than
+               "greedy". "blossom-fast" computes a maximum cardinality matching on integer adjacency
+               lists and only supports matches without `match_scores`.
+    return_report: bool, default=False
+                   If True the function also returns a `MatchingReport` with the achieved weight
+                   and an upper bound of the optimal one.
+    n_jobs: int, default=None
+            If set, the matches are split in connected components, matched independently
+            in up to `n_jobs` processes (-1 for all the CPUs) and merged back. The matching
+            of each component is optimal when the algorithm is exact, so the result is too.
+    min_component_size: int, default=1000
+                        Components with fewer subjects are matched together in the calling
+                        process, as starting a process for them costs more than matching them.
+    cache: ResultCache, default=None
+           If given, the selection is memoized in the "select" stage of the cache.
 
     Returns
     -------
     selected: pandas.DataFrame
     G: networkx.Graph, optional
+    report: MatchingReport, optional
 
     Raises
     ------
     AssertionError
         If the subjects in the matches table are not unique
+    ValueError
+        If the algorithm is unknown, or "blossom-fast" is used with `match_scores`
 
     Examples
     --------
@@ -70,41 +150,399 @@ def select_matches(
     | 2 |      (Hoff 9000, T-Rex) |       (16:00,) |
     | 3 |        (KungFury, Thor) | (13:00, 14:00) |
     """
-    assert matches[subjects_col].is_unique
-
-    # Considering the table entry 9:00 (KungFury, Triceracop), we expand the subject couple to obtain the following dataframe:
-    # _matches: _s1     | _s2
-    #           KungFury| Triceracop
-    _matches = matches[subjects_col].apply(pd.Series)
-    _matches.columns = ("_s1", "_s2")
-    _matches[slots_col] = matches[slots_col]
-    if isinstance(match_scores, Iterable):
-        _matches["_score"] = np.array(match_scores)
+    if cache is not None:
+        arguments = locals().copy()
+        del arguments["cache"]
+        return cache.memoize("select", select_matches, **arguments)
+
+    # Considering the table entry 9:00 (KungFury, Triceracop), we split the subject couple and
+    # code the subjects as integers to obtain the edge arrays:
+    # pairs: KungFury | Triceracop  ->  u: 0 | v: 1
+    with trace.span("select.graph", rows_in=len(matches)) as s:
+        u, v, subjects = _subject_codes(matches, subjects_col)
+        s.rows_out = len(subjects)
+    weighted = isinstance(match_scores, Iterable)
+    scores = np.array(match_scores, dtype=float) if weighted else None
+
+    with trace.span("select.matching", rows_in=len(u), algorithm=algorithm) as s:
+        positions, report = select_matches_from_arrays(
+            u,
+            v,
+            weights=scores,
+            n_nodes=len(subjects),
+            maxcardinality=maxcardinality,
+            algorithm=algorithm,
+            return_report=True,
+            n_jobs=n_jobs,
+            min_component_size=min_component_size,
+        )
+        s.rows_out = len(positions)
+    if not isinstance(subjects_col, str):
+        subjects_col = list(subjects_col)
+    selected = (
+        matches.iloc[positions].set_index(subjects_col).sort_index().reset_index()
+    )
+
+    results = [selected]
+    if return_graph:
+        G = nx.Graph()
+        subject_values = np.asarray(subjects, dtype=object)
+        G.add_edges_from(
+            (a, b, {"_score": score, slots_col: slot})
+            for a, b, score, slot in zip(
+                subject_values[u],
+                subject_values[v],
+                scores if weighted else np.ones(len(matches), dtype=int),
+                matches[slots_col],
+                strict=True,
+            )
+        )
+        results.append(G)
+    if return_report:
+        results.append(report)
+    return results[0] if len(results) == 1 else tuple(results)
+
+
+def _subject_codes(
+    matches: pd.DataFrame, subjects_col: Union[str, Tuple[str, str]]
+) -> Tuple[np.ndarray, np.ndarray, pd.Index]:
+    if isinstance(subjects_col, str):
+        assert matches[subjects_col].is_unique
+        pairs = np.array(matches[subjects_col].tolist(), dtype=object).reshape(-1, 2)
+        codes, subjects = pd.factorize(pairs.ravel())
+        return codes[0::2], codes[1::2], pd.Index(subjects)
+    subjects_col = list(subjects_col)
+    assert not matches.duplicated(subjects_col).any()
+    return _pair_codes(matches[subjects_col[0]], matches[subjects_col[1]])
+
+
+def _pair_codes(
+    first: pd.Series, second: pd.Series
+) -> Tuple[np.ndarray, np.ndarray, pd.Index]:
+    # Categorical columns sharing their categories, as in the columnar layout of
+    # `prep.get_all_matches`, are already coded
+    if (
+        isinstance(first.dtype, pd.CategoricalDtype)
+        and isinstance(second.dtype, pd.CategoricalDtype)
+        and first.cat.categories.equals(second.cat.categories)
+    ):
+        return (
+            first.cat.codes.to_numpy(np.int64),
+            second.cat.codes.to_numpy(np.int64),
+            first.cat.categories,
+        )
+    codes, subjects = pd.factorize(
+        np.concatenate([first.to_numpy(dtype=object), second.to_numpy(dtype=object)])
+    )
+    return codes[: len(first)], codes[len(first) :], pd.Index(subjects)
+
+
+def _select_positions(
+    u: np.ndarray,
+    v: np.ndarray,
+    weights: np.ndarray,
+    n_nodes: int,
+    maxcardinality: bool,
+    weighted: bool,
+    algorithm: Algorithm,
+) -> np.ndarray:
+    if algorithm == "networkx":
+        G = nx.Graph()
+        G.add_weighted_edges_from(
+            zip(u.tolist(), v.tolist(), weights.tolist(), strict=True), weight="_score"
+        )
+        mate = np.full(n_nodes, -1, dtype=np.int64)
+        for a, b in nx.algorithms.matching.max_weight_matching(
+            G, maxcardinality=maxcardinality, weight="_score"
+        ):
+            mate[a], mate[b] = b, a
+        positions = _matching.mates_to_edges(mate, n_nodes, u, v)
+    elif algorithm == "greedy" and weighted:
+        positions = _matching.greedy_matching(n_nodes, u, v, weights)
+    elif algorithm == "greedy":
+        positions = _matching.greedy_cardinality_matching(n_nodes, u, v)
+    elif algorithm == "path-growing":
+        positions = _matching.path_growing_matching(n_nodes, u, v, weights)
+    else:
+        positions = _matching.max_cardinality_matching(n_nodes, u, v)
+
+    return positions
+
+
+def _select_component(args: tuple) -> np.ndarray:
+    u, v, weights, maxcardinality, weighted, algorithm = args
+    # Relabel the nodes of the component as 0..n_nodes-1
+    nodes, inverse = np.unique(np.concatenate([u, v]), return_inverse=True)
+    return _select_positions(
+        inverse[: len(u)],
+        inverse[len(u) :],
+        weights,
+        len(nodes),
+        maxcardinality,
+        weighted,
+        algorithm,
+    )
+
+
+def _select_positions_by_component(
+    u: np.ndarray,
+    v: np.ndarray,
+    weights: np.ndarray,
+    n_nodes: int,
+    maxcardinality: bool,
+    weighted: bool,
+    algorithm: Algorithm,
+    n_jobs: int,
+    min_component_size: int,
+) -> np.ndarray:
+    labels = _matching.connected_components(n_nodes, u, v)
+    component_sizes = np.bincount(labels, minlength=n_nodes)
+    edge_labels = labels[u]
+
+    # One task per large component, ordered by their smallest node, and a
+    # single in-process task for all the small components together
+    large = component_sizes[edge_labels] >= min_component_size
+    large_edges = np.flatnonzero(large)
+    large_edges = large_edges[np.argsort(edge_labels[large_edges], kind="stable")]
+    bounds = np.flatnonzero(np.diff(edge_labels[large_edges])) + 1
+    tasks = [np.flatnonzero(~large), *np.split(large_edges, bounds)]
+    tasks = [edges for edges in tasks if len(edges)]
+    args = [
+        (u[edges], v[edges], weights[edges], maxcardinality, weighted, algorithm)
+        for edges in tasks
+    ]
+
+    n_workers = min(os.cpu_count() if n_jobs == -1 else n_jobs, len(tasks) - 1)
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            # The small components run in this process meanwhile
+            futures = [executor.submit(_select_component, arg) for arg in args[1:]]
+            results = [_select_component(args[0])]
+            results.extend(future.result() for future in futures)
+    else:
+        results = [_select_component(arg) for arg in args]
+
+    positions = [edges[result] for edges, result in zip(tasks, results, strict=True)]
+    if not positions:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(np.concatenate(positions))
+
+
+def select_matches_from_arrays(
+    u: np.ndarray,
+    v: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    n_nodes: Optional[int] = None,
+    maxcardinality: Optional[bool] = None,
+    algorithm: Algorithm = "networkx",
+    return_report: bool = False,
+    n_jobs: Optional[int] = None,
+    min_component_size: int = 1000,
+) -> Union[np.ndarray, Tuple[np.ndarray, MatchingReport]]:
+    """
+    Select matches among integer-coded subjects.
+
+    Same as `select_matches`, for matches given as edge arrays: the match `i`
+    is between subjects `u[i]` and `v[i]`. Apart from "networkx", the algorithms
+    run on a compact adjacency representation, without a graph object.
+
+    Parameters
+    ----------
+    u: numpy.ndarray
+       Integer code of the first subject of each match.
+    v: numpy.ndarray
+       Integer code of the second subject of each match.
+    weights: numpy.ndarray, default=None
+             Score of each match, as `match_scores` in `select_matches`.
+    n_nodes: int, default=None
+             Number of subjects, defaults to the largest code plus one.
+    maxcardinality: bool, default=None
+                    As in `select_matches`.
+    algorithm: {"networkx", "greedy", "path-growing", "blossom-fast"}, default="networkx"
+               As in `select_matches`.
+    return_report: bool, default=False
+                   If True the function also returns a `MatchingReport`.
+    n_jobs: int, default=None
+            As in `select_matches`.
+    min_component_size: int, default=1000
+                        As in `select_matches`.
+
+    Returns
+    -------
+    positions: numpy.ndarray
+               Sorted positions of the selected matches.
+    report: MatchingReport, optional
+    """
+    if algorithm not in get_args(Algorithm):
+        raise ValueError(f"Unknown algorithm '{algorithm}'")
+    weighted = weights is not None
+    if weighted and algorithm == "blossom-fast":
+        raise ValueError("The 'blossom-fast' algorithm does not support match_scores")
+
+    u = np.asarray(u, dtype=np.int64)
+    v = np.asarray(v, dtype=np.int64)
+    if n_nodes is None:
+        n_nodes = int(max(u.max(), v.max())) + 1 if len(u) else 0
+    if weighted:
+        weights = np.asarray(weights, dtype=float)
         maxcardinality = maxcardinality or False
     else:
-        _matches["_score"] = 1
+        weights = np.ones(len(u), dtype=float)
         maxcardinality = True
 
-    G: nx.Graph = nx.from_pandas_edgelist(
-        df=_matches, source="_s1", target="_s2", edge_attr=["_score", slots_col]
+    if n_jobs is None:
+        positions = _select_positions(
+            u, v, weights, n_nodes, maxcardinality, weighted, algorithm
         )
-    results_weighted: set = nx.algorithms.matching.max_weight_matching(
-        G, maxcardinality=maxcardinality, weight="_score"
-    )
-    results_weighted = pd.Index(
-        {tuple(sorted(x)) for x in results_weighted},
-        tupleize_cols=False,
-        name=subjects_col,
+    else:
+        positions = _select_positions_by_component(
+            u,
+            v,
+            weights,
+            n_nodes,
+            maxcardinality,
+            weighted,
+            algorithm,
+            n_jobs=n_jobs,
+            min_component_size=min_component_size,
+        )
+
+    if not return_report:
+        return positions
+
+    weight = float(weights[positions].sum())
+    if algorithm in ("networkx", "blossom-fast"):
+        upper_bound = weight
+    else:
+        upper_bound = min(
+            # Both the approximations are guaranteed to reach half the optimum
+            2 * weight,
+            _matching.weight_upper_bound(n_nodes, u, v, weights),
+        )
+    report = MatchingReport(
+        algorithm=algorithm,
+        weight=weight,
+        upper_bound=upper_bound,
+        n_matches=len(positions),
     )
+    return positions, report
 
-    selected = (
-        matches.set_index(subjects_col)
-        .reindex(pd.Index(results_weighted, tupleize_cols=False))
+
+def select_groups(
+    groups: pd.DataFrame,
+    subjects_col: str,
+    pair_scores: Optional[pd.Series] = None,
+    aggregate: Aggregate = "mean",
+) -> pd.DataFrame:
+    """
+    Select disjoint groups of subjects, greedily.
+
+    Groups are taken one after the other if none of their subjects is in a group
+    taken already: by decreasing score with `pair_scores`, otherwise, and to break
+    ties, groups whose subjects have the fewest alternative groups first.
+
+    Parameters
+    ----------
+    groups: pandas.DataFrame
+            Candidate groups, as returned by `prep.get_all_groups`. Groups may have
+            different sizes.
+    subjects_col: str
+                  Name of the column with the tuples of subjects of each group.
+    pair_scores: pandas.Series, default=None
+                 Score of pairs of subjects, indexed by pair as the subjects of
+                 `prep.get_all_matches`, e.g. `pd.Series(match_scores.to_numpy(),
+                 index=matches[subjects_col])`. Pairs missing from the index score 0.
+    aggregate: {"mean", "sum", "min"}, default="mean"
+               Score of a group from the scores of the pairs of its subjects.
+
+    Returns
+    -------
+    selected: pandas.DataFrame
+              Selected groups, sorted by subjects.
+
+    Raises
+    ------
+    ValueError
+        If the aggregate is unknown
+    """
+    if aggregate not in get_args(Aggregate):
+        raise ValueError(f"Unknown aggregate '{aggregate}'")
+
+    with trace.span("select.graph", rows_in=len(groups)) as s:
+        members_list = groups[subjects_col].tolist()
+        sizes = np.fromiter((len(m) for m in members_list), dtype=np.int64)
+        codes, subjects = pd.factorize(
+            np.array([m for group in members_list for m in group], dtype=object)
+        )
+        offsets = np.r_[0, np.cumsum(sizes)]
+        s.rows_out = len(subjects)
+
+    with trace.span("select.matching", rows_in=len(groups), algorithm="greedy") as s:
+        # Groups of the subjects of each group, as a measure of their conflicts
+        conflicts = (
+            np.add.reduceat(
+                np.bincount(codes, minlength=len(subjects))[codes], offsets[:-1]
+            )
+            if len(codes)
+            else np.zeros(0, dtype=np.int64)
+        )
+        if pair_scores is not None:
+            scores = _group_scores(
+                codes, sizes, subjects, pair_scores, aggregate=aggregate
+            )
+            order = np.lexsort((conflicts, -scores))
+        else:
+            order = np.argsort(conflicts, kind="stable")
+
+        taken = [False] * len(subjects)
+        members, bounds = codes.tolist(), offsets.tolist()
+        selected = []
+        for i in order.tolist():
+            group = members[bounds[i] : bounds[i + 1]]
+            if not any(taken[c] for c in group):
+                for c in group:
+                    taken[c] = True
+                selected.append(i)
+        s.rows_out = len(selected)
+
+    return (
+        groups.iloc[np.sort(np.array(selected, dtype=np.int64))]
+        .set_index(subjects_col)
         .sort_index()
         .reset_index()
     )
 
-    if return_graph:
-        return selected, G
-    else:
-        return selected
+
+def _group_scores(
+    codes: np.ndarray,
+    sizes: np.ndarray,
+    subjects: np.ndarray,
+    pair_scores: pd.Series,
+    aggregate: Aggregate,
+) -> np.ndarray:
+    # Pair scores keyed by the sorted codes of their subjects
+    first = pd.Index(subjects).get_indexer([pair[0] for pair in pair_scores.index])
+    second = pd.Index(subjects).get_indexer([pair[1] for pair in pair_scores.index])
+    known = (first >= 0) & (second >= 0)
+    keys = _matching.pair_keys(first[known], second[known])
+    order = np.argsort(keys, kind="stable")
+    keys, values = keys[order], pair_scores.to_numpy(dtype=float)[known][order]
+
+    offsets = np.r_[0, np.cumsum(sizes)]
+    scores = np.zeros(len(sizes), dtype=float)
+    # Groups of the same size are scored together, over their pairs of columns
+    for size in np.unique(sizes[sizes > 1]):
+        group_ix = np.flatnonzero(sizes == size)
+        members = codes[offsets[group_ix][:, None] + np.arange(size)]
+        ix_a, ix_b = np.triu_indices(size, k=1)
+        a, b = members[:, ix_a], members[:, ix_b]
+        # Pairs without a score are missing, at -1, and take the trailing 0
+        found = _matching.find(keys, _matching.pair_keys(a, b))
+        pair_values = np.append(values, 0.0)[found]
+        if aggregate == "sum":
+            scores[group_ix] = pair_values.sum(axis=1)
+        elif aggregate == "min":
+            scores[group_ix] = pair_values.min(axis=1)
+        else:
+            scores[group_ix] = pair_values.mean(axis=1)
+    return scores
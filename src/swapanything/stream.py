@@ -0,0 +1,331 @@
+"""
+Streaming module. In this module you'll find out-of-core versions of the prep functions,
+for availability tables that do not fit in memory.
+
+Availabilities are read by chunks and partitioned by hash of slot, so that every slot is
+complete in exactly one partition. The pairs of each slot partition are then routed by
+hash of subject pair, so that every pair is complete in exactly one partition, and each
+pair partition is aggregated independently. Partitions are kept in memory up to a budget
+and spilled to disk beyond it.
+"""
+
+import os
+import pickle
+import tempfile
+from typing import (
+    Annotated,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
+
+import numpy as np
+import pandas as pd
+
+from . import prep
+from ._compat import import_pyarrow
+
+Source = Union[str, os.PathLike, pd.DataFrame, Iterable[pd.DataFrame]]
+
+
+def read_availabilities(
+    source: Source,
+    subject_col: str,
+    slot_col: str,
+    chunksize: int = 100_000,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read availabilities by chunks.
+
+    Parameters
+    ----------
+    source: str, os.PathLike, pandas.DataFrame or iterable of pandas.DataFrame
+            Path of a Parquet (`.parquet`, `.pq`) or CSV file, a DataFrame, or an
+            iterable of DataFrames which is passed through.
+    subject_col: str
+                 Name of the column containing the subjects.
+    slot_col: str
+              Name of the column containing the slots.
+    chunksize: int, default=100_000
+               Number of rows per chunk read from files.
+
+    Returns
+    -------
+    chunks: iterator of pandas.DataFrame
+            Chunks with the `subject_col` and `slot_col` columns only.
+    """
+    columns = [subject_col, slot_col]
+    if isinstance(source, pd.DataFrame):
+        yield source[columns]
+    elif isinstance(source, (str, os.PathLike)):
+        if os.fspath(source).endswith((".parquet", ".pq")):
+            parquet = import_pyarrow("parquet").parquet
+            parquet_file = parquet.ParquetFile(source)
+            for batch in parquet_file.iter_batches(chunksize, columns=columns):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(source, usecols=columns, chunksize=chunksize)
+    else:
+        for chunk in source:
+            yield chunk[columns]
+
+
+def _hash_partitions(values: np.ndarray, n_partitions: int) -> np.ndarray:
+    # Object dtype makes hashes independent of the dtype inferred for each chunk
+    hashes = pd.util.hash_array(np.asarray(values, dtype=object))
+    return (hashes % np.uint64(n_partitions)).astype(np.int64)
+
+
+def _pair_partitions(
+    subject_a: np.ndarray, subject_b: np.ndarray, n_partitions: int
+) -> np.ndarray:
+    hash_a = pd.util.hash_array(np.asarray(subject_a, dtype=object))
+    hash_b = pd.util.hash_array(np.asarray(subject_b, dtype=object))
+    hashes = hash_a ^ (hash_b * np.uint64(0x9E3779B97F4A7C15))
+    return (hashes % np.uint64(n_partitions)).astype(np.int64)
+
+
+# Rough size of a generated pair, in its coded then object frames
+_PAIR_BYTES = 64
+
+
+def _slot_batches(slot_codes: np.ndarray, max_pairs: int) -> np.ndarray:
+    # Row bounds of batches of whole slots, each with at most `max_pairs` pairs plus
+    # those of its last slot
+    starts = np.flatnonzero(np.r_[True, slot_codes[1:] != slot_codes[:-1]])
+    sizes = np.diff(np.r_[starts, len(slot_codes)]).astype(np.int64)
+    n_pairs = sizes * (sizes - 1) // 2
+    batches = (np.cumsum(n_pairs) - n_pairs) // max(max_pairs, 1)
+    first = np.flatnonzero(np.r_[True, batches[1:] != batches[:-1]])
+    return np.r_[starts[first], len(slot_codes)]
+
+
+class SpillBuffer:
+    """
+    DataFrame partitions kept in memory up to a budget, and spilled to disk beyond it.
+
+    When the in-memory frames exceed `memory_budget` bytes, the largest partition is
+    appended to its file in `directory`, until the budget is met again.
+
+    Parameters
+    ----------
+    n_partitions: int
+                  Number of partitions.
+    directory: str
+               Existing directory where the spill files are written.
+    memory_budget: int
+                   Maximum number of bytes held in memory.
+    """
+
+    def __init__(self, n_partitions: int, directory: str, memory_budget: int) -> None:
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.n_spilled = 0
+        self._frames: List[List[pd.DataFrame]] = [[] for _ in range(n_partitions)]
+        self._sizes: List[int] = [0] * n_partitions
+
+    def _path(self, partition: int) -> str:
+        return os.path.join(self.directory, f"partition-{partition}.pkl")
+
+    def append(self, partition: int, frame: pd.DataFrame) -> None:
+        """Append `frame` to `partition`, spilling to disk if over budget."""
+        if frame.empty:
+            return
+        self._frames[partition].append(frame)
+        self._sizes[partition] += int(frame.memory_usage(index=True, deep=True).sum())
+        while sum(self._sizes) > self.memory_budget:
+            largest = int(np.argmax(self._sizes))
+            with open(self._path(largest), "ab") as f:
+                pickle.dump(pd.concat(self._frames[largest]), f, protocol=5)
+            self._frames[largest] = []
+            self._sizes[largest] = 0
+            self.n_spilled += 1
+
+    def pop(self, partition: int) -> List[pd.DataFrame]:
+        """Return all the frames of `partition`, releasing them."""
+        frames = []
+        path = self._path(partition)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                while True:
+                    try:
+                        frames.append(pickle.load(f))
+                    except EOFError:
+                        break
+            os.remove(path)
+        frames.extend(self._frames[partition])
+        self._frames[partition] = []
+        self._sizes[partition] = 0
+        return frames
+
+
+def _aggregate_pairs(
+    pairs: pd.DataFrame, subject_col: str, slot_col: str
+) -> pd.DataFrame:
+    # Encode the partition and reuse the decoder of the in-memory engines
+    subject_codes, subjects = pd.factorize(
+        np.concatenate([pairs["subject_a"].to_numpy(), pairs["subject_b"].to_numpy()]),
+        sort=True,
+    )
+    slot_codes, slots = pd.factorize(pairs["slot"], sort=True)
+    coded_matches = pd.DataFrame(
+        {
+            "slot": slot_codes,
+            "subject_a": subject_codes[: len(pairs)],
+            "subject_b": subject_codes[len(pairs) :],
+        },
+        dtype=np.int32,
+    )
+    return prep.decode_matches(
+        coded_matches,
+        subjects=pd.Index(subjects),
+        slots=pd.Index(slots),
+        subject_col=subject_col,
+        slot_col=slot_col,
+    )
+
+
+def stream_all_matches(
+    availabilities: Source,
+    subject_col: str,
+    slot_col: str,
+    exclusions: Union[pd.DataFrame, prep.ExclusionIndex, None] = None,
+    exclusions_subject_columns: Optional[Annotated[Iterable[str], 2]] = None,
+    n_partitions: int = 16,
+    memory_budget: int = 256 * 2**20,
+    chunksize: int = 100_000,
+    spill_dir: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Out-of-core version of `prep.get_all_matches`.
+
+    Yields one block of matches per partition of subject pairs. Every pair appears in
+    exactly one block, with all its shared slots, so the concatenation of the blocks has
+    the same rows as `get_all_matches` with the `numpy` engine, in a different order.
+
+    Parameters
+    ----------
+    availabilities: str, os.PathLike, pandas.DataFrame or iterable of pandas.DataFrame
+                    One row per subject and slot, as accepted by `read_availabilities`.
+    subject_col: str
+                 Name of the column containing the subjects.
+    slot_col: str
+              Name of the column containing the slots.
+    exclusions: pandas.DataFrame or prep.ExclusionIndex, default=None
+                Pairs of subjects that should not be matched.
+    exclusions_subject_columns: (str, str), default=None
+                                Names of the two columns of `exclusions` with the
+                                subjects. Not needed for an `ExclusionIndex`.
+    n_partitions: int, default=16
+                  Number of slot partitions and of subject pair partitions. Peak memory
+                  decreases with larger values, as long as a partition fits in memory.
+    memory_budget: int, default=256 MiB
+                   Bytes of partitions kept in memory before spilling to disk. The
+                   pairs of a slot partition are generated by batches of slots of
+                   about a quarter of the budget, so peak memory is about the budget,
+                   plus the availabilities of one slot partition and the pairs of its
+                   largest slot.
+    chunksize: int, default=100_000
+               Number of rows per chunk read from files.
+    spill_dir: str, default=None
+               Directory where temporary spill files are created. Defaults to the
+               system temporary directory.
+
+    Returns
+    -------
+    matches: iterator of pandas.DataFrame
+             Blocks in the format of `get_all_matches`.
+
+    Examples
+    --------
+    for block in stream_all_matches("availabilities.parquet", "subject", "slot"):
+        block.to_parquet(...)
+    """
+    if exclusions is not None and not isinstance(exclusions, prep.ExclusionIndex):
+        exclusions = prep.ExclusionIndex(exclusions, exclusions_subject_columns)
+
+    with tempfile.TemporaryDirectory(dir=spill_dir) as directory:
+        slot_dir = os.path.join(directory, "slots")
+        pair_dir = os.path.join(directory, "pairs")
+        os.mkdir(slot_dir)
+        os.mkdir(pair_dir)
+
+        # Partition availabilities by slot
+        rows = SpillBuffer(n_partitions, slot_dir, memory_budget // 2)
+        for chunk in read_availabilities(
+            availabilities, subject_col, slot_col, chunksize
+        ):
+            chunk = chunk.dropna()
+            partitions = _hash_partitions(chunk[slot_col].to_numpy(), n_partitions)
+            for partition, part in chunk.groupby(partitions, sort=False):
+                rows.append(int(partition), part)
+
+        # Generate the pairs of each slot partition by batches of slots, and route
+        # them by pair
+        pairs = SpillBuffer(n_partitions, pair_dir, memory_budget // 2)
+        max_pairs = memory_budget // (4 * _PAIR_BYTES)
+        for slot_partition in range(n_partitions):
+            frames = rows.pop(slot_partition)
+            if not frames:
+                continue
+            coded, subjects, slots = prep.encode_availabilities(
+                pd.concat(frames), subject_col=subject_col, slot_col=slot_col
+            )
+            del frames
+            subject_values, slot_values = subjects.to_numpy(), slots.to_numpy()
+            bounds = _slot_batches(coded["slot"].to_numpy(), max_pairs)
+            for start, stop in zip(bounds[:-1], bounds[1:], strict=True):
+                coded_matches = prep.get_coded_matches_from_slots(
+                    coded.iloc[start:stop]
+                )
+                block = pd.DataFrame(
+                    {
+                        "subject_a": subject_values[
+                            coded_matches["subject_a"].to_numpy()
+                        ],
+                        "subject_b": subject_values[
+                            coded_matches["subject_b"].to_numpy()
+                        ],
+                        "slot": slot_values[coded_matches["slot"].to_numpy()],
+                    }
+                )
+                del coded_matches
+                partitions = _pair_partitions(
+                    block["subject_a"].to_numpy(),
+                    block["subject_b"].to_numpy(),
+                    n_partitions,
+                )
+                for partition, part in block.groupby(partitions, sort=False):
+                    pairs.append(int(partition), part)
+
+        # Aggregate each pair partition independently
+        for pair_partition in range(n_partitions):
+            frames = pairs.pop(pair_partition)
+            if not frames:
+                continue
+            matches = _aggregate_pairs(pd.concat(frames), subject_col, slot_col)
+            del frames
+            if exclusions is not None:
+                matches = prep.apply_exclusions(matches, exclusions, subject_col)
+            yield matches.reset_index(drop=True)
+
+
+def get_all_matches(
+    availabilities: Source,
+    subject_col: str,
+    slot_col: str,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Collect the blocks of `stream_all_matches` in a single DataFrame.
+
+    The pairs are sorted as in `prep.get_all_matches`. Only the output needs to fit in
+    memory; see `stream_all_matches` for the other parameters.
+    """
+    blocks = list(stream_all_matches(availabilities, subject_col, slot_col, **kwargs))
+    if not blocks:
+        return pd.DataFrame(columns=[subject_col, slot_col])
+    matches = pd.concat(blocks, ignore_index=True)
+    return matches.sort_values(subject_col, ignore_index=True)
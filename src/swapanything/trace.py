@@ -0,0 +1,284 @@
+"""
+Instrumentation of the matching pipeline.
+
+The stages of the pipeline, from the backend fetch to the matching, run in spans
+recording their wall time, the rows they take and return and, optionally, their peak
+allocation. Spans are only recorded inside a `Tracer` block, which passes them to its
+sinks; outside of one, opening a span costs a context variable lookup.
+
+Examples
+--------
+with Tracer(sinks=[LoggingSink(), JSONLinesSink("spans.jsonl")]) as tracer:
+    matches = prep.get_all_matches(availabilities, "subject", "slot")
+    selected = select.select_matches(matches, "subject", "slot")
+print(tracer.report())
+"""
+
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+
+@dataclass
+class Span:
+    """
+    Record of a stage of the pipeline.
+
+    Attributes
+    ----------
+    name: str
+          Stage, e.g. "prep.pairs".
+    parent: str
+            Name of the enclosing span, None at the top level.
+    start: float
+           Start time, in seconds since the epoch.
+    duration: float
+              Wall time, in seconds.
+    rows_in: int
+             Rows taken by the stage, if known.
+    rows_out: int
+              Rows returned by the stage, if known.
+    peak_memory: int
+                 Peak of the memory allocated during the stage, in bytes, above the
+                 allocation at its start. Only recorded with `Tracer(memory=True)`.
+    attributes: dict
+                Other properties of the stage, e.g. the engine.
+    """
+
+    name: str
+    parent: Optional[str] = None
+    start: float = 0.0
+    duration: float = 0.0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    peak_memory: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_otel(self) -> Dict[str, Any]:
+        """Span in the OpenTelemetry data model, for exporters and collectors."""
+        attributes = {
+            f"swapanything.{name}": value
+            for name, value in [
+                ("rows_in", self.rows_in),
+                ("rows_out", self.rows_out),
+                ("peak_memory", self.peak_memory),
+            ]
+            if value is not None
+        }
+        attributes.update({f"swapanything.{k}": v for k, v in self.attributes.items()})
+        return {
+            "name": self.name,
+            "parent": self.parent,
+            "start_time_unix_nano": int(self.start * 1e9),
+            "end_time_unix_nano": int((self.start + self.duration) * 1e9),
+            "attributes": attributes,
+        }
+
+
+Sink = Callable[[Span], None]
+
+
+class LoggingSink:
+    """Sink logging each span, by default on the `swapanything.trace` logger."""
+
+    def __init__(
+        self, logger: Optional[logging.Logger] = None, level: int = logging.INFO
+    ) -> None:
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.level = level
+
+    def __call__(self, span: Span) -> None:
+        self.logger.log(
+            self.level,
+            "%s took %.6fs, rows %s -> %s, peak memory %s",
+            span.name,
+            span.duration,
+            span.rows_in,
+            span.rows_out,
+            span.peak_memory,
+        )
+
+
+class JSONLinesSink:
+    """Sink appending each span as a JSON line to a path or an open text file."""
+
+    def __init__(self, file: Union[str, IO[str]]) -> None:
+        self.file = file
+
+    def __call__(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        if isinstance(self.file, str):
+            with open(self.file, "a") as f:
+                f.write(line)
+        else:
+            self.file.write(line)
+
+
+def otel_sink(callback: Callable[[Dict[str, Any]], None]) -> Sink:
+    """Sink passing each span to `callback` in the OpenTelemetry data model."""
+
+    def sink(span: Span) -> None:
+        callback(span.to_otel())
+
+    return sink
+
+
+_TRACER: ContextVar[Optional["Tracer"]] = ContextVar(
+    "swapanything_tracer", default=None
+)
+# Innermost open span, per thread or task like the tracer: threads started in a
+# tracer block record their spans if they run in a copy of its context
+_CURRENT: ContextVar[Optional["_ActiveSpan"]] = ContextVar(
+    "swapanything_span", default=None
+)
+
+
+class Tracer:
+    """
+    Context manager recording the spans of the pipeline run in its block.
+
+    Parameters
+    ----------
+    sinks: list of callable, default=()
+           Called with each `Span` when it ends, e.g. `LoggingSink`,
+           `JSONLinesSink` or `otel_sink`.
+    memory: bool, default=False
+            Record the peak allocation of each span with `tracemalloc`, which slows
+            allocations down while tracing.
+
+    Attributes
+    ----------
+    spans: list of Span
+           Spans ended in the block, in order.
+    """
+
+    def __init__(self, sinks: Iterable[Sink] = (), memory: bool = False) -> None:
+        self.sinks = list(sinks)
+        self.memory = memory
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        self._token = None
+
+    def __enter__(self) -> "Tracer":
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._token = _TRACER.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _TRACER.reset(self._token)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _end(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+            for sink in self.sinks:
+                sink(span)
+
+    def report(self) -> pd.DataFrame:
+        """Spans as a table, one row per span with its timings and row counts."""
+        columns = [
+            "name",
+            "parent",
+            "duration",
+            "rows_in",
+            "rows_out",
+            "peak_memory",
+        ]
+        return pd.DataFrame(
+            [span.to_dict() for span in self.spans], columns=columns + ["attributes"]
+        )[columns]
+
+
+class _ActiveSpan:
+    def __init__(
+        self, tracer: Tracer, name: str, rows_in: Optional[int], attributes: dict
+    ) -> None:
+        self.tracer = tracer
+        self.span = Span(name=name, rows_in=rows_in, attributes=attributes)
+        self._inner_peak = 0
+
+    @property
+    def rows_out(self) -> Optional[int]:
+        return self.span.rows_out
+
+    @rows_out.setter
+    def rows_out(self, value: int) -> None:
+        self.span.rows_out = value
+
+    def __enter__(self) -> "_ActiveSpan":
+        self._parent = _CURRENT.get()
+        if self._parent is not None:
+            self.span.parent = self._parent.span.name
+        if self.tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak is reset for this span, so it is kept for the enclosing one
+            if self._parent is not None:
+                self._parent._inner_peak = max(self._parent._inner_peak, peak)
+            self._memory_start = current
+            tracemalloc.reset_peak()
+        self._token = _CURRENT.set(self)
+        self.span.start = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.span.duration = time.perf_counter() - self._start
+        _CURRENT.reset(self._token)
+        if self.tracer.memory:
+            peak = max(tracemalloc.get_traced_memory()[1], self._inner_peak)
+            self.span.peak_memory = peak - self._memory_start
+            if self._parent is not None:
+                self._parent._inner_peak = max(self._parent._inner_peak, peak)
+        self.tracer._end(self.span)
+
+
+class _NullSpan:
+    # Shared no-op span, used when there is no tracer
+    rows_out = None
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(
+    name: str, rows_in: Optional[int] = None, **attributes
+) -> Union[_ActiveSpan, _NullSpan]:
+    """
+    Context manager recording a stage in the current `Tracer`, if any.
+
+    Set `rows_out` on the returned span to record the rows returned by the stage.
+
+    Examples
+    --------
+    with span("prep.pairs", rows_in=len(availabilities)) as s:
+        matches = ...
+        s.rows_out = len(matches)
+    """
+    tracer = _TRACER.get()
+    if tracer is None:
+        return _NULL_SPAN
+    return _ActiveSpan(tracer, name, rows_in, attributes)
@@ -1,13 +1,44 @@
 from abc import ABC, abstractmethod
-from typing import Annotated, Iterable, TypeVar
+from typing import (
+    Annotated,
+    Any,
+    Hashable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 import pandas as pd
+from swapanything.incremental import _pair
+
+from .filters import Where, filter_frame
 
 
 class BackendError(Exception):
     pass
 
 
+Pair = Tuple[Hashable, Hashable]
+
+
+def pair_key(pair: Iterable[Hashable]) -> Pair:
+    """
+    Order-independent key of a pair of subjects, so that (a, b) and (b, a) match.
+
+    Subjects are ordered by their own values, as the pairs of the matching stages.
+    """
+    return _pair(*pair)
+
+
+class Tables(NamedTuple):
+    subjects: pd.DataFrame
+    availabilities: pd.DataFrame
+    exclusions: pd.DataFrame
+
+
 class BackendBase(ABC):
     subject_features: Iterable[str]
     availability_subject_column: str
@@ -26,5 +57,78 @@ class BackendBase(ABC):
     def get_exclusions(self, *args, **kwargs) -> pd.DataFrame:  # pragma: no cover
         raise NotImplementedError()
 
+    def filter_subjects(self, subjects: pd.DataFrame, where: Where) -> pd.DataFrame:
+        """Apply the predicates of `where` to a subjects table."""
+        return filter_frame(subjects, where, subject_columns=["subject_id"])
+
+    def filter_availabilities(
+        self, availabilities: pd.DataFrame, where: Where
+    ) -> pd.DataFrame:
+        """Apply the predicates of `where` to an availabilities table."""
+        return filter_frame(
+            availabilities,
+            where,
+            subject_columns=["subject_id"],
+            slot_column="availabilities",
+        )
+
+    def filter_exclusions(self, exclusions: pd.DataFrame, where: Where) -> pd.DataFrame:
+        """Apply the predicates of `where` to an exclusions table."""
+        return filter_frame(
+            exclusions, where, subject_columns=list(self.exclusions_subject_columns)
+        )
+
+    def load_all(self, where: Where = None) -> Tables:
+        """Get subjects, availabilities and exclusions at once."""
+        return Tables(
+            subjects=self.filter_subjects(self.get_subjects(), where),
+            availabilities=self.filter_availabilities(self.get_availabilities(), where),
+            exclusions=self.filter_exclusions(self.get_exclusions(), where),
+        )
+
+    def write_matches(
+        self,
+        matches: pd.DataFrame,
+        subjects_col: str,
+        slots_col: Optional[str] = None,
+    ) -> None:
+        """
+        Write selected matches back to the exclusions, e.g. the output of
+        `select_matches`, so that the next runs do not propose them again.
+
+        Writes are upserts keyed by the pair of subjects, in any order, so writing the
+        same matches again updates the existing rows instead of duplicating them.
+
+        Parameters
+        ----------
+        matches: pandas.DataFrame
+                 Matches, with a column of subject pairs.
+        subjects_col: str
+                      Column with the pairs of subjects.
+        slots_col: str, default=None
+                   Column with the slots of each match, written if the backend
+                   stores them.
+        """
+        pairs = matches[subjects_col].tolist()
+        slots = matches[slots_col].tolist() if slots_col else [None] * len(pairs)
+        self._upsert_exclusions(pairs, slots)
+
+    def append_exclusions(self, pairs: Iterable[Iterable[Hashable]]) -> None:
+        """
+        Add pairs of subjects to the exclusions, skipping the pairs already there.
+
+        Parameters
+        ----------
+        pairs: iterable of pairs
+               Pairs of subject ids, in any order.
+        """
+        pairs = list(pairs)
+        self._upsert_exclusions(pairs, [None] * len(pairs))
+
+    def _upsert_exclusions(
+        self, pairs: List[Iterable[Hashable]], slots: List[Any]
+    ) -> None:
+        raise BackendError(f"{type(self).__name__} does not support writes")
+
 
 BackendType = TypeVar("BackendType", bound=BackendBase)
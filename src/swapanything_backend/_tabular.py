@@ -0,0 +1,117 @@
+from abc import abstractmethod
+from typing import Any, List, Literal, Optional, Tuple
+
+import pandas as pd
+from swapanything import trace
+
+from ._base import BackendBase
+from .filters import CreatedAfter, SlotBetween, SlotIn, SubjectIn, Where
+
+# Native conditions, compiled by each backend:
+# ("in", column, values), ("between", column, start, end), ("after", column, start)
+Condition = Tuple[Any, ...]
+Table = Literal["subjects", "availabilities", "exclusions"]
+
+
+class TabularBackend(BackendBase):
+    """
+    Backend reading the three tables from a tabular store, one row per record.
+
+    Subclasses implement `_read`, which pushes the projection and the conditions down
+    to the store. The getters return the same column conventions as `AirTableBackend`.
+    """
+
+    subject_id_column: str
+    availability_id_column: Optional[str]
+    exclusion_id_column: Optional[str]
+    created_column: Optional[str]
+
+    def _traced_read(
+        self, table: Table, columns: List[str], conditions: List[Condition]
+    ) -> pd.DataFrame:
+        with trace.span("backend.fetch", table=table) as s:
+            df = self._read(table, columns, conditions)
+            s.rows_out = len(df)
+        return df
+
+    @abstractmethod
+    def _read(
+        self, table: Table, columns: List[str], conditions: List[Condition]
+    ) -> pd.DataFrame:  # pragma: no cover
+        raise NotImplementedError()
+
+    def _conditions(
+        self,
+        where: Where,
+        subject_columns: List[str],
+        slot_column: Optional[str] = None,
+    ) -> List[Condition]:
+        conditions = []
+        for predicate in where or ():
+            if isinstance(predicate, SubjectIn):
+                for column in subject_columns:
+                    conditions.append(("in", column, predicate.subjects))
+            elif isinstance(predicate, SlotIn) and slot_column is not None:
+                conditions.append(("in", slot_column, predicate.slots))
+            elif isinstance(predicate, SlotBetween) and slot_column is not None:
+                conditions.append(
+                    ("between", slot_column, predicate.start, predicate.end)
+                )
+            elif isinstance(predicate, CreatedAfter) and self.created_column:
+                conditions.append(("after", self.created_column, predicate.timestamp))
+        return conditions
+
+    @staticmethod
+    def _set_index(df: pd.DataFrame, column: Optional[str], name: str) -> pd.DataFrame:
+        if column is None:
+            return df.rename_axis(name)
+        return df.rename(columns={column: name}).set_index(name)
+
+    def get_subjects(
+        self, where: Where = None, columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        if columns is None:
+            columns = list(self.subject_features)
+        elif not set(columns) <= set(self.subject_features):
+            raise ValueError("columns must be a subset of subject_features")
+        df = self._traced_read(
+            "subjects",
+            [self.subject_id_column, *columns],
+            self._conditions(where, [self.subject_id_column]),
+        )
+        df = self._set_index(df, self.subject_id_column, "subject_id")
+        return self.filter_subjects(df, where)
+
+    def get_availabilities(self, where: Where = None) -> pd.DataFrame:
+        id_columns = (
+            [self.availability_id_column] if self.availability_id_column else []
+        )
+        df = self._traced_read(
+            "availabilities",
+            [*id_columns, self.availability_subject_column, self.availabilities_column],
+            self._conditions(
+                where, [self.availability_subject_column], self.availabilities_column
+            ),
+        )
+        df = self._set_index(
+            df.reset_index(drop=True), self.availability_id_column, "availability_id"
+        ).rename(
+            columns={
+                self.availability_subject_column: "subject_id",
+                self.availabilities_column: "availabilities",
+            }
+        )
+        return self.filter_availabilities(df, where)
+
+    def get_exclusions(self, where: Where = None) -> pd.DataFrame:
+        id_columns = [self.exclusion_id_column] if self.exclusion_id_column else []
+        subject_columns = list(self.exclusions_subject_columns)
+        df = self._traced_read(
+            "exclusions",
+            [*id_columns, *subject_columns],
+            self._conditions(where, subject_columns),
+        )
+        df = self._set_index(
+            df.reset_index(drop=True), self.exclusion_id_column, "exclusion_id"
+        )
+        return self.filter_exclusions(df, where)
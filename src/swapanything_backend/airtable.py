@@ -1,13 +1,89 @@
+import contextvars
+import threading
+import time
 from collections.abc import Iterator
-from typing import Annotated, Iterable, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Any, Dict, Hashable, Iterable, List, Literal, Optional
 
 import pandas as pd
 import pyairtable as airtable
-from pydantic import BaseModel, Field, PastDatetime, SecretStr
+from pyairtable import formulas, retry_strategy
+from pydantic import (
+    BaseModel,
+    Field,
+    PastDatetime,
+    PrivateAttr,
+    SecretStr,
+    model_validator,
+)
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from swapanything import trace
 
 # from swapanything import models as m
-from ._base import BackendBase
+from ._base import BackendBase, Tables, pair_key
+from .cache import Fetch, SnapshotCache
+from .filters import CreatedAfter, SlotIn, SubjectIn, Where
+
+AIRTABLE_REQUESTS_PER_SECOND = 5.0
+# Records per create or update request of the Airtable API
+AIRTABLE_BATCH_SIZE = 10
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens are refilled at `rate` per second, up to `capacity`, and every call to
+    `acquire` takes one, waiting for it if needed.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self._updated
+                self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Airtable rate limits are per base, so buckets are shared by all the backends
+_RATE_LIMITERS: Dict[str, TokenBucket] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(base_id: str, rate: float) -> TokenBucket:
+    """Token bucket shared by every request to `base_id`."""
+    with _RATE_LIMITERS_LOCK:
+        if base_id not in _RATE_LIMITERS or _RATE_LIMITERS[base_id].rate != rate:
+            _RATE_LIMITERS[base_id] = TokenBucket(rate)
+        return _RATE_LIMITERS[base_id]
+
+
+class RateLimitedApi(airtable.Api):
+    """Airtable API client taking a token from `rate_limiter` before each request."""
+
+    # Pages are throttled by the token bucket instead of a fixed sleep
+    API_LIMIT = 0.0
+
+    def __init__(self, api_key: str, rate_limiter: TokenBucket, **kwargs) -> None:
+        super().__init__(api_key, **kwargs)
+        self.rate_limiter = rate_limiter
+
+    def _request(self, *args, **kwargs):
+        self.rate_limiter.acquire()
+        return super()._request(*args, **kwargs)
 
 
 class AirtableRecord(BaseModel):
@@ -28,22 +104,167 @@ class AirtableResponse(BaseModel):
         return df
 
 
+Validation = Literal["full", "schema", "none"]
+
+# Records per page of the Airtable API
+AIRTABLE_PAGE_SIZE = 100
+
+
+def _validate_schema(records: List[dict]) -> None:
+    # Full validation of the first record of each page...
+    for record in records[::AIRTABLE_PAGE_SIZE]:
+        AirtableRecord.model_validate(record)
+    # ...and vectorized checks of the others
+    if not all(
+        isinstance(r, dict) and isinstance(r.get("id"), str) and "fields" in r
+        for r in records
+    ):
+        raise ValueError("Airtable records need an 'id' and 'fields'")
+    # Airtable times are in milliseconds and UTC, e.g. "2023-06-09T13:33:11.000Z"
+    created = pd.to_datetime(
+        [r.get("createdTime") for r in records],
+        utc=True,
+        format="%Y-%m-%dT%H:%M:%S.%f%z",
+    )
+    if created.isna().any() or (created > pd.Timestamp.now(tz="UTC")).any():
+        raise ValueError("Airtable records need a past 'createdTime'")
+
+
+def records_to_pandas(
+    records: List[dict], validate: Validation = "full"
+) -> pd.DataFrame:
+    """
+    Build a DataFrame with the fields of Airtable records, one row per record.
+
+    Parameters
+    ----------
+    records: list of dict
+             Records as returned by `pyairtable.Table.all`.
+    validate: "full", "schema" or "none", default="full"
+              "full" validates every record with `AirtableRecord`. "schema" validates
+              the first record of every page, then checks ids and `createdTime` of all
+              the records at once. "none" trusts the API.
+
+    Returns
+    -------
+    df: pandas.DataFrame
+        One column per field, missing fields are NaN.
+    """
+    with trace.span("backend.decode", rows_in=len(records), validate=validate) as s:
+        if validate == "full":
+            df = AirtableResponse.model_validate({"records": records}).to_pandas()
+        elif validate == "schema":
+            _validate_schema(records)
+            df = pd.DataFrame([record["fields"] for record in records])
+        elif validate == "none":
+            df = pd.DataFrame([record["fields"] for record in records])
+        else:
+            raise ValueError(f"Unknown validation '{validate}'")
+        s.rows_out = len(df)
+    return df
+
+
+def _contains_any(field: str, values: Iterable) -> str:
+    # Lists and linked records are joined in formulas, so FIND selects a superset
+    # of the records, refined by `filter_frame`
+    text = f"({formulas.FIELD(field)} & '')"
+    conditions = [formulas.FIND(formulas.STR_VALUE(str(v)), text) for v in values]
+    return formulas.OR(*conditions) if conditions else "FALSE()"
+
+
+def compile_formula(
+    where: Where,
+    formula: str | None = None,
+    subject_fields: List[str | None] = (),
+    slot_field: str | None = None,
+) -> str | None:
+    """
+    Compile the predicates of `where` to an Airtable formula.
+
+    `SubjectIn` applies to each of `subject_fields`, where None stands for the record
+    id, and `SlotIn` to `slot_field`. Linked records are matched by their primary
+    field, which should be the record id as in the `recID` convention of this backend.
+    `CreatedAfter` uses the record creation time. `SlotBetween` has no formula for
+    slot lists, so it is only applied after the download.
+
+    Returns
+    -------
+    formula: str or None
+             `formula` and the compiled predicates, joined with AND.
+    """
+    conditions = [formula] if formula else []
+    for predicate in where or ():
+        if isinstance(predicate, SubjectIn):
+            for field in subject_fields:
+                if field is None:
+                    ids = [
+                        formulas.EQUAL("RECORD_ID()", formulas.STR_VALUE(str(s)))
+                        for s in predicate.subjects
+                    ]
+                    conditions.append(formulas.OR(*ids) if ids else "FALSE()")
+                else:
+                    conditions.append(_contains_any(field, predicate.subjects))
+        elif isinstance(predicate, SlotIn) and slot_field is not None:
+            conditions.append(_contains_any(slot_field, predicate.slots))
+        elif isinstance(predicate, CreatedAfter):
+            timestamp = pd.Timestamp(predicate.timestamp)
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.tz_convert("UTC")
+            conditions.append(
+                "IS_AFTER(CREATED_TIME(), DATETIME_PARSE("
+                f"'{timestamp.strftime('%Y-%m-%dT%H:%M:%S.000Z')}'))"
+            )
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else formulas.AND(*conditions)
+
+
 class AirTableBackend(BaseSettings, BackendBase):
     # Manually adding again to help pylance and other
     # linters not to get crazy
     subject_features: List[str]
     availability_subject_column: str
     availabilities_column: str
-    exclusions_subject_columns: Annotated[Iterable[str], 2]
+    exclusions_subject_columns: Annotated[List[str], 2]
 
     subjects_table_name: str
     availabilities_table_name: str
     exclusions_table_name: str
     client_id: SecretStr = Field(..., validation_alias="AIRTABLE_BASE_ID")
     client_secret: SecretStr = Field(..., validation_alias="AIRTABLE_API_KEY")
+    endpoint_url: str = "https://api.airtable.com"
+    requests_per_second: float = AIRTABLE_REQUESTS_PER_SECOND
+
+    # Write-back of matches and exclusions (see `write_matches`)
+    exclusions_slot_column: Optional[str] = None
+    write_workers: int = 4
+    max_retries: int = 5
+
+    # Local snapshots of the tables, synced incrementally (see `SnapshotCache`)
+    cache_path: Optional[str] = None
+    cache_ttl: Optional[float] = None
+    cache_max_size: Optional[int] = None
+    offline: bool = False
+
+    # Validation of the downloaded records (see `records_to_pandas`), set with
+    # `validate=` since `BaseModel.validate` is taken, or SWPAT_VALIDATE
+    validation: Validation = Field("full", validation_alias="swpat_validate")
 
     model_config = SettingsConfigDict(case_sensitive=False, env_prefix="SWPAT_")
 
+    _api: Optional[RateLimitedApi] = PrivateAttr(default=None)
+    _cache: Optional[SnapshotCache] = PrivateAttr(default=None)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _validate_keyword(cls, data: Any) -> Any:
+        # Only the prefixed alias is read from the environment, `validate=` is
+        # renamed to it here
+        if isinstance(data, dict) and "validate" in data:
+            data = dict(data)
+            data["swpat_validate"] = data.pop("validate")
+        return data
+
     def _get_table(
         self,
         table_name: str,
@@ -58,47 +279,235 @@ class AirTableBackend(BaseSettings, BackendBase):
         all = table.all(**options)
         return all
 
-    def get_subjects(self, formula: str | None = None) -> pd.DataFrame:
-        table = self._get_table(
-            table_name=self.subjects_table_name,
-            fields=["recID", *self.subject_features],
-            formula=formula,
+    def _get_api(self) -> RateLimitedApi:
+        # One shared HTTP session, and rate limiter, for the concurrent requests
+        if self._api is None:
+            base_id = self.client_id.get_secret_value()
+            self._api = RateLimitedApi(
+                self.client_secret.get_secret_value(),
+                rate_limiter=get_rate_limiter(base_id, self.requests_per_second),
+                endpoint_url=self.endpoint_url,
+                # 429s are retried with exponential backoff, or after Retry-After.
+                # Airtable did not process the request, so writes are retried too.
+                retry_strategy=retry_strategy(
+                    status_forcelist=(429,),
+                    total=self.max_retries,
+                    allowed_methods=None,
+                ),
+            )
+        return self._api
+
+    def _get_shared_table(self, table_name: str, **options) -> List[dict]:
+        return self._get_api().all(
+            self.client_id.get_secret_value(), table_name, **options
+        )
+
+    def _get_cache(self) -> Optional[SnapshotCache]:
+        if self._cache is None and self.cache_path is not None:
+            self._cache = SnapshotCache(
+                self.cache_path, ttl=self.cache_ttl, max_size=self.cache_max_size
+            )
+        return self._cache
+
+    def _get_records(self, fetch: Fetch, **options) -> List[dict]:
+        cache = self._get_cache()
+        with trace.span("backend.fetch", table=options.get("table_name")) as s:
+            if cache is None:
+                records = fetch(**options)
+            else:
+                records = cache.get_records(
+                    self.client_id.get_secret_value(),
+                    fetch=fetch,
+                    offline=self.offline,
+                    **options,
+                )
+            s.rows_out = len(records)
+        return records
+
+    def _subjects_options(
+        self,
+        formula: str | None,
+        where: Where = None,
+        columns: List[str] | None = None,
+    ) -> dict:
+        if columns is None:
+            columns = self.subject_features
+        elif not set(columns) <= set(self.subject_features):
+            raise ValueError("columns must be a subset of subject_features")
+        return {
+            "table_name": self.subjects_table_name,
+            "fields": ["recID", *columns],
+            "formula": compile_formula(where, formula, subject_fields=[None]),
+        }
+
+    def _availabilities_options(self, formula: str | None, where: Where = None) -> dict:
+        return {
+            "table_name": self.availabilities_table_name,
+            "fields": [
+                "recID",
+                self.availability_subject_column,
+                self.availabilities_column,
+            ],
+            "formula": compile_formula(
+                where,
+                formula,
+                subject_fields=[self.availability_subject_column],
+                slot_field=self.availabilities_column,
+            ),
+        }
+
+    def _exclusions_options(self, formula: str | None, where: Where = None) -> dict:
+        return {
+            "table_name": self.exclusions_table_name,
+            "fields": ["recID", *self.exclusions_subject_columns],
+            "formula": compile_formula(
+                where, formula, subject_fields=list(self.exclusions_subject_columns)
+            ),
+        }
+
+    def get_subjects(
+        self,
+        formula: str | None = None,
+        where: Where = None,
+        columns: List[str] | None = None,
+    ) -> pd.DataFrame:
+        options = self._subjects_options(formula, where, columns)
+        table = self._get_records(self._get_table, **options)
+        return self.filter_subjects(self._subjects_frame(table), where)
+
+    def get_exclusions(
+        self, formula: str | None = None, where: Where = None
+    ) -> pd.DataFrame:
+        options = self._exclusions_options(formula, where)
+        table = self._get_records(self._get_table, **options)
+        return self.filter_exclusions(self._exclusions_frame(table), where)
+
+    def get_availabilities(
+        self, formula: str | None = None, where: Where = None
+    ) -> pd.DataFrame:
+        options = self._availabilities_options(formula, where)
+        table = self._get_records(self._get_table, **options)
+        return self.filter_availabilities(self._availabilities_frame(table), where)
+
+    def load_all(
+        self,
+        subjects_formula: str | None = None,
+        availabilities_formula: str | None = None,
+        exclusions_formula: str | None = None,
+        where: Where = None,
+    ) -> Tables:
+        """
+        Get subjects, availabilities and exclusions concurrently.
+
+        The three tables are paginated in parallel threads over one shared HTTP
+        session, while a token bucket keeps all the requests to the base within
+        `requests_per_second`.
+        """
+        options = [
+            self._subjects_options(subjects_formula, where),
+            self._availabilities_options(availabilities_formula, where),
+            self._exclusions_options(exclusions_formula, where),
+        ]
+        # Created before the fan-out, so that the threads share a single api and
+        # a single snapshot cache
+        self._get_api()
+        self._get_cache()
+        with ThreadPoolExecutor(max_workers=len(options)) as executor:
+            futures = [
+                # Each thread runs in a copy of the context, to record its spans
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self._get_records,
+                    self._get_shared_table,
+                    **table_options,
+                )
+                for table_options in options
+            ]
+            subjects, availabilities, exclusions = [f.result() for f in futures]
+        return Tables(
+            subjects=self.filter_subjects(self._subjects_frame(subjects), where),
+            availabilities=self.filter_availabilities(
+                self._availabilities_frame(availabilities), where
+            ),
+            exclusions=self.filter_exclusions(
+                self._exclusions_frame(exclusions), where
+            ),
         )
-        table = AirtableResponse.model_validate({"records": table})
+
+    def _upsert_exclusions(
+        self, pairs: List[Iterable[Hashable]], slots: List[Any]
+    ) -> None:
+        # Airtable cannot merge on linked records, so the existing pairs are looked
+        # up first, then updated by record id or created, in concurrent batches
+        subject_columns = list(self.exclusions_subject_columns)
+        existing = self._get_shared_table(
+            self.exclusions_table_name, fields=subject_columns
+        )
+        record_ids = {}
+        for record in existing:
+            linked = [record["fields"].get(c) for c in subject_columns]
+            # Records missing a subject can't hold any of the pairs
+            if all(linked):
+                record_ids[pair_key(subjects[0] for subjects in linked)] = record["id"]
+
+        fields_by_pair = {}
+        for pair, slot in zip(pairs, slots, strict=True):
+            key = pair_key(pair)
+            fields = {
+                c: [subject] for c, subject in zip(subject_columns, key, strict=True)
+            }
+            if self.exclusions_slot_column and slot is not None:
+                fields[self.exclusions_slot_column] = (
+                    list(slot) if isinstance(slot, (list, tuple)) else slot
+                )
+            fields_by_pair[key] = fields
+
+        updates = [
+            {"id": record_ids[key], "fields": fields}
+            for key, fields in fields_by_pair.items()
+            if key in record_ids and len(fields) > len(subject_columns)
+        ]
+        creates = [
+            fields for key, fields in fields_by_pair.items() if key not in record_ids
+        ]
+
+        api = self._get_api()
+        base_id = self.client_id.get_secret_value()
+        table_name = self.exclusions_table_name
+        batches = [
+            (api.batch_update, updates[i : i + AIRTABLE_BATCH_SIZE])
+            for i in range(0, len(updates), AIRTABLE_BATCH_SIZE)
+        ] + [
+            (api.batch_create, creates[i : i + AIRTABLE_BATCH_SIZE])
+            for i in range(0, len(creates), AIRTABLE_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=self.write_workers) as executor:
+            futures = [
+                executor.submit(write, base_id, table_name, batch, typecast=True)
+                for write, batch in batches
+            ]
+            for future in futures:
+                future.result()
+
+    def _subjects_frame(self, table: List[dict]) -> pd.DataFrame:
         table = (
-            table.to_pandas()
+            records_to_pandas(table, validate=self.validation)
             .rename(columns={"recID": "subject_id"})
             .set_index("subject_id")
         )
         return table
 
-    def get_exclusions(self, formula: str | None = None) -> pd.DataFrame:
-        table = self._get_table(
-            table_name=self.exclusions_table_name,
-            fields=["recID", *self.exclusions_subject_columns],
-            formula=formula,
-        )
-        table = AirtableResponse.model_validate({"records": table})
+    def _exclusions_frame(self, table: List[dict]) -> pd.DataFrame:
         table = (
-            table.to_pandas()
+            records_to_pandas(table, validate=self.validation)
             .rename(columns={"recID": "exclusion_id"})
             .set_index("exclusion_id")
         )
         return table
 
-    def get_availabilities(self, formula: str | None = None) -> pd.DataFrame:
-        table = self._get_table(
-            table_name=self.availabilities_table_name,
-            fields=[
-                "recID",
-                self.availability_subject_column,
-                self.availabilities_column,
-            ],
-            formula=formula,
-        )
-        table = AirtableResponse.model_validate({"records": table})
+    def _availabilities_frame(self, table: List[dict]) -> pd.DataFrame:
         table = (
-            table.to_pandas()
+            records_to_pandas(table, validate=self.validation)
             .rename(
                 columns={
                     "recID": "availability_id",
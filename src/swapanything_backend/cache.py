@@ -0,0 +1,286 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from ._base import BackendError
+
+Fetch = Callable[..., List[dict]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    key TEXT PRIMARY KEY,
+    base_id TEXT NOT NULL,
+    table_name TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    synced_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    key TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    created_time TEXT NOT NULL,
+    last_modified REAL NOT NULL,
+    fields TEXT NOT NULL,
+    PRIMARY KEY (key, record_id)
+);
+"""
+
+
+def modified_since_formula(timestamp: float, formula: Optional[str] = None) -> str:
+    """Airtable formula selecting the records of `formula` modified after `timestamp`."""
+    since = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    modified = (
+        "IS_AFTER(LAST_MODIFIED_TIME(), "
+        f"DATETIME_PARSE('{since.strftime('%Y-%m-%dT%H:%M:%S.000Z')}'))"
+    )
+    return f"AND({formula}, {modified})" if formula else modified
+
+
+class SnapshotCache:
+    """
+    SQLite snapshots of Airtable tables, kept up to date by delta syncs.
+
+    A snapshot is keyed by base, table, fields and formula. The first request downloads
+    the whole table; the next ones only fetch the records modified since the previous
+    sync, through a `LAST_MODIFIED_TIME()` formula, and merge them in the snapshot.
+    Deleted records, and records not matching the formula anymore, are dropped after a
+    cheap listing of the record ids. Each record is stored with its `createdTime` and the
+    time of the sync that last fetched it.
+
+    Parameters
+    ----------
+    path: str
+          Path of the SQLite database, created if missing.
+    ttl: float, default=None
+         Seconds after which a snapshot is downloaded again from scratch. By default
+         snapshots are only updated by delta syncs.
+    max_size: int, default=None
+              Bytes of records above which the least recently used snapshots are
+              evicted. By default the cache is unbounded.
+    sync_overlap: float, default=60.0
+                  Seconds subtracted from the last sync time in the delta formula, to
+                  tolerate clock skew with Airtable. Records are merged by id, so the
+                  overlap only costs a few more records.
+
+    Examples
+    --------
+    cache = SnapshotCache("airtable.sqlite", ttl=24 * 3600)
+    records = cache.get_records("appXXX", "subjects", table.all, fields=["recID"])
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+        sync_overlap: float = 60.0,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.sync_overlap = sync_overlap
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One connection per operation, so that the cache can be used from threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def key(
+        base_id: str,
+        table_name: str,
+        fields: Optional[Iterable[str]] = None,
+        formula: Optional[str] = None,
+    ) -> str:
+        """Key of the snapshot of a table, with given fields and formula."""
+        fields = list(fields) if fields is not None else None
+        payload = json.dumps([base_id, table_name, fields, formula])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get_records(
+        self,
+        base_id: str,
+        table_name: str,
+        fetch: Fetch,
+        fields: Optional[List[str]] = None,
+        formula: Optional[str] = None,
+        offline: bool = False,
+    ) -> List[dict]:
+        """
+        Records of a table, synced with Airtable through `fetch`.
+
+        Parameters
+        ----------
+        base_id: str
+                 Airtable base, part of the snapshot key.
+        table_name: str
+                    Airtable table.
+        fetch: callable
+               Called as `fetch(table_name=..., fields=..., formula=...)`, it returns
+               the records like `pyairtable.Table.all`.
+        fields: list of str, default=None
+                Fields to download. The first one is used to list the record ids.
+        formula: str, default=None
+                 Airtable formula filtering the records.
+        offline: bool, default=False
+                 Serve the snapshot without calling `fetch`, even if expired.
+
+        Returns
+        -------
+        records: list of dict
+                 Records with `id`, `createdTime` and `fields`.
+
+        Raises
+        ------
+        BackendError
+            If `offline` and there is no snapshot.
+        """
+        key = self.key(base_id, table_name, fields, formula)
+        now = time.time()
+        with self._connect() as conn:
+            snapshot = conn.execute(
+                "SELECT created_at, synced_at FROM snapshots WHERE key = ?", (key,)
+            ).fetchone()
+
+        if offline:
+            if snapshot is None:
+                raise BackendError(f"No offline snapshot of table '{table_name}'")
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE snapshots SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            return self._read(key)
+
+        if (
+            snapshot is not None
+            and self.ttl is not None
+            and now - snapshot[0] > self.ttl
+        ):
+            self.evict(key)
+            snapshot = None
+
+        if snapshot is None:
+            records = fetch(table_name=table_name, fields=fields, formula=formula)
+            with self._connect() as conn:
+                self._write(conn, key, records, now)
+                conn.execute(
+                    "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (key, base_id, table_name, now, now, now),
+                )
+                self._update_size(conn, key)
+            self._enforce_max_size(keep=key)
+            return records
+
+        changed = fetch(
+            table_name=table_name,
+            fields=fields,
+            formula=modified_since_formula(snapshot[1] - self.sync_overlap, formula),
+        )
+        listed = fetch(
+            table_name=table_name,
+            fields=fields[:1] if fields else None,
+            formula=formula,
+        )
+        with self._connect() as conn:
+            self._write(conn, key, changed, now)
+            conn.execute("CREATE TEMP TABLE listed (record_id TEXT PRIMARY KEY)")
+            conn.executemany(
+                "INSERT OR IGNORE INTO listed VALUES (?)", ((r["id"],) for r in listed)
+            )
+            conn.execute(
+                "DELETE FROM records WHERE key = ? AND record_id NOT IN listed", (key,)
+            )
+            conn.execute(
+                "UPDATE snapshots SET synced_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+            self._update_size(conn, key)
+        self._enforce_max_size(keep=key)
+        return self._read(key)
+
+    @staticmethod
+    def _write(
+        conn: sqlite3.Connection, key: str, records: List[dict], synced_at: float
+    ) -> None:
+        # Upserts keep the rowid, hence the position, of the records already stored
+        conn.executemany(
+            """
+            INSERT INTO records VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (key, record_id) DO UPDATE SET
+                created_time = excluded.created_time,
+                last_modified = excluded.last_modified,
+                fields = excluded.fields
+            """,
+            (
+                (key, r["id"], r["createdTime"], synced_at, json.dumps(r["fields"]))
+                for r in records
+            ),
+        )
+
+    @staticmethod
+    def _update_size(conn: sqlite3.Connection, key: str) -> None:
+        conn.execute(
+            """
+            UPDATE snapshots SET size = (
+                SELECT COALESCE(SUM(LENGTH(fields)), 0) FROM records WHERE key = ?
+            ) WHERE key = ?
+            """,
+            (key, key),
+        )
+
+    def _read(self, key: str) -> List[dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT record_id, created_time, fields FROM records "
+                "WHERE key = ? ORDER BY rowid",
+                (key,),
+            ).fetchall()
+        return [
+            {"id": record_id, "createdTime": created_time, "fields": json.loads(fields)}
+            for record_id, created_time, fields in rows
+        ]
+
+    def _enforce_max_size(self, keep: Optional[str] = None) -> None:
+        if self.max_size is None:
+            return
+        with self._connect() as conn:
+            snapshots = conn.execute(
+                "SELECT key, size FROM snapshots ORDER BY accessed_at DESC"
+            ).fetchall()
+        total = sum(size for _, size in snapshots)
+        for key, size in reversed(snapshots):
+            if total <= self.max_size:
+                break
+            if key != keep:
+                self.evict(key)
+                total -= size
+
+    def size(self) -> int:
+        """Bytes of records stored in all the snapshots."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM snapshots"
+            ).fetchone()[0]
+
+    def evict(self, key: Optional[str] = None) -> None:
+        """Drop the snapshot with `key`, or all the snapshots if None."""
+        with self._connect() as conn:
+            if key is None:
+                conn.execute("DELETE FROM records")
+                conn.execute("DELETE FROM snapshots")
+            else:
+                conn.execute("DELETE FROM records WHERE key = ?", (key,))
+                conn.execute("DELETE FROM snapshots WHERE key = ?", (key,))
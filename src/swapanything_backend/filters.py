@@ -0,0 +1,141 @@
+"""
+Typed filters for the backend getters.
+
+Each backend compiles the predicates it can to its native query, so that less data is
+transferred, and `filter_frame` then enforces all of them exactly on the result. A
+`where` is an iterable of predicates, all of which must hold; predicates which do not
+apply to a table, e.g. slot predicates on subjects, are ignored for that table.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import Any, Hashable, Iterable, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class SubjectIn:
+    """Only the given subjects, by id."""
+
+    subjects: Tuple[Hashable, ...]
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "subjects", tuple(self.subjects))
+
+
+@dataclass(frozen=True)
+class SlotIn:
+    """Only the given slots."""
+
+    slots: Tuple[Hashable, ...]
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "slots", tuple(self.slots))
+
+
+@dataclass(frozen=True)
+class SlotBetween:
+    """Only the slots between `start` and `end`, both included and optional."""
+
+    start: Any = None
+    end: Any = None
+
+
+@dataclass(frozen=True)
+class CreatedAfter:
+    """Only the records created after `timestamp`."""
+
+    timestamp: Union[datetime, str]
+
+
+Predicate = Union[SubjectIn, SlotIn, SlotBetween, CreatedAfter]
+Where = Optional[Iterable[Predicate]]
+
+
+def _timestamp(value: Any) -> pd.Timestamp:
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return timestamp
+
+
+def _is_datetime(value: Any) -> bool:
+    return isinstance(value, (datetime, pd.Timestamp))
+
+
+def _slot_between(predicate: SlotBetween, slot: Any) -> bool:
+    if _is_datetime(predicate.start) or _is_datetime(predicate.end):
+        # Slots are compared as timestamps, e.g. ISO strings from Airtable
+        slot = _timestamp(slot)
+        start = None if predicate.start is None else _timestamp(predicate.start)
+        end = None if predicate.end is None else _timestamp(predicate.end)
+    else:
+        start, end = predicate.start, predicate.end
+    return (start is None or slot >= start) and (end is None or slot <= end)
+
+
+def _filter_cells(values: pd.Series, keep) -> pd.Series:
+    # Cells are either scalars or lists, e.g. Airtable linked records
+    def filter_cell(cell):
+        if isinstance(cell, (list, tuple)):
+            return [v for v in cell if keep(v)]
+        return cell if keep(cell) else []
+
+    return values.map(filter_cell)
+
+
+def filter_frame(
+    df: pd.DataFrame,
+    where: Where,
+    subject_columns: Sequence[str] = (),
+    slot_column: Optional[str] = None,
+    created_column: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Apply the predicates of `where` to a backend table.
+
+    Parameters
+    ----------
+    df: pandas.DataFrame
+        Table as returned by a backend getter.
+    where: iterable of predicates
+           Predicates that must all hold.
+    subject_columns: list of str, default=()
+                     Columns, or the index name, with the subjects. Rows are kept only
+                     if all of them are in a `SubjectIn`.
+    slot_column: str, default=None
+                 Column with the slots. Slots out of `SlotIn` or `SlotBetween` are
+                 removed from list cells, and rows left without slots are dropped.
+    created_column: str, default=None
+                    Column with the creation time of the records. `CreatedAfter` is
+                    only checked if given.
+
+    Returns
+    -------
+    df: pandas.DataFrame
+        Filtered table.
+    """
+    for predicate in where or ():
+        if isinstance(predicate, SubjectIn):
+            subjects = set(predicate.subjects)
+            for column in subject_columns:
+                if column in df.columns:
+                    values = _filter_cells(df[column], subjects.__contains__)
+                    df = df.assign(**{column: values})
+                    df = df[values.map(lambda cell: cell != [])]
+                else:
+                    df = df[df.index.isin(subjects)]
+        elif isinstance(predicate, (SlotIn, SlotBetween)) and slot_column is not None:
+            if isinstance(predicate, SlotIn):
+                keep = set(predicate.slots).__contains__
+            else:
+                keep = partial(_slot_between, predicate)
+            values = _filter_cells(df[slot_column], keep)
+            df = df.assign(**{slot_column: values})
+            df = df[values.map(lambda cell: cell != [])]
+        elif isinstance(predicate, CreatedAfter) and created_column is not None:
+            created = pd.to_datetime(df[created_column], utc=True)
+            df = df[created > _timestamp(predicate.timestamp)]
+    return df
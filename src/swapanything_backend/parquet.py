@@ -0,0 +1,71 @@
+from typing import Annotated, List, Optional
+
+import pandas as pd
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from swapanything._compat import import_pyarrow
+
+from ._tabular import Condition, Table, TabularBackend
+
+
+class ParquetBackend(BaseSettings, TabularBackend):
+    """
+    Backend reading subjects, availabilities and exclusions from Parquet datasets.
+
+    Each path is a Parquet file or a directory of files. Only the needed columns are
+    read, files are memory-mapped by default, and `where` predicates are pushed down as
+    dataset filters, so that row groups out of their statistics are skipped.
+
+    Examples
+    --------
+    backend = ParquetBackend(
+        subject_features=["Interests", "Tags"],
+        availability_subject_column="subject",
+        availabilities_column="slot",
+        exclusions_subject_columns=["subject1", "subject2"],
+        subjects_path="data/subjects.parquet",
+        availabilities_path="data/availabilities/",
+        exclusions_path="data/matches.parquet",
+    )
+    """
+
+    subject_features: List[str]
+    availability_subject_column: str
+    availabilities_column: str
+    exclusions_subject_columns: Annotated[List[str], 2]
+
+    subjects_path: str
+    availabilities_path: str
+    exclusions_path: str
+    subject_id_column: str = "subject_id"
+    availability_id_column: Optional[str] = None
+    exclusion_id_column: Optional[str] = None
+    created_column: Optional[str] = None
+    memory_map: bool = True
+
+    model_config = SettingsConfigDict(case_sensitive=False, env_prefix="SWPPQ_")
+
+    def _read(
+        self, table: Table, columns: List[str], conditions: List[Condition]
+    ) -> pd.DataFrame:
+        pa = import_pyarrow("dataset", "parquet")
+        field = pa.dataset.field
+        expression = None
+        for kind, column, *values in conditions:
+            if kind == "in":
+                parts = [field(column).isin(list(values[0]))]
+            elif kind == "between":
+                start, end = values
+                parts = []
+                if start is not None:
+                    parts.append(field(column) >= start)
+                if end is not None:
+                    parts.append(field(column) <= end)
+            else:
+                parts = [field(column) > values[0]]
+            for part in parts:
+                expression = part if expression is None else expression & part
+
+        path = getattr(self, f"{table}_path")
+        return pa.parquet.read_table(
+            path, columns=columns, filters=expression, memory_map=self.memory_map
+        ).to_pandas()
@@ -0,0 +1,100 @@
+from typing import Annotated, Any, Callable, List, Optional
+
+import pandas as pd
+from pydantic import PrivateAttr
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from swapanything._compat import import_sqlalchemy
+
+from ._tabular import Condition, Table, TabularBackend
+
+
+class SQLBackend(BaseSettings, TabularBackend):
+    """
+    Backend reading subjects, availabilities and exclusions from SQL tables.
+
+    Connections come from a pooled SQLAlchemy engine, built from `url` or, for any
+    DB-API driver, from `url` and a `creator` returning new connections. Rows are
+    streamed with server-side cursors, `chunksize` at a time, where the driver
+    supports them. Projections and `where` predicates are compiled to the SELECT.
+
+    Examples
+    --------
+    backend = SQLBackend(
+        url="postgresql+psycopg2://user@host/db",
+        subject_features=["Interests", "Tags"],
+        availability_subject_column="subject",
+        availabilities_column="slot",
+        exclusions_subject_columns=["subject1", "subject2"],
+        subjects_table_name="subjects",
+        availabilities_table_name="availabilities",
+        exclusions_table_name="matches",
+    )
+    """
+
+    subject_features: List[str]
+    availability_subject_column: str
+    availabilities_column: str
+    exclusions_subject_columns: Annotated[List[str], 2]
+
+    subjects_table_name: str
+    availabilities_table_name: str
+    exclusions_table_name: str
+    subject_id_column: str = "subject_id"
+    availability_id_column: Optional[str] = None
+    exclusion_id_column: Optional[str] = None
+    created_column: Optional[str] = None
+
+    url: str
+    creator: Optional[Callable[[], Any]] = None
+    chunksize: int = 10_000
+
+    model_config = SettingsConfigDict(
+        case_sensitive=False, env_prefix="SWPSQL_", arbitrary_types_allowed=True
+    )
+
+    _engine: Any = PrivateAttr(default=None)
+
+    def _get_engine(self):
+        if self._engine is None:
+            sa = import_sqlalchemy()
+            options = {"creator": self.creator} if self.creator is not None else {}
+            self._engine = sa.create_engine(self.url, **options)
+        return self._engine
+
+    def _read(
+        self, table: Table, columns: List[str], conditions: List[Condition]
+    ) -> pd.DataFrame:
+        sa = import_sqlalchemy()
+        table_name = getattr(self, f"{table}_table_name")
+        condition_columns = [condition[1] for condition in conditions]
+        sql_table = sa.table(
+            table_name,
+            *(sa.column(c) for c in dict.fromkeys(columns + condition_columns)),
+        )
+
+        clauses = []
+        for kind, column, *values in conditions:
+            column = sql_table.c[column]
+            if kind == "in":
+                clauses.append(column.in_(values[0]))
+            elif kind == "between":
+                start, end = values
+                if start is not None:
+                    clauses.append(column >= start)
+                if end is not None:
+                    clauses.append(column <= end)
+            elif kind == "after":
+                clauses.append(column > values[0])
+        query = sa.select(*(sql_table.c[c] for c in columns)).where(*clauses)
+
+        with self._get_engine().connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, yield_per=self.chunksize
+            ).execute(query)
+            chunks = [
+                pd.DataFrame.from_records(rows, columns=columns)
+                for rows in result.partitions()
+            ]
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(chunks, ignore_index=True)
@@ -0,0 +1,114 @@
+import tracemalloc
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+from swapanything import prep
+
+SIZES = [100, 1_000, 10_000, 100_000]
+
+# Seeded synthetic datasets, fast enough for 100k subjects
+SUBJECT_COL = "subject"
+SLOT_COL = "slot"
+EXCLUSIONS_SUBJECT_COLUMNS = ("subject_1", "subject_2")
+
+
+class Dataset(NamedTuple):
+    availabilities: pd.DataFrame
+    exclusions: pd.DataFrame
+    matches: pd.DataFrame
+
+
+def _labels(prefix: str, codes: np.ndarray, n: int) -> np.ndarray:
+    width = len(str(n))
+    return np.array([f"{prefix}-{i:0{width}d}" for i in range(n)], dtype=object)[codes]
+
+
+def make_availabilities(
+    n_subjects: int,
+    n_slots: Optional[int] = None,
+    availabilities_per_subject: int = 3,
+    skew: float = 0.0,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Random availabilities, one row per subject and slot.
+
+    Each subject draws `availabilities_per_subject` slots, duplicates dropped. The
+    popularity of the slot of rank `r` is proportional to `1 / r ** skew`, so `skew=0`
+    is uniform and larger values concentrate subjects in a few slots. By default there
+    is one slot every 10 subjects.
+    """
+    rng = np.random.default_rng(seed)
+    n_slots = n_slots or max(n_subjects // 10, 2)
+    popularity = 1 / np.arange(1, n_slots + 1) ** skew
+    slots = rng.choice(
+        n_slots,
+        size=n_subjects * availabilities_per_subject,
+        p=popularity / popularity.sum(),
+    )
+    subjects = np.repeat(np.arange(n_subjects), availabilities_per_subject)
+    availabilities = pd.DataFrame(
+        {
+            SUBJECT_COL: _labels("subject", subjects, n_subjects),
+            SLOT_COL: _labels("slot", slots, n_slots),
+        }
+    )
+    return availabilities.drop_duplicates(ignore_index=True)
+
+
+def make_exclusions(
+    matches: pd.DataFrame, density: float = 0.05, seed: int = 0
+) -> pd.DataFrame:
+    """Exclude a random `density` fraction of the possible matches."""
+    rng = np.random.default_rng(seed)
+    excluded = rng.random(len(matches)) < density
+    pairs = matches.loc[excluded, SUBJECT_COL].tolist()
+    return pd.DataFrame(pairs, columns=list(EXCLUSIONS_SUBJECT_COLUMNS))
+
+
+@lru_cache(maxsize=2)
+def make_dataset(n_subjects: int, skew: float = 0.0, density: float = 0.05) -> Dataset:
+    """Availabilities, exclusions and the resulting matches, cached by parameters."""
+    availabilities = make_availabilities(n_subjects, skew=skew)
+    all_matches = prep.get_all_matches(
+        availabilities, subject_col=SUBJECT_COL, slot_col=SLOT_COL, engine="numpy"
+    )
+    exclusions = make_exclusions(all_matches, density=density)
+    matches = prep.apply_exclusions(
+        all_matches, exclusions, SUBJECT_COL, EXCLUSIONS_SUBJECT_COLUMNS
+    )
+    return Dataset(availabilities, exclusions, matches.reset_index(drop=True))
+
+
+@pytest.fixture(params=SIZES, ids=lambda n: f"{n}_subjects")
+def n_subjects(request) -> int:
+    return request.param
+
+
+@pytest.fixture
+def measure(benchmark, n_subjects):
+    """
+    Time `func` and record its peak memory.
+
+    A first untimed call under tracemalloc records the peak memory in the benchmark
+    extra info and warms up caches; the large sizes are then timed once.
+    """
+    benchmark.extra_info["n_subjects"] = n_subjects
+
+    def run(func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory_mib"] = peak / 2**20
+        rounds = 5 if n_subjects <= 1_000 else 1
+        return benchmark.pedantic(
+            func, args=args, kwargs=kwargs, rounds=rounds, iterations=1
+        )
+
+    return run
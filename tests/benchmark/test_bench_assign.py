@@ -0,0 +1,17 @@
+import pytest
+from swapanything import assign, select
+
+from .conftest import SLOT_COL, SUBJECT_COL, make_dataset
+
+
+@pytest.mark.benchmark(group="assign_slots")
+@pytest.mark.parametrize("capacity", [None, 5])
+def test_assign_slots(measure, n_subjects, capacity):
+    dataset = make_dataset(n_subjects)
+    selected = select.select_matches(
+        dataset.matches,
+        subjects_col=SUBJECT_COL,
+        slots_col=SLOT_COL,
+        algorithm="greedy",
+    )
+    measure(assign.assign_slots, selected, SLOT_COL, capacity)
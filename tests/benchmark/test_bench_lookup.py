@@ -0,0 +1,13 @@
+import pytest
+from swapanything import lookup
+
+from .conftest import SLOT_COL, SUBJECT_COL, make_dataset
+
+
+@pytest.mark.benchmark(group="candidates_for")
+def test_candidates_for(benchmark, n_subjects):
+    benchmark.extra_info["n_subjects"] = n_subjects
+    availabilities = make_dataset(n_subjects).availabilities
+    index = lookup.CandidateIndex(availabilities, SUBJECT_COL, SLOT_COL)
+    subject = availabilities[SUBJECT_COL].iloc[0]
+    benchmark(index.candidates_for, subject)
@@ -0,0 +1,76 @@
+import pytest
+from swapanything import prep
+
+from .conftest import EXCLUSIONS_SUBJECT_COLUMNS, SLOT_COL, SUBJECT_COL, make_dataset
+
+
+@pytest.mark.benchmark(group="get_matching_subjects_by_slot")
+def test_get_matching_subjects_by_slot(measure, n_subjects):
+    dataset = make_dataset(n_subjects)
+    measure(
+        prep.get_matching_subjects_by_slot,
+        dataset.availabilities,
+        slot_col=SLOT_COL,
+        subject_col=SUBJECT_COL,
+    )
+
+
+@pytest.mark.benchmark(group="get_matches_from_slots")
+def test_get_matches_from_slots(measure, n_subjects):
+    dataset = make_dataset(n_subjects)
+    matching_subjects_by_slot = prep.get_matching_subjects_by_slot(
+        dataset.availabilities, slot_col=SLOT_COL, subject_col=SUBJECT_COL
+    )
+    measure(
+        prep.get_matches_from_slots,
+        matching_subjects_by_slot,
+        slot_col=SLOT_COL,
+        subject_col=SUBJECT_COL,
+    )
+
+
+@pytest.mark.benchmark(group="apply_exclusions")
+@pytest.mark.parametrize("indexed", [False, True], ids=["frame", "index"])
+def test_apply_exclusions(measure, n_subjects, indexed):
+    dataset = make_dataset(n_subjects)
+    exclusions = dataset.exclusions
+    if indexed:
+        exclusions = prep.ExclusionIndex(exclusions, EXCLUSIONS_SUBJECT_COLUMNS)
+    measure(
+        prep.apply_exclusions,
+        dataset.matches,
+        exclusions,
+        subject_col=SUBJECT_COL,
+        exclusions_subject_columns=EXCLUSIONS_SUBJECT_COLUMNS,
+    )
+
+
+@pytest.mark.benchmark(group="get_all_matches")
+@pytest.mark.parametrize("engine", ["pandas", "numpy", "sparse", "bitset"])
+def test_get_all_matches(measure, n_subjects, engine):
+    if engine == "sparse":
+        pytest.importorskip("scipy")
+    dataset = make_dataset(n_subjects)
+    measure(
+        prep.get_all_matches,
+        dataset.availabilities,
+        subject_col=SUBJECT_COL,
+        slot_col=SLOT_COL,
+        exclusions=dataset.exclusions,
+        exclusions_subject_columns=EXCLUSIONS_SUBJECT_COLUMNS,
+        engine=engine,
+    )
+
+
+@pytest.mark.benchmark(group="get_all_matches-skew")
+@pytest.mark.parametrize("skew", [0.0, 0.5, 0.8])
+@pytest.mark.parametrize("n_subjects", [10_000], ids=["10000_subjects"])
+def test_get_all_matches_skew(measure, n_subjects, skew):
+    dataset = make_dataset(n_subjects, skew=skew)
+    measure(
+        prep.get_all_matches,
+        dataset.availabilities,
+        subject_col=SUBJECT_COL,
+        slot_col=SLOT_COL,
+        engine="numpy",
+    )
@@ -0,0 +1,46 @@
+import pytest
+from swapanything import prep, select
+from unit_test.swapanything_test.test_large_data import (  # noqa: F401
+    get_large_datasets,
+)
+
+from .conftest import SLOT_COL, SUBJECT_COL, make_dataset
+
+
+@pytest.mark.benchmark(group="select_matches")
+@pytest.mark.parametrize(
+    "algorithm", ["networkx", "blossom-fast", "greedy", "path-growing"]
+)
+def test_select_matches(measure, n_subjects, algorithm):
+    if algorithm == "networkx" and n_subjects > 10_000:
+        pytest.skip("networkx is too slow at this size")
+    dataset = make_dataset(n_subjects)
+    measure(
+        select.select_matches,
+        dataset.matches,
+        subjects_col=SUBJECT_COL,
+        slots_col=SLOT_COL,
+        algorithm=algorithm,
+    )
+
+
+@pytest.mark.benchmark(group="select_matches_backends")
+@pytest.mark.parametrize("algorithm", ["networkx", "blossom-fast", "greedy"])
+def test_select_matches_large_dataset(
+    benchmark,
+    get_large_datasets,  # noqa: F811
+    algorithm,
+):
+    """Time a backend on the synthetic data of the unit tests, against networkx."""
+    _, availabilities, _ = get_large_datasets
+    matches = prep.get_all_matches(
+        availabilities, subject_col="Index", slot_col="Availabilities"
+    )
+    kwargs = {"subjects_col": "Index", "slots_col": "Availabilities"}
+    expected = select.select_matches(matches, **kwargs, algorithm="networkx")
+    selected = benchmark(select.select_matches, matches, **kwargs, algorithm=algorithm)
+    assert selected["Index"].is_unique
+    if algorithm == "greedy":
+        assert len(selected) <= len(expected)
+    else:
+        assert len(selected) == len(expected)
@@ -0,0 +1,23 @@
+import pytest
+from swapanything import trace
+
+
+def _spans(n: int) -> None:
+    for _ in range(n):
+        with trace.span("stage") as s:
+            s.rows_out = 1
+
+
+@pytest.mark.benchmark(group="trace")
+@pytest.mark.parametrize("traced", [False, True], ids=["disabled", "enabled"])
+def test_span_overhead(benchmark, traced):
+    """Cost of 10k spans, without a tracer and with one recording in memory."""
+    if not traced:
+        benchmark(_spans, 10_000)
+        return
+
+    def run():
+        with trace.Tracer():
+            _spans(10_000)
+
+    benchmark(run)
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+import pytest
+
+__here__ = Path(__file__).parent
+__benchmarks__ = __here__ / "benchmark"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-benchmarks",
+        action="store_true",
+        default=False,
+        help="run the benchmark suite in tests/benchmark",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-benchmarks"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --run-benchmarks")
+    for item in items:
+        if __benchmarks__ in item.path.parents:
+            item.add_marker(skip)
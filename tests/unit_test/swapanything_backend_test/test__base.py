@@ -1,6 +1,6 @@
 import pandas as pd
 import pytest
-from swapanything_backend import _base
+from swapanything_backend import _base, filters
 
 
 def test_incomplete_base_backend():
@@ -41,3 +41,60 @@ def test_base_backend():
             return
 
     TestBackend()
+
+
+class FrameBackend(_base.BackendBase):
+    def __init__(self) -> None:
+        self.subject_features = ["a"]
+        self.availability_subject_column = "subj"
+        self.availabilities_column = "avail"
+        self.exclusions_subject_columns = ["s1", "s2"]
+
+    def get_subjects(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"a": [1, 2, 3]},
+            index=pd.Index(["sub1", "sub2", "sub3"], name="subject_id"),
+        )
+
+    def get_availabilities(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "subject_id": [["sub1"], ["sub2"], ["sub3"]],
+                "availabilities": [["A", "B"], ["B", "C"], ["C"]],
+            },
+            index=pd.Index(["av1", "av2", "av3"], name="availability_id"),
+        )
+
+    def get_exclusions(self) -> pd.DataFrame:
+        return pd.DataFrame({"s1": [["sub1"], ["sub2"]], "s2": [["sub2"], ["sub3"]]})
+
+
+def test_base_backend_load_all():
+    backend = FrameBackend()
+    tables = backend.load_all()
+    assert isinstance(tables, _base.Tables)
+    assert tables.subjects.equals(backend.get_subjects())
+    assert tables.availabilities.equals(backend.get_availabilities())
+    assert tables.exclusions.equals(backend.get_exclusions())
+
+
+def test_base_backend_load_all_where():
+    where = [filters.SubjectIn(["sub1", "sub2"]), filters.SlotIn(["B", "C"])]
+    tables = FrameBackend().load_all(where=where)
+    assert tables.subjects.index.tolist() == ["sub1", "sub2"]
+    assert tables.availabilities.to_dict("list") == {
+        "subject_id": [["sub1"], ["sub2"]],
+        "availabilities": [["B"], ["B", "C"]],
+    }
+    assert tables.exclusions.to_dict("list") == {"s1": [["sub1"]], "s2": [["sub2"]]}
+
+
+def test_pair_key():
+    assert _base.pair_key(("b", "a")) == _base.pair_key(["a", "b"]) == ("a", "b")
+    # Same order as the matching stages, not as strings
+    assert _base.pair_key((10, 9)) == (9, 10)
+
+
+def test_base_backend_read_only():
+    with pytest.raises(_base.BackendError, match="does not support writes"):
+        FrameBackend().append_exclusions([("sub1", "sub2")])
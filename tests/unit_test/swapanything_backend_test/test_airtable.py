@@ -1,10 +1,16 @@
+import json
 import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import List
 from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlparse
 
 import pandas as pd
 import pytest
 from swapanything_backend import airtable as be
+from swapanything_backend import filters
 
 
 @pytest.fixture
@@ -189,3 +195,386 @@ def test_get_exclustions(
     )
     assert set(df.columns) == set(EXCLUSOIONS_SUBJECT_COLUMNS)
     assert df.equals(EXCLUSIONS_DF)
+
+
+@pytest.fixture
+def airtable_server(
+    CLEAN_SUBJECTS_RECORDS: List[dict],
+    CLEAN_AVAILABILITIES_RECORDS: List[dict],
+    CLEAN_EXCLUSIONS_RECORDS: List[dict],
+    SUBJECTS_TABLE_NAME: str,
+    AVAILABILITIES_TABLE_NAME: str,
+    EXCLUSIONS_TABLE_NAME: str,
+    BASE_ID: str,
+    API_KEY: str,
+):
+    """
+    Local stub of the Airtable API, serving the records 2 by 2.
+
+    Writes are applied to the tables, after answering 429 to the first one.
+    """
+    PAGE_SIZE = 2
+    tables = {
+        SUBJECTS_TABLE_NAME: CLEAN_SUBJECTS_RECORDS,
+        AVAILABILITIES_TABLE_NAME: CLEAN_AVAILABILITIES_RECORDS,
+        EXCLUSIONS_TABLE_NAME: CLEAN_EXCLUSIONS_RECORDS,
+    }
+    tables = {name: [dict(r) for r in records] for name, records in tables.items()}
+    requests = []
+    writes = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _write(self):
+            _, version, base_id, table_name = urlparse(self.path).path.split("/")
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                writes.append((self.command, table_name, body))
+                if len(writes) == 1:
+                    return self._send(429, {"errors": [{"error": "RATE_LIMIT"}]})
+                records = tables[table_name]
+                written = []
+                for record in body["records"]:
+                    if "id" in record:
+                        [stored] = [r for r in records if r["id"] == record["id"]]
+                        stored["fields"] = {**stored["fields"], **record["fields"]}
+                    else:
+                        stored = {
+                            "id": f"rec{len(records):03d}new",
+                            "createdTime": "2023-06-09T13:33:11.000Z",
+                            "fields": record["fields"],
+                        }
+                        records.append(stored)
+                    written.append(stored)
+            self._send(200, {"records": written})
+
+        do_POST = _write
+        do_PATCH = _write
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            _, version, base_id, table_name = url.path.split("/")
+            query = parse_qs(url.query)
+            requests.append((time.monotonic(), table_name, query))
+            assert (version, base_id) == ("v0", BASE_ID)
+            assert self.headers["Authorization"] == f"Bearer {API_KEY}"
+
+            offset = int(query.get("offset", ["0"])[0])
+            records = tables[table_name][offset : offset + PAGE_SIZE]
+            body = {"records": records}
+            if offset + PAGE_SIZE < len(tables[table_name]):
+                body["offset"] = str(offset + PAGE_SIZE)
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.requests = requests
+    server.writes = writes
+    server.tables = tables
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_token_bucket():
+    bucket = be.TokenBucket(rate=50)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 5 / 50
+
+
+def test_load_all(
+    airtable_server,
+    airtable_backend: be.AirTableBackend,
+    SUBJECTS_DF: pd.DataFrame,
+    AVAILABILITIES_DF: pd.DataFrame,
+    EXCLUSIONS_DF: pd.DataFrame,
+    SUBJECT_FEATURES: List[str],
+):
+    host, port = airtable_server.server_address
+    airtable_backend.endpoint_url = f"http://{host}:{port}"
+    airtable_backend.requests_per_second = 20
+
+    tables = airtable_backend.load_all()
+    assert tables.subjects.equals(SUBJECTS_DF)
+    assert tables.availabilities.equals(AVAILABILITIES_DF)
+    assert tables.exclusions.equals(EXCLUSIONS_DF)
+
+    # All pages were fetched, with the selected fields, over one shared session
+    n_pages = sum(
+        -(-len(df) // 2) for df in (SUBJECTS_DF, AVAILABILITIES_DF, EXCLUSIONS_DF)
+    )
+    assert len(airtable_server.requests) == n_pages
+    assert all(
+        query["fields[]"] == ["recID", *SUBJECT_FEATURES]
+        for _, table_name, query in airtable_server.requests
+        if table_name == airtable_backend.subjects_table_name
+    )
+    assert airtable_backend._get_api() is airtable_backend._get_api()
+
+    # Requests are spaced by the per-base token bucket
+    times = sorted(t for t, _, _ in airtable_server.requests)
+    assert times[-1] - times[0] >= (n_pages - 1) / 20 * 0.8
+
+
+def test_load_all_single_api(
+    airtable_server,
+    airtable_backend: be.AirTableBackend,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    host, port = airtable_server.server_address
+    airtable_backend.endpoint_url = f"http://{host}:{port}"
+    airtable_backend.requests_per_second = 100
+
+    constructions = []
+
+    class CountingApi(be.RateLimitedApi):
+        def __init__(self, *args, **kwargs):
+            constructions.append(threading.get_ident())
+            # Widen the race between the loader threads
+            time.sleep(0.05)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(be, "RateLimitedApi", CountingApi)
+    airtable_backend.load_all()
+    airtable_backend.load_all()
+    assert len(constructions) == 1
+
+
+def test_load_all_single_cache(
+    airtable_server,
+    airtable_backend: be.AirTableBackend,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path,
+):
+    host, port = airtable_server.server_address
+    airtable_backend.endpoint_url = f"http://{host}:{port}"
+    airtable_backend.requests_per_second = 100
+    airtable_backend.cache_path = str(tmp_path / "cache.sqlite")
+
+    constructions = []
+
+    class CountingCache(be.SnapshotCache):
+        def __init__(self, *args, **kwargs):
+            constructions.append(threading.get_ident())
+            time.sleep(0.05)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(be, "SnapshotCache", CountingCache)
+    airtable_backend.load_all()
+    airtable_backend.load_all()
+    assert len(constructions) == 1
+
+
+def test_load_all_traced(airtable_server, airtable_backend: be.AirTableBackend):
+    from swapanything import trace
+
+    host, port = airtable_server.server_address
+    airtable_backend.endpoint_url = f"http://{host}:{port}"
+    airtable_backend.requests_per_second = 100
+
+    with trace.Tracer() as tracer:
+        tables = airtable_backend.load_all()
+
+    # Fetches run in the loader threads, decodes in the calling one
+    spans = tracer.report()
+    fetches = spans[spans["name"] == "backend.fetch"]
+    assert sorted(fetches["rows_out"]) == sorted(len(table) for table in tables)
+    assert spans["name"].value_counts()["backend.decode"] == 3
+
+
+def test_write_matches(
+    airtable_server,
+    airtable_backend: be.AirTableBackend,
+    EXCLUSIONS_TABLE_NAME: str,
+    EXCLUSOIONS_SUBJECT_COLUMNS: List[str],
+):
+    host, port = airtable_server.server_address
+    airtable_backend.endpoint_url = f"http://{host}:{port}"
+    airtable_backend.requests_per_second = 100
+    airtable_backend.exclusions_slot_column = "slots"
+    subj1, subj2 = EXCLUSOIONS_SUBJECT_COLUMNS
+
+    selected = pd.DataFrame(
+        {
+            "subject": [("rec002", "rec001")]
+            + [(f"rec1{i:02d}", f"rec2{i:02d}") for i in range(12)],
+            "slot": [("10:00",)] * 13,
+        }
+    )
+    airtable_backend.write_matches(selected, "subject", "slot")
+
+    # The 429 was retried, the known pair was updated, the new ones created in
+    # batches of 10
+    commands = [command for command, _, _ in airtable_server.writes]
+    assert len(commands) == 1 + 3
+    assert set(commands) == {"PATCH", "POST"}
+    assert all(len(body["records"]) <= 10 for _, _, body in airtable_server.writes)
+    records = airtable_server.tables[EXCLUSIONS_TABLE_NAME]
+    assert len(records) == 13
+    assert records[0]["fields"][subj1] == ["rec001"]
+    assert records[0]["fields"]["slots"] == ["10:00"]
+
+    # Writing the same matches again does not duplicate them
+    airtable_backend.write_matches(selected, "subject", "slot")
+    airtable_backend.append_exclusions([("rec200", "rec100"), ("rec300", "rec301")])
+    records = airtable_server.tables[EXCLUSIONS_TABLE_NAME]
+    assert len(records) == 14
+    assert records[-1]["fields"] == {subj1: ["rec300"], subj2: ["rec301"]}
+
+
+def test_get_subjects_cached(
+    airtable_backend: be.AirTableBackend,
+    mock_airtable: MagicMock,
+    SUBJECT_FEATURES: List[str],
+    SUBJECTS_DF: pd.DataFrame,
+    tmp_path,
+):
+    airtable_backend.cache_path = str(tmp_path / "cache.sqlite")
+    assert airtable_backend.get_subjects().equals(SUBJECTS_DF)
+    mock_airtable.all.assert_called_once_with(
+        fields=["recID"] + SUBJECT_FEATURES, formula=None
+    )
+
+    # Only the changes since the last sync, and the record ids, are downloaded.
+    # Snapshots hold the last version of each record, the fixture repeats one.
+    SUBJECTS_DF = SUBJECTS_DF[~SUBJECTS_DF.index.duplicated(keep="last")]
+    assert airtable_backend.get_subjects().equals(SUBJECTS_DF)
+    delta_call, ids_call = mock_airtable.all.call_args_list[1:]
+    assert "LAST_MODIFIED_TIME()" in delta_call.kwargs["formula"]
+    assert ids_call.kwargs == {"fields": ["recID"], "formula": None}
+
+    airtable_backend.offline = True
+    assert airtable_backend.get_subjects().equals(SUBJECTS_DF)
+    assert mock_airtable.all.call_count == 3
+
+
+@pytest.mark.parametrize("validate", ["full", "schema", "none"])
+def test_records_to_pandas(validate: str, CLEAN_AVAILABILITIES_RECORDS: List[dict]):
+    df = be.records_to_pandas(CLEAN_AVAILABILITIES_RECORDS, validate=validate)
+    expected = pd.DataFrame(r["fields"] for r in CLEAN_AVAILABILITIES_RECORDS)
+    assert df.equals(expected)
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        {"id": "rec1", "createdTime": "2999-01-01T00:00:00.000Z", "fields": {}},
+        {"id": "rec1", "createdTime": "not a date", "fields": {}},
+        {"createdTime": "2023-06-09T13:33:11.000Z", "fields": {}},
+    ],
+)
+def test_records_to_pandas_schema_errors(
+    record: dict, CLEAN_AVAILABILITIES_RECORDS: List[dict]
+):
+    # Invalid records after the first one of the page are caught as well
+    records = [CLEAN_AVAILABILITIES_RECORDS[0], record]
+    with pytest.raises(ValueError):
+        be.records_to_pandas(records, validate="schema")
+    be.records_to_pandas(records[:1] + records[:1], validate="schema")
+    with pytest.raises(ValueError, match="Unknown validation"):
+        be.records_to_pandas(records, validate="partial")
+
+
+def test_get_availabilities_validate(
+    airtable_backend: be.AirTableBackend,
+    AVAILABILITIES_DF: pd.DataFrame,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    assert airtable_backend.validation == "full"
+    settings = airtable_backend.model_dump(
+        exclude={"client_id", "client_secret", "validation"}
+    )
+    monkeypatch.setenv("SWPAT_VALIDATE", "none")
+    backend = be.AirTableBackend(**settings)
+    assert backend.validation == "none"
+    assert backend.get_availabilities().equals(AVAILABILITIES_DF)
+
+    backend = be.AirTableBackend(**settings, validate="schema")
+    assert backend.validation == "schema"
+    assert backend.get_availabilities().equals(AVAILABILITIES_DF)
+
+    # Only the prefixed variable is read from the environment
+    monkeypatch.delenv("SWPAT_VALIDATE")
+    monkeypatch.setenv("VALIDATE", "none")
+    assert be.AirTableBackend(**settings).validation == "full"
+
+
+def test_compile_formula():
+    assert be.compile_formula(None) is None
+    assert be.compile_formula([], "{x}=1") == "{x}=1"
+    where = [
+        filters.SubjectIn(["rec1", "rec'2"]),
+        filters.SlotIn(["A"]),
+        filters.SlotBetween(start="A"),
+        filters.CreatedAfter("2023-06-09T15:30:00+02:00"),
+    ]
+    assert be.compile_formula(where, subject_fields=[None]) == (
+        "AND(OR(RECORD_ID()='rec1',RECORD_ID()='rec\\'2'),"
+        "IS_AFTER(CREATED_TIME(), DATETIME_PARSE('2023-06-09T13:30:00.000Z')))"
+    )
+    assert be.compile_formula(
+        where, "{x}=1", subject_fields=["subj"], slot_field="avail"
+    ) == (
+        "AND({x}=1,"
+        "OR(FIND('rec1', ({subj} & '')),FIND('rec\\'2', ({subj} & ''))),"
+        "OR(FIND('A', ({avail} & ''))),"
+        "IS_AFTER(CREATED_TIME(), DATETIME_PARSE('2023-06-09T13:30:00.000Z')))"
+    )
+    assert be.compile_formula([filters.SubjectIn([])], subject_fields=[None]) == (
+        "FALSE()"
+    )
+
+
+def test_get_availabilities_where(
+    airtable_backend: be.AirTableBackend,
+    mock_airtable: MagicMock,
+    AVAILABILITIES_DF: pd.DataFrame,
+):
+    where = [
+        filters.SubjectIn(["rec001", "rec003"]),
+        filters.SlotBetween(end=pd.Timestamp("2023-06-09T13:15:00Z")),
+    ]
+    df = airtable_backend.get_availabilities(where=where)
+    formula = mock_airtable.all.call_args.kwargs["formula"]
+    assert formula.startswith("OR(FIND('rec001'")
+
+    # The stub ignores the formula, the filters are enforced after the download
+    assert df.to_dict("list") == {
+        "subject_id": [["rec001"]],
+        "availabilities": [["2023-06-09T13:00:00.000Z", "2023-06-09T13:15:00.000Z"]],
+    }
+    assert df.index.tolist() == AVAILABILITIES_DF.index[:1].tolist()
+
+
+def test_get_subjects_columns(
+    airtable_backend: be.AirTableBackend,
+    mock_airtable: MagicMock,
+    SUBJECT_FEATURES: List[str],
+):
+    airtable_backend.get_subjects(columns=SUBJECT_FEATURES[:2])
+    mock_airtable.all.assert_called_once_with(
+        fields=["recID", *SUBJECT_FEATURES[:2]], formula=None
+    )
+    with pytest.raises(ValueError, match="subset of subject_features"):
+        airtable_backend.get_subjects(columns=["unknown"])
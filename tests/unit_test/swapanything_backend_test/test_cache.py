@@ -0,0 +1,117 @@
+import re
+from datetime import datetime
+from typing import List, Optional
+from unittest.mock import MagicMock
+
+import pytest
+from swapanything_backend import cache as ca
+from swapanything_backend._base import BackendError
+
+
+class FakeTable:
+    """In-memory Airtable table understanding `modified_since_formula`."""
+
+    def __init__(self, records: List[dict]) -> None:
+        self.records = {r["id"]: (r, 0.0) for r in records}
+        self.calls = []
+
+    def update(self, record: dict, modified: float) -> None:
+        self.records[record["id"]] = (record, modified)
+
+    def all(self, table_name: str, fields: Optional[List[str]], formula: Optional[str]):
+        self.calls.append((fields, formula))
+        since = re.search(r"DATETIME_PARSE\('(.*)'\)", formula or "")
+        since = datetime.fromisoformat(since.group(1)).timestamp() if since else None
+        return [
+            {**r, "fields": {k: v for k, v in r["fields"].items() if k in fields}}
+            for r, modified in self.records.values()
+            if since is None or modified > since
+        ]
+
+
+def _record(record_id: str, name: str) -> dict:
+    return {
+        "id": record_id,
+        "createdTime": "2023-06-09T13:33:11.000Z",
+        "fields": {"recID": record_id, "name": name},
+    }
+
+
+@pytest.fixture
+def fake_table() -> FakeTable:
+    return FakeTable([_record("rec1", "a"), _record("rec2", "b"), _record("rec3", "c")])
+
+
+def test_modified_since_formula():
+    assert ca.modified_since_formula(0) == (
+        "IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('1970-01-01T00:00:00.000Z'))"
+    )
+    assert ca.modified_since_formula(0, "{x}=1").startswith("AND({x}=1, IS_AFTER(")
+
+
+def test_snapshot_cache_delta_sync(fake_table: FakeTable, tmp_path, monkeypatch):
+    clock = MagicMock(return_value=1_000_000.0)
+    monkeypatch.setattr(ca.time, "time", clock)
+    cache = ca.SnapshotCache(tmp_path / "cache.sqlite", sync_overlap=10)
+    fields = ["recID", "name"]
+
+    records = cache.get_records("base", "t", fake_table.all, fields=fields)
+    assert [r["id"] for r in records] == ["rec1", "rec2", "rec3"]
+    assert fake_table.calls == [(fields, None)]
+
+    # One record updated, one deleted, one created
+    clock.return_value = 1_000_100.0
+    fake_table.update(_record("rec2", "B"), modified=1_000_050.0)
+    fake_table.update(_record("rec4", "d"), modified=1_000_060.0)
+    del fake_table.records["rec3"]
+
+    records = cache.get_records("base", "t", fake_table.all, fields=fields)
+    assert records == [_record("rec1", "a"), _record("rec2", "B"), _record("rec4", "d")]
+    delta_formula = ca.modified_since_formula(1_000_000.0 - 10)
+    assert fake_table.calls[1:] == [(fields, delta_formula), (["recID"], None)]
+
+    # Served from the snapshot, without calling Airtable
+    fake_table.calls.clear()
+    offline = cache.get_records(
+        "base", "t", fake_table.all, fields=fields, offline=True
+    )
+    assert offline == records
+    assert fake_table.calls == []
+
+
+def test_snapshot_cache_keys(fake_table: FakeTable, tmp_path):
+    cache = ca.SnapshotCache(tmp_path / "cache.sqlite")
+    cache.get_records("base", "t", fake_table.all, fields=["recID"])
+    cache.get_records("base", "t", fake_table.all, fields=["recID"], formula="{x}")
+    assert fake_table.calls == [(["recID"], None), (["recID"], "{x}")]
+    with pytest.raises(BackendError, match="No offline snapshot"):
+        cache.get_records("base", "t", fake_table.all, fields=["name"], offline=True)
+
+
+def test_snapshot_cache_ttl(fake_table: FakeTable, tmp_path, monkeypatch):
+    clock = MagicMock(return_value=1_000_000.0)
+    monkeypatch.setattr(ca.time, "time", clock)
+    cache = ca.SnapshotCache(tmp_path / "cache.sqlite", ttl=60)
+    cache.get_records("base", "t", fake_table.all, fields=["recID"])
+    clock.return_value += 61
+    cache.get_records("base", "t", fake_table.all, fields=["recID"])
+    # Downloaded again from scratch
+    assert fake_table.calls == [(["recID"], None), (["recID"], None)]
+
+
+def test_snapshot_cache_max_size(fake_table: FakeTable, tmp_path):
+    cache = ca.SnapshotCache(tmp_path / "cache.sqlite")
+    cache.get_records("base", "t1", fake_table.all, fields=["recID", "name"])
+    one_table = cache.size()
+    assert one_table > 0
+
+    cache.max_size = int(one_table * 1.5)
+    cache.get_records("base", "t2", fake_table.all, fields=["recID", "name"])
+    assert cache.size() == one_table
+    # t1 was the least recently used
+    with pytest.raises(BackendError):
+        cache.get_records("base", "t1", fake_table.all, ["recID", "name"], offline=True)
+    cache.get_records("base", "t2", fake_table.all, ["recID", "name"], offline=True)
+
+    cache.evict()
+    assert cache.size() == 0
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+from swapanything_backend import filters as fl
+
+
+def test_predicates_are_hashable():
+    assert fl.SubjectIn(["a", "b"]) == fl.SubjectIn(("a", "b"))
+    assert len({fl.SlotIn(["A"]), fl.SlotIn(("A",))}) == 1
+
+
+def test_filter_frame_scalars():
+    df = pd.DataFrame(
+        {
+            "subj": ["a", "b", "c", "d"],
+            "slot": [1, 2, 3, 4],
+            "created": ["2023-01-01", "2023-02-01", "2023-03-01", "2023-04-01"],
+        }
+    )
+    where = [fl.SubjectIn(["a", "b", "c"]), fl.SlotBetween(start=2)]
+    result = fl.filter_frame(df, where, subject_columns=["subj"], slot_column="slot")
+    assert result["subj"].tolist() == ["b", "c"]
+
+    where = [fl.CreatedAfter(datetime(2023, 2, 15, tzinfo=timezone.utc))]
+    assert fl.filter_frame(df, where).equals(df)
+    result = fl.filter_frame(df, where, created_column="created")
+    assert result["subj"].tolist() == ["c", "d"]
+    assert fl.filter_frame(df, None, subject_columns=["subj"]).equals(df)
+
+
+def test_filter_frame_lists():
+    df = pd.DataFrame(
+        {
+            "subject_id": [["rec1"], ["rec2"], ["rec3"]],
+            "availabilities": [
+                ["2023-06-09T13:00:00.000Z", "2023-06-10T12:00:00.000Z"],
+                ["2023-06-11T13:00:00.000Z"],
+                ["2023-06-09T15:00:00.000Z"],
+            ],
+        },
+        index=pd.Index(["av1", "av2", "av3"], name="availability_id"),
+    )
+    # Slots are compared as timestamps when the bounds are datetimes
+    where = [
+        fl.SlotBetween(
+            start=datetime(2023, 6, 9, 14), end=pd.Timestamp("2023-06-10T23:00Z")
+        )
+    ]
+    result = fl.filter_frame(df, where, slot_column="availabilities")
+    assert result.to_dict("list") == {
+        "subject_id": [["rec1"], ["rec3"]],
+        "availabilities": [["2023-06-10T12:00:00.000Z"], ["2023-06-09T15:00:00.000Z"]],
+    }
+
+    where = [fl.SubjectIn(["rec2"]), fl.SlotIn(["2023-06-11T13:00:00.000Z"])]
+    result = fl.filter_frame(
+        df, where, subject_columns=["subject_id"], slot_column="availabilities"
+    )
+    assert result.index.tolist() == ["av2"]
+
+    # The index is used when it holds the subjects
+    subjects = pd.DataFrame({"a": [1, 2]}, index=pd.Index(["rec1", "rec2"]))
+    result = fl.filter_frame(subjects, [fl.SubjectIn(["rec2"])], ["subject_id"])
+    assert result.index.tolist() == ["rec2"]
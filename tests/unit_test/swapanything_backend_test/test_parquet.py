@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+from swapanything_backend import filters
+from swapanything_backend.parquet import ParquetBackend
+
+pytest.importorskip("pyarrow", exc_type=ImportError)
+
+SUBJECTS = pd.DataFrame(
+    {"id": ["s1", "s2", "s3"], "Interests": ["a", "b", "c"], "Tags": ["x", "y", "z"]}
+)
+AVAILABILITIES = pd.DataFrame(
+    {"subject": ["s1", "s1", "s2", "s3"], "slot": [1, 2, 1, 3]}
+)
+EXCLUSIONS = pd.DataFrame({"subject1": ["s1"], "subject2": ["s2"]})
+
+
+@pytest.fixture
+def parquet_backend(tmp_path):
+    SUBJECTS.to_parquet(tmp_path / "subjects.parquet", index=False)
+    (tmp_path / "availabilities").mkdir()
+    AVAILABILITIES.iloc[:2].to_parquet(tmp_path / "availabilities" / "0.parquet")
+    AVAILABILITIES.iloc[2:].to_parquet(tmp_path / "availabilities" / "1.parquet")
+    EXCLUSIONS.to_parquet(tmp_path / "matches.parquet", index=False)
+    return ParquetBackend(
+        subject_features=["Interests", "Tags"],
+        availability_subject_column="subject",
+        availabilities_column="slot",
+        exclusions_subject_columns=["subject1", "subject2"],
+        subjects_path=str(tmp_path / "subjects.parquet"),
+        availabilities_path=str(tmp_path / "availabilities"),
+        exclusions_path=str(tmp_path / "matches.parquet"),
+        subject_id_column="id",
+    )
+
+
+def test_get_subjects(parquet_backend):
+    subjects = parquet_backend.get_subjects()
+    expected = SUBJECTS.rename(columns={"id": "subject_id"}).set_index("subject_id")
+    pd.testing.assert_frame_equal(subjects, expected)
+
+    subjects = parquet_backend.get_subjects(
+        where=[filters.SubjectIn(["s2"])], columns=["Tags"]
+    )
+    assert subjects.index.tolist() == ["s2"]
+    assert subjects.columns.tolist() == ["Tags"]
+
+
+def test_get_availabilities(parquet_backend):
+    availabilities = parquet_backend.get_availabilities()
+    assert availabilities.columns.tolist() == ["subject_id", "availabilities"]
+    assert len(availabilities) == 4
+
+    availabilities = parquet_backend.get_availabilities(
+        where=[filters.SlotBetween(2, 3), filters.SubjectIn(["s1", "s3"])]
+    )
+    assert availabilities["subject_id"].tolist() == ["s1", "s3"]
+
+
+def test_get_exclusions(parquet_backend):
+    exclusions = parquet_backend.get_exclusions()
+    assert exclusions[["subject1", "subject2"]].values.tolist() == [["s1", "s2"]]
+    assert parquet_backend.get_exclusions(where=[filters.SubjectIn(["s1"])]).empty
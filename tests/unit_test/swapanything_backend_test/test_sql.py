@@ -0,0 +1,106 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+from swapanything_backend import filters
+from swapanything_backend.sql import SQLBackend
+
+pytest.importorskip("sqlalchemy")
+
+SUBJECTS = pd.DataFrame(
+    {"id": ["s1", "s2", "s3"], "Interests": ["a", "b", "c"], "Tags": ["x", "y", "z"]}
+)
+AVAILABILITIES = pd.DataFrame(
+    {
+        "avail_id": [1, 2, 3, 4],
+        "subject": ["s1", "s1", "s2", "s3"],
+        "slot": ["2023-01-01", "2023-01-02", "2023-01-01", "2023-01-03"],
+        "created": ["2022-12-01", "2022-12-02", "2022-12-03", "2022-12-04"],
+    }
+)
+EXCLUSIONS = pd.DataFrame({"subject1": ["s1"], "subject2": ["s2"]})
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "swap.sqlite"
+    with sqlite3.connect(path) as conn:
+        SUBJECTS.to_sql("subjects", conn, index=False)
+        AVAILABILITIES.to_sql("availabilities", conn, index=False)
+        EXCLUSIONS.to_sql("matches", conn, index=False)
+    return path
+
+
+@pytest.fixture
+def sql_backend(database):
+    return SQLBackend(
+        url=f"sqlite:///{database}",
+        subject_features=["Interests", "Tags"],
+        availability_subject_column="subject",
+        availabilities_column="slot",
+        exclusions_subject_columns=["subject1", "subject2"],
+        subjects_table_name="subjects",
+        availabilities_table_name="availabilities",
+        exclusions_table_name="matches",
+        subject_id_column="id",
+        availability_id_column="avail_id",
+        created_column="created",
+        chunksize=2,
+    )
+
+
+def test_get_subjects(sql_backend):
+    subjects = sql_backend.get_subjects()
+    expected = SUBJECTS.rename(columns={"id": "subject_id"}).set_index("subject_id")
+    pd.testing.assert_frame_equal(subjects, expected)
+
+    subjects = sql_backend.get_subjects(
+        where=[filters.SubjectIn(["s2"])], columns=["Tags"]
+    )
+    assert subjects.index.tolist() == ["s2"]
+    assert subjects.columns.tolist() == ["Tags"]
+
+    with pytest.raises(ValueError):
+        sql_backend.get_subjects(columns=["Unknown"])
+
+
+def test_get_availabilities(sql_backend):
+    availabilities = sql_backend.get_availabilities()
+    assert availabilities.index.name == "availability_id"
+    assert availabilities.columns.tolist() == ["subject_id", "availabilities"]
+    assert availabilities.index.tolist() == [1, 2, 3, 4]
+
+    availabilities = sql_backend.get_availabilities(
+        where=[filters.SlotBetween("2023-01-02", "2023-01-03")]
+    )
+    assert availabilities["availabilities"].tolist() == ["2023-01-02", "2023-01-03"]
+
+    availabilities = sql_backend.get_availabilities(
+        where=[filters.SlotIn(["2023-01-01"]), filters.CreatedAfter("2022-12-02")]
+    )
+    assert availabilities["subject_id"].tolist() == ["s2"]
+
+
+def test_get_exclusions(sql_backend):
+    exclusions = sql_backend.get_exclusions()
+    assert exclusions.index.name == "exclusion_id"
+    pd.testing.assert_frame_equal(
+        exclusions.reset_index(drop=True), EXCLUSIONS, check_index_type=False
+    )
+    assert sql_backend.get_exclusions(where=[filters.SubjectIn(["s1"])]).empty
+
+
+def test_creator(database, sql_backend):
+    connections = []
+
+    def creator():
+        conn = sqlite3.connect(database, check_same_thread=False)
+        connections.append(conn)
+        return conn
+
+    backend = sql_backend.model_copy(update={"url": "sqlite://", "creator": creator})
+    tables = backend.load_all()
+    assert len(tables.subjects) == 3
+    assert len(tables.availabilities) == 4
+    # Connections are pooled
+    assert 1 <= len(connections) <= 3
@@ -0,0 +1,13 @@
+import pytest
+from swapanything import _compat
+
+
+def test_import_missing_dependency():
+    with pytest.raises(ImportError, match=r"pip install swap-anything\[arrow\]"):
+        _compat._import("swapanything_missing.module", "arrow")
+
+
+def test_import_pyarrow_submodules():
+    pytest.importorskip("pyarrow", exc_type=ImportError)
+    pyarrow = _compat.import_pyarrow("parquet")
+    assert pyarrow.parquet.ParquetFile
@@ -0,0 +1,151 @@
+import networkx as nx
+import numpy as np
+import pytest
+from swapanything import _matching
+
+
+def _random_graph(seed: int, max_nodes: int = 30, max_edges: int = 80):
+    rng = np.random.default_rng(seed)
+    n_nodes = int(rng.integers(2, max_nodes))
+    n_edges = int(rng.integers(1, max_edges))
+    u = rng.integers(0, n_nodes, n_edges)
+    v = rng.integers(0, n_nodes, n_edges)
+    weight = rng.integers(1, 10, n_edges).astype(float)
+    return n_nodes, u, v, weight
+
+
+def _assert_is_matching(u: np.ndarray, v: np.ndarray, positions: np.ndarray):
+    nodes = np.concatenate([u[positions], v[positions]])
+    assert len(np.unique(nodes)) == len(nodes)
+    assert (u[positions] != v[positions]).all()
+    assert (np.diff(positions) > 0).all()
+
+
+def test_pair_keys():
+    keys = _matching.pair_keys(np.array([3, 1, 2]), np.array([1, 3, 7]))
+    assert keys[0] == keys[1]
+
+    first, second = _matching.split_pair_keys(keys)
+    assert first.tolist() == [1, 1, 2]
+    assert second.tolist() == [3, 3, 7]
+
+
+def test_find():
+    sorted_keys = np.array([2, 5, 9])
+    keys = np.array([[9, 1], [5, 10]])
+
+    assert _matching.find(sorted_keys, keys).tolist() == [[2, -1], [1, -1]]
+    assert _matching.contains(sorted_keys, keys).tolist() == [
+        [True, False],
+        [True, False],
+    ]
+    assert _matching.find(np.empty(0, dtype=np.int64), keys).tolist() == [
+        [-1, -1],
+        [-1, -1],
+    ]
+
+
+def test_adjacency():
+    u = np.array([0, 1, 2, 3])
+    v = np.array([1, 2, 2, 0])
+
+    indptr, neighbors, edges = _matching.adjacency(4, u, v)
+    assert indptr.tolist() == [0, 2, 4, 5, 6]
+    assert neighbors.tolist() == [1, 3, 2, 0, 1, 0]
+    assert edges.tolist() == [0, 3, 1, 0, 1, 3]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_mask_adjacency(seed: int):
+    n_nodes, u, v, _ = _random_graph(seed)
+    alive = np.random.default_rng(seed).random(len(u)) < 0.5
+
+    masked = _matching.mask_adjacency(*_matching.adjacency(n_nodes, u, v), alive)
+    expected = _matching.adjacency(n_nodes, u[alive], v[alive])
+    assert masked[0].tolist() == expected[0].tolist()
+    assert masked[1].tolist() == expected[1].tolist()
+    assert masked[2].tolist() == np.flatnonzero(alive)[expected[2]].tolist()
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_max_cardinality_matching(seed: int):
+    n_nodes, u, v, _ = _random_graph(seed)
+    G = nx.Graph()
+    G.add_edges_from(
+        (a, b) for a, b in zip(u.tolist(), v.tolist(), strict=True) if a != b
+    )
+    expected = nx.max_weight_matching(G, maxcardinality=True)
+
+    positions = _matching.max_cardinality_matching(n_nodes, u, v)
+    _assert_is_matching(u, v, positions)
+    assert len(positions) == len(expected)
+
+
+def test_max_cardinality_matching_blossom():
+    # A 5-cycle with a pendant edge needs a blossom contraction to be solved
+    # when the greedy start matches (1, 2) and (3, 4).
+    u = np.array([0, 1, 2, 3, 4, 0])
+    v = np.array([1, 2, 3, 4, 0, 5])
+
+    positions = _matching.max_cardinality_matching(6, u, v)
+    _assert_is_matching(u, v, positions)
+    assert len(positions) == 3
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_greedy_matching(seed: int):
+    n_nodes, u, v, weight = _random_graph(seed)
+    G = nx.Graph()
+    for a, b, w in zip(u.tolist(), v.tolist(), weight.tolist(), strict=True):
+        if a != b:
+            G.add_edge(
+                a, b, weight=max(w, G.get_edge_data(a, b, {"weight": 0})["weight"])
+            )
+    optimum = sum(G.edges[e]["weight"] for e in nx.max_weight_matching(G))
+
+    positions = _matching.greedy_matching(n_nodes, u, v, weight)
+    _assert_is_matching(u, v, positions)
+    assert weight[positions].sum() >= optimum / 2
+
+    positions = _matching.greedy_cardinality_matching(n_nodes, u, v)
+    _assert_is_matching(u, v, positions)
+
+    positions = _matching.path_growing_matching(n_nodes, u, v, weight)
+    _assert_is_matching(u, v, positions)
+    assert weight[positions].sum() >= optimum / 2
+
+    assert _matching.weight_upper_bound(n_nodes, u, v, weight) >= optimum
+
+
+def test_path_growing_matching_path():
+    # On a path the dynamic programming finds the optimum, (0, 1) and (2, 3),
+    # where alternating the edges of the path would only take (1, 2).
+    u = np.array([0, 1, 2])
+    v = np.array([1, 2, 3])
+    weight = np.array([2.0, 3.0, 2.0])
+
+    positions = _matching.path_growing_matching(4, u, v, weight)
+    assert positions.tolist() == [0, 2]
+    assert _matching.weight_upper_bound(4, u, v, weight) == 5.0
+
+
+def test_empty_graph():
+    empty = np.array([], dtype=np.int64)
+    assert len(_matching.max_cardinality_matching(0, empty, empty)) == 0
+    assert len(_matching.greedy_matching(0, empty, empty, empty)) == 0
+    assert len(_matching.greedy_cardinality_matching(3, empty, empty)) == 0
+    assert len(_matching.path_growing_matching(3, empty, empty, empty)) == 0
+    assert _matching.weight_upper_bound(3, empty, empty, empty) == 0
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_connected_components(seed: int):
+    n_nodes, u, v, _ = _random_graph(seed, max_edges=30)
+    G = nx.Graph()
+    G.add_nodes_from(range(n_nodes))
+    G.add_edges_from(zip(u.tolist(), v.tolist(), strict=True))
+
+    labels = _matching.connected_components(n_nodes, u, v)
+    for component in nx.connected_components(G):
+        component = sorted(component)
+        assert (labels[component] == component[0]).all()
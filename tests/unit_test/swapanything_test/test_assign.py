@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from swapanything import assign, prep
+
+
+@pytest.fixture
+def selected() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "subject": [("a", "b"), ("c", "d"), ("e", "f"), ("g", "h")],
+            "slot": [("9:00", "10:00"), ("9:00",), ("9:00", "10:00"), ("11:00",)],
+        }
+    )
+
+
+def test_assign_slots(selected: pd.DataFrame):
+    assigned = assign.assign_slots(selected, "slot")
+    assert assigned["subject"].tolist() == selected["subject"].tolist()
+    for slots, slot in zip(assigned["slot"], assigned["assigned_slot"], strict=True):
+        assert slot in slots
+    # Pairs spread over their slots when capacities are unlimited
+    assert assigned["assigned_slot"].value_counts().max() == 2
+
+
+def test_assign_slots_capacities(selected: pd.DataFrame):
+    capacities = pd.Series({"9:00": 1, "10:00": 1})
+    assigned, report = assign.assign_slots(
+        selected, "slot", capacities, default_capacity=1, return_report=True
+    )
+    # ("c", "d") only has 9:00, so it goes first there
+    assert assigned["assigned_slot"].tolist()[1] == "9:00"
+    assert report.n_assigned == 3
+    assert len(report.unassigned) == 1
+    assert assigned["assigned_slot"].isna().sum() == 1
+    assert report.load.to_dict() == {"9:00": 1, "10:00": 1, "11:00": 1}
+
+
+def test_assign_slots_unassignable(selected: pd.DataFrame):
+    assigned, report = assign.assign_slots(selected, "slot", 0, return_report=True)
+    assert report.n_assigned == 0
+    assert report.unassigned["subject"].tolist() == selected["subject"].tolist()
+    assert assigned["assigned_slot"].isna().all()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_assign_slot_codes(seed: int):
+    rng = np.random.default_rng(seed)
+    n_pairs, n_slots = 200, 12
+    pair_ix = rng.integers(0, n_pairs, 600)
+    slot_code = rng.integers(0, n_slots, 600)
+    capacity = rng.integers(0, 30, n_slots).astype(float)
+
+    assigned = assign.assign_slot_codes(pair_ix, slot_code, n_pairs, capacity)
+    options = set(zip(pair_ix.tolist(), slot_code.tolist(), strict=True))
+    for pair in np.flatnonzero(assigned >= 0):
+        assert (pair, assigned[pair]) in options
+    load = np.bincount(assigned[assigned >= 0], minlength=n_slots)
+    assert (load <= capacity).all()
+    # An unassigned pair has all its slots full
+    for pair in np.flatnonzero(assigned < 0):
+        slots = slot_code[pair_ix == pair]
+        assert (load[slots] == capacity[slots]).all()
+
+
+def test_assign_slots_columnar(selected: pd.DataFrame):
+    pytest.importorskip("pyarrow", exc_type=ImportError)
+    columnar = prep.to_columnar(selected, "subject", "slot")
+    assigned = assign.assign_slots(columnar, "slot", 1)
+    expected = assign.assign_slots(selected, "slot", 1)
+    assert assigned["assigned_slot"].tolist() == expected["assigned_slot"].tolist()
+
+
+def test_assign_slots_large():
+    rng = np.random.default_rng(0)
+    slots = [
+        tuple(rng.choice(200, rng.integers(1, 10), replace=False).tolist())
+        for _ in range(50_000)
+    ]
+    selected = pd.DataFrame({"subject": range(50_000), "slot": slots})
+
+    assigned, report = assign.assign_slots(selected, "slot", 240, return_report=True)
+    assert report.n_assigned == 48_000
+    assert report.load.max() == 240
+    assert assigned["assigned_slot"].notna().sum() == 48_000
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from swapanything import bitset
+
+
+@pytest.fixture
+def availabilities() -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            ["KungFury", "13:00"],
+            ["KungFury", "14:00"],
+            ["KungFury", "9:00"],
+            ["Thor", "13:00"],
+            ["Thor", "14:00"],
+            ["Triceracop", "9:00"],
+            ["Triceracop", "11:00"],
+            ["Hackerman", "11:00"],
+            ["Katana", "12:00"],
+        ],
+        columns=["subject", "slot"],
+    )
+
+
+@pytest.fixture
+def bitsets(availabilities: pd.DataFrame) -> bitset.AvailabilityBitsets:
+    return bitset.AvailabilityBitsets.from_availabilities(
+        availabilities, "subject", "slot"
+    )
+
+
+def test_pack_unpack():
+    rng = np.random.default_rng(0)
+    subject_codes = rng.integers(0, 20, 300)
+    slot_codes = rng.integers(0, 150, 300)
+
+    packed = bitset.pack(subject_codes, slot_codes, 20, 150)
+    assert packed.shape == (20, 3)
+    assert packed.dtype == np.uint64
+
+    rows, slots = bitset.unpack(packed)
+    expected = sorted(
+        set(zip(subject_codes.tolist(), slot_codes.tolist(), strict=True))
+    )
+    assert list(zip(rows.tolist(), slots.tolist(), strict=True)) == expected
+    assert bitset.popcount(packed).tolist() == np.bincount(rows, minlength=20).tolist()
+
+
+def test_popcount():
+    words = np.array([[0, 1], [2**64 - 1, 2**63 + 5]], dtype=np.uint64)
+    assert bitset.popcount(words).tolist() == [1, 67]
+    assert bitset.popcount(words[1]) == 67
+
+
+def test_shared(bitsets: bitset.AvailabilityBitsets):
+    counts = bitsets.shared_counts(
+        ["KungFury", "KungFury", "Thor"], ["Thor", "Triceracop", "Katana"]
+    )
+    assert counts.tolist() == [2, 1, 0]
+    assert bitsets.shared_slots("KungFury", "Thor") == ("13:00", "14:00")
+    assert bitsets.shared_slots("Thor", "Katana") == ()
+    with pytest.raises(KeyError, match="T-Rex"):
+        bitsets.shared_counts(["T-Rex"], ["Thor"])
+
+
+def test_overlaps(bitsets: bitset.AvailabilityBitsets):
+    overlaps = bitsets.overlaps("KungFury")
+    assert overlaps.to_dict() == {"Thor": 2, "Triceracop": 1}
+    assert overlaps.index.tolist() == ["Thor", "Triceracop"]
+    assert bitsets.overlaps("KungFury", min_shared=2).index.tolist() == ["Thor"]
+    assert bitsets.top_overlaps("KungFury", k=1).index.tolist() == ["Thor"]
+    assert bitsets.overlaps("Katana").empty
+
+
+@pytest.mark.parametrize("block_words", [1, 7, 1 << 22])
+def test_pair_codes(block_words: int):
+    rng = np.random.default_rng(1)
+    packed = bitset.pack(rng.integers(0, 50, 200), rng.integers(0, 100, 200), 60, 100)
+    bitsets = bitset.AvailabilityBitsets(packed, pd.RangeIndex(60), pd.RangeIndex(100))
+
+    a, b = bitsets.pair_codes(block_words=block_words)
+    expected = [
+        (i, j)
+        for i in range(60)
+        for j in range(i + 1, 60)
+        if (packed[i] & packed[j]).any()
+    ]
+    assert list(zip(a.tolist(), b.tolist(), strict=True)) == expected
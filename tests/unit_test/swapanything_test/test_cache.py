@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+from swapanything import prep, select
+from swapanything.cache import CacheStats, ResultCache, content_hash
+
+
+@pytest.fixture
+def availabilities() -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            ["sub3", "A"],
+            ["sub1", "A"],
+            ["sub2", "B"],
+            ["sub5", "A"],
+            ["sub4", "C"],
+            ["sub5", "B"],
+            ["sub2", "A"],
+            ["sub1", "C"],
+        ],
+        columns=["subj", "avail"],
+    )
+
+
+def test_content_hash(availabilities: pd.DataFrame):
+    assert content_hash(availabilities, x=1) == content_hash(availabilities.copy(), x=1)
+    assert content_hash(availabilities, x=1) != content_hash(availabilities, x=2)
+    changed = availabilities.copy()
+    changed.iloc[0, 1] = "B"
+    assert content_hash(availabilities) != content_hash(changed)
+    assert content_hash(availabilities) != content_hash(
+        availabilities.rename(columns={"avail": "slot"})
+    )
+    # Unhashable cells
+    lists = pd.DataFrame({"a": [["x"], ["y"]]})
+    assert content_hash(lists) == content_hash(lists.copy())
+    assert content_hash(lists) != content_hash(pd.DataFrame({"a": [["x"], ["z"]]}))
+
+
+def test_content_hash_callables():
+    def add(n):
+        return lambda x: x + n
+
+    assert content_hash(lambda x: x) != content_hash(lambda y: y + 1)
+    assert content_hash(add(1)) == content_hash(add(1))
+    assert content_hash(add(1)) != content_hash(add(2))
+    assert content_hash(f=str.lower) != content_hash(f=str.upper)
+
+
+def test_result_cache(availabilities: pd.DataFrame):
+    cache = ResultCache(max_entries=1)
+    kwargs = {"subject_col": "subj", "slot_col": "avail", "engine": "numpy"}
+    expected = prep.get_all_matches(availabilities, **kwargs)
+
+    matches = prep.get_all_matches(availabilities, **kwargs, cache=cache)
+    assert matches.equals(expected)
+    matches.drop(index=matches.index, inplace=True)
+    assert prep.get_all_matches(availabilities, **kwargs, cache=cache).equals(expected)
+    assert cache.stats() == {"prep": CacheStats(hits=1, misses=1, size=1)}
+
+    selected = select.select_matches(expected, "subj", "avail", cache=cache)
+    assert selected.equals(select.select_matches(expected, "subj", "avail"))
+    select.select_matches(expected, "subj", "avail", cache=cache)
+    assert cache.stats()["select"] == CacheStats(hits=1, misses=1, size=1)
+
+    # LRU of one entry per stage
+    prep.get_all_matches(availabilities.iloc[1:], **kwargs, cache=cache)
+    prep.get_all_matches(availabilities, **kwargs, cache=cache)
+    assert cache.stats()["prep"] == CacheStats(hits=1, misses=3, size=1)
+
+    cache.clear("prep")
+    assert list(cache.stats()) == ["select"]
+
+
+def test_result_cache_directory(availabilities: pd.DataFrame, tmp_path):
+    kwargs = {"subject_col": "subj", "slot_col": "avail"}
+    expected = prep.get_all_matches(availabilities, **kwargs)
+
+    prep.get_all_matches(
+        availabilities, **kwargs, cache=ResultCache(directory=tmp_path)
+    )
+    assert len(list(tmp_path.iterdir())) == 1
+
+    cache = ResultCache(directory=tmp_path)
+    assert prep.get_all_matches(availabilities, **kwargs, cache=cache).equals(expected)
+    assert prep.get_all_matches(availabilities, **kwargs, cache=cache).equals(expected)
+    assert cache.stats()["prep"] == CacheStats(hits=1, disk_hits=1, size=1)
+
+    cache.clear()
+    assert cache.stats() == {}
+    assert not list(tmp_path.iterdir())
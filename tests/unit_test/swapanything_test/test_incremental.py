@@ -0,0 +1,176 @@
+import random
+
+import networkx as nx
+import pandas as pd
+import pytest
+from swapanything import prep
+from swapanything.incremental import AvailabilityIndex, Matcher
+
+
+@pytest.fixture
+def availabilities() -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            ["s1", "A"],
+            ["s2", "A"],
+            ["s2", "B"],
+            ["s3", "B"],
+            ["s4", "C"],
+            ["s5", "C"],
+            ["s5", "D"],
+            ["s6", "D"],
+        ],
+        columns=["subj", "avail"],
+    )
+
+
+def _expected_matches(state: dict, excluded: set) -> pd.DataFrame:
+    availabilities = pd.DataFrame(
+        [[subject, slot] for subject, slots in state.items() for slot in slots],
+        columns=["subj", "avail"],
+    )
+    matches = prep.get_all_matches(
+        availabilities, subject_col="subj", slot_col="avail", engine="numpy"
+    )
+    matches = matches[~matches["subj"].isin(excluded)]
+    return matches.sort_values("subj").reset_index(drop=True)
+
+
+def _max_cardinality(matches: pd.DataFrame) -> int:
+    return len(nx.max_weight_matching(nx.Graph(list(matches["subj"]))))
+
+
+def test_availability_index():
+    index = AvailabilityIndex()
+    assert index.add("Thor", "13:00")
+    assert not index.add("Thor", "13:00")
+    index.add("KungFury", "13:00")
+    index.add("KungFury", "14:00")
+    index.add("Katana", "14:00")
+    assert len(index) == 3
+    assert index.shared_slots("KungFury") == {"Thor": ["13:00"], "Katana": ["14:00"]}
+
+    assert index.add_exclusion("Thor", "KungFury") == ("KungFury", "Thor")
+    assert index.is_excluded("KungFury", "Thor")
+    assert index.shared_slots("KungFury") == {"Katana": ["14:00"]}
+
+    assert index.remove("Katana", "14:00")
+    assert not index.remove("Katana", "14:00")
+    assert "14:00" in index.subjects_by_slot
+    assert index.shared_slots("KungFury") == {}
+
+
+def test_matcher(availabilities: pd.DataFrame):
+    matcher = Matcher(availabilities, subject_col="subj", slot_col="avail")
+    pd.testing.assert_frame_equal(
+        matcher.get_matches(),
+        pd.DataFrame(
+            {
+                "subj": [("s1", "s2"), ("s2", "s3"), ("s4", "s5"), ("s5", "s6")],
+                "avail": [("A",), ("B",), ("C",), ("D",)],
+            }
+        ),
+    )
+    assert len(matcher.get_selected()) == 2
+
+    # s3 leaves, s1 can only be matched with s2
+    matcher.remove_subject("s3")
+    selected = matcher.get_selected()
+    assert ("s1", "s2") in selected["subj"].tolist()
+    assert len(selected) == 2
+
+    matcher.add_exclusion("s2", "s1")
+    assert ("s1", "s2") not in matcher.get_matches()["subj"].tolist()
+    matcher.add_availability("s1", "A")
+    assert len(matcher.get_selected()) == 1
+
+    # A new subject unlocks a second match
+    matcher.add_subject("s7", ["D", "E"])
+    selected = matcher.get_selected()
+    assert len(selected) == 2
+    assert selected.columns.tolist() == ["subj", "avail"]
+
+
+def test_matcher_exclusions(availabilities: pd.DataFrame):
+    exclusions = pd.DataFrame({"es1": ["s2"], "es2": ["s1"]})
+    matcher = Matcher(
+        availabilities,
+        subject_col="subj",
+        slot_col="avail",
+        exclusions=exclusions,
+        exclusions_subject_columns=["es1", "es2"],
+    )
+    assert ("s1", "s2") not in matcher.get_matches()["subj"].tolist()
+    matcher.add_availability("s1", "B")
+    assert ("s1", "s2") not in matcher.get_matches()["subj"].tolist()
+    assert ("s1", "s3") in matcher.get_matches()["subj"].tolist()
+
+
+def test_matcher_random_deltas():
+    rng = random.Random(0)
+    subjects = [f"s{i:02}" for i in range(30)]
+    slots = [f"t{i}" for i in range(12)]
+    state = {s: set(rng.sample(slots, 2)) for s in subjects[:20]}
+    availabilities = pd.DataFrame(
+        [[subject, slot] for subject, slots_ in state.items() for slot in slots_],
+        columns=["subj", "avail"],
+    )
+    matcher = Matcher(availabilities, subject_col="subj", slot_col="avail")
+    excluded = set()
+
+    for _ in range(200):
+        action = rng.random()
+        subject = rng.choice(subjects)
+        if action < 0.4:
+            slot = rng.choice(slots)
+            state.setdefault(subject, set()).add(slot)
+            matcher.add_availability(subject, slot)
+        elif action < 0.8:
+            if subject in state and state[subject]:
+                slot = rng.choice(sorted(state[subject]))
+                state[subject].discard(slot)
+                matcher.remove_availability(subject, slot)
+        elif action < 0.9:
+            state.pop(subject, None)
+            matcher.remove_subject(subject)
+        else:
+            pair = tuple(sorted(rng.sample(subjects, 2)))
+            excluded.add(pair)
+            matcher.add_exclusion(*pair)
+
+        expected = _expected_matches(state, excluded)
+        pd.testing.assert_frame_equal(matcher.get_matches(), expected)
+
+        selected = matcher.get_selected()
+        flat = [s for pair in selected["subj"] for s in pair]
+        assert len(flat) == len(set(flat))
+        assert set(selected["subj"]) <= set(expected["subj"])
+
+    # The local repairs are close to the optimum, rematch reaches it
+    matcher.rematch()
+    assert len(matcher.get_selected()) == _max_cardinality(matcher.get_matches())
+
+
+def test_matcher_removals_keep_maximum():
+    rng = random.Random(1)
+    subjects = [f"s{i:02}" for i in range(40)]
+    slots = [f"t{i}" for i in range(15)]
+    availabilities = pd.DataFrame(
+        [[subject, slot] for subject in subjects for slot in rng.sample(slots, 3)],
+        columns=["subj", "avail"],
+    )
+    matcher = Matcher(availabilities, subject_col="subj", slot_col="avail")
+    for _ in range(60):
+        subject = rng.choice(subjects)
+        action = rng.random()
+        if action < 0.6:
+            subject_slots = availabilities.loc[availabilities["subj"] == subject]
+            matcher.remove_availability(
+                subject, rng.choice(subject_slots["avail"].tolist())
+            )
+        elif action < 0.8:
+            matcher.remove_subject(subject)
+        else:
+            matcher.add_exclusion(*rng.sample(subjects, 2))
+        matches = matcher.get_matches()
+        assert len(matcher.get_selected()) == _max_cardinality(matches)
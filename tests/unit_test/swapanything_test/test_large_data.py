@@ -214,3 +214,23 @@ def test_large_dateset(
     assert isinstance(selected, pd.DataFrame)
     assert selected["Index"].is_unique
     assert len(selected) < len(all_possible_matches)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "sparse", "bitset"])
+def test_large_dataset_coded_engines(
+    get_large_datasets: Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame],
+    engine: str,
+):
+    _, availabilities, exclusions = get_large_datasets
+
+    # The integer-coded engine counts duplicated availabilities only once
+    kwargs = {
+        "availabilities": availabilities.drop_duplicates(),
+        "subject_col": "Index",
+        "slot_col": "Availabilities",
+        "exclusions": exclusions,
+        "exclusions_subject_columns": ["SubjectA", "SubjectB"],
+    }
+    expected_result = get_all_matches(**kwargs)
+    result = get_all_matches(**kwargs, engine=engine)
+    assert result.equals(expected_result)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+from swapanything import lookup, prep, score
+
+
+@pytest.fixture
+def availabilities() -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            ["KungFury", "13:00"],
+            ["KungFury", "14:00"],
+            ["KungFury", "9:00"],
+            ["Thor", "13:00"],
+            ["Thor", "14:00"],
+            ["Triceracop", "9:00"],
+            ["Triceracop", "11:00"],
+            ["Hackerman", "11:00"],
+            ["Katana", "12:00"],
+        ],
+        columns=["subject", "slot"],
+    )
+
+
+def test_candidates_for(availabilities: pd.DataFrame):
+    index = lookup.CandidateIndex(availabilities, "subject", "slot")
+    assert len(index) == 5
+    assert "Thor" in index
+
+    candidates = index.candidates_for("KungFury")
+    assert candidates.columns.tolist() == ["subject", "slot"]
+    assert candidates["subject"].tolist() == ["Thor", "Triceracop"]
+    assert candidates["slot"].tolist() == [("13:00", "14:00"), ("9:00",)]
+    assert index.candidates_for("Katana").empty
+    assert index.candidates_for("T-Rex").empty
+
+
+def test_candidates_for_same_as_get_all_matches(availabilities: pd.DataFrame):
+    exclusions = pd.DataFrame({"s1": ["Thor"], "s2": ["KungFury"]})
+    kwargs = {"exclusions": exclusions, "exclusions_subject_columns": ["s1", "s2"]}
+    index = lookup.CandidateIndex(availabilities, "subject", "slot", **kwargs)
+    matches = prep.get_all_matches(availabilities, "subject", "slot", **kwargs)
+
+    for subject in availabilities["subject"].unique():
+        expected = {
+            pair[1] if pair[0] == subject else pair[0]: slots
+            for pair, slots in zip(matches["subject"], matches["slot"], strict=True)
+            if subject in pair
+        }
+        candidates = index.candidates_for(subject)
+        result = dict(zip(candidates["subject"], candidates["slot"], strict=True))
+        assert result == expected
+
+
+def test_candidates_for_exclusion_index(availabilities: pd.DataFrame):
+    exclusions = prep.ExclusionIndex(
+        pd.DataFrame({"s1": ["Thor", "T-Rex"], "s2": ["KungFury", "Thor"]}),
+        ["s1", "s2"],
+    )
+    index = lookup.CandidateIndex(
+        availabilities, "subject", "slot", exclusions=exclusions
+    )
+    assert index.is_excluded("KungFury", "Thor")
+    assert index.candidates_for("KungFury")["subject"].tolist() == ["Triceracop"]
+
+
+def test_inserts(availabilities: pd.DataFrame):
+    index = lookup.CandidateIndex(availabilities, "subject", "slot")
+    index.add_availability("T-Rex", "12:00")
+    index.add_availabilities(
+        pd.DataFrame({"subject": ["T-Rex", "Katana"], "slot": ["9:00", "9:00"]})
+    )
+    candidates = index.candidates_for("T-Rex")
+    assert candidates["subject"].tolist() == ["Katana", "KungFury", "Triceracop"]
+    assert candidates["slot"].tolist()[0] == ("12:00", "9:00")
+
+    index.add_exclusion("Katana", "T-Rex")
+    assert "Katana" not in index.candidates_for("T-Rex")["subject"].tolist()
+
+
+def test_availabilities_by_slot(availabilities: pd.DataFrame):
+    by_slot = prep.get_matching_subjects_by_slot(
+        availabilities, slot_col="slot", subject_col="subject"
+    )
+    index = lookup.CandidateIndex(
+        by_slot, "subject", "slot", availabilities_by_slot=True
+    )
+    assert index.candidates_for("KungFury")["subject"].tolist() == [
+        "Thor",
+        "Triceracop",
+    ]
+
+
+def test_candidates_for_scores(availabilities: pd.DataFrame):
+    subjects = pd.DataFrame(
+        {"Industry": ["AI", "AI", "Food", "Food"]},
+        index=["KungFury", "Thor", "Triceracop", "Hackerman"],
+    )
+    scorer = score.MatchScorer(subjects, ["Industry"])
+    index = lookup.CandidateIndex(availabilities, "subject", "slot", scorer=scorer)
+
+    candidates = index.candidates_for("Triceracop")
+    assert candidates["subject"].tolist() == ["Hackerman", "KungFury"]
+    assert candidates["score"].tolist() == [1.0, 0.0]
+
+    index.add_availability("T-Rex", "9:00")
+    candidates = index.candidates_for("Triceracop")
+    assert candidates["subject"].tolist()[-1] == "T-Rex"
+    assert np.isnan(candidates["score"].iloc[-1])
@@ -1,4 +1,8 @@
+from itertools import combinations
+
+import numpy as np
 import pandas as pd
+import pytest
 from swapanything import prep
 
 
@@ -88,6 +92,50 @@ def test__apply_exclusions():
     assert result.equals(expected_result)
 
 
+def test_exclusion_index():
+    exclusions = pd.DataFrame(
+        [
+            ["sub3", "sub1"],
+            ["sub1", "sub3"],
+            ["sub2", None],
+            ["sub4", "sub2"],
+        ],
+        columns=["s1", "s2"],
+    )
+
+    index = prep.ExclusionIndex(exclusions, ["s1", "s2"])
+    assert list(index.subjects) == ["sub1", "sub2", "sub3", "sub4"]
+    assert len(index) == 2
+    assert index.keys.dtype == np.int64
+    assert index.is_excluded(
+        ["sub1", "sub3", "sub2", "sub2", "sub9", "sub1"],
+        ["sub3", "sub1", "sub4", "sub3", "sub1", "sub2"],
+    ).tolist() == [True, True, True, False, False, False]
+
+    empty_index = prep.ExclusionIndex(exclusions.iloc[:0], ["s1", "s2"])
+    assert empty_index.is_excluded(["sub1"], ["sub3"]).tolist() == [False]
+
+
+def test__apply_exclusions_index():
+    SUBJ_COL = "subj"
+    matches = pd.DataFrame(
+        [
+            ["A", ("sub1", "sub5")],
+            ["A", ("sub1", "sub3")],
+            ["B", ("sub1", "sub3")],
+        ],
+        columns=["avail", SUBJ_COL],
+    )
+    index = prep.ExclusionIndex(
+        pd.DataFrame([["sub3", "sub1"]], columns=["s1", "s2"]), ["s1", "s2"]
+    )
+
+    result = prep.apply_exclusions(matches, index, subject_col=SUBJ_COL)
+    assert result.equals(matches.iloc[[0]])
+    result = prep.apply_exclusions(matches.iloc[:0], index, subject_col=SUBJ_COL)
+    assert result.empty
+
+
 def test_get_all_matches():
     SLOT_COL = "avail"
     SUBJ_COL = "subj"
@@ -162,3 +210,328 @@ def test_get_all_matches():
     assert matching_subjects_by_slot.to_dict(orient="records") == [
         {"avail": "A", "subj": ("sub3", "sub1", "sub5")}
     ]
+
+
+def test_encode_availabilities():
+    SLOT_COL = "avail"
+    SUBJ_COL = "subj"
+    df = pd.DataFrame(
+        [
+            ["sub3", "B"],
+            ["sub1", "A"],
+            ["sub2", "B"],
+            ["sub1", "A"],
+            [None, "A"],
+        ],
+        columns=[SUBJ_COL, SLOT_COL],
+    )
+
+    coded, subjects, slots = prep.encode_availabilities(
+        df, subject_col=SUBJ_COL, slot_col=SLOT_COL
+    )
+    assert list(subjects) == ["sub1", "sub2", "sub3"]
+    assert list(slots) == ["A", "B"]
+    assert coded.dtypes.tolist() == [np.int32, np.int32]
+    assert coded.to_dict(orient="list") == {"slot": [0, 1, 1], "subject": [0, 1, 2]}
+
+
+def test_get_coded_matches_from_slots():
+    coded_availabilities = pd.DataFrame(
+        {"slot": [0, 0, 0, 1, 2, 2], "subject": [0, 1, 2, 3, 1, 3]},
+        dtype=np.int32,
+    )
+
+    result = prep.get_coded_matches_from_slots(coded_availabilities)
+    assert result.dtypes.tolist() == [np.int32] * 3
+    assert sorted(map(tuple, result.values.tolist())) == [
+        (0, 0, 1),
+        (0, 0, 2),
+        (0, 1, 2),
+        (2, 1, 3),
+    ]
+
+
+def test_decode_matches():
+    coded_matches = pd.DataFrame(
+        {"slot": [1, 0, 0], "subject_a": [0, 0, 1], "subject_b": [1, 1, 2]},
+        dtype=np.int32,
+    )
+
+    result = prep.decode_matches(
+        coded_matches,
+        subjects=pd.Index(["sub1", "sub2", "sub3"]),
+        slots=pd.Index(["A", "B"]),
+        subject_col="subj",
+        slot_col="avail",
+    )
+    assert result.to_dict(orient="records") == [
+        {"subj": ("sub1", "sub2"), "avail": ("A", "B")},
+        {"subj": ("sub2", "sub3"), "avail": ("A",)},
+    ]
+
+
+def test_get_incidence_matrix():
+    SLOT_COL = "avail"
+    SUBJ_COL = "subj"
+    df = pd.DataFrame(
+        [
+            ["sub1", "A"],
+            ["sub2", "B"],
+            ["sub3", "A"],
+            ["sub1", "B"],
+            ["sub1", "B"],
+        ],
+        columns=[SUBJ_COL, SLOT_COL],
+    )
+
+    incidence, subjects, slots = prep.get_incidence_matrix(
+        df, subject_col=SUBJ_COL, slot_col=SLOT_COL
+    )
+    assert list(subjects) == ["sub1", "sub2", "sub3"]
+    assert list(slots) == ["A", "B"]
+    assert incidence.toarray().tolist() == [[1, 1], [0, 1], [1, 0]]
+
+    counts = prep.get_shared_slots_counts(incidence)
+    assert counts.toarray().tolist() == [[0, 1, 1], [0, 0, 0], [0, 0, 0]]
+
+
+def test_get_coded_matches_from_incidence():
+    SLOT_COL = "avail"
+    SUBJ_COL = "subj"
+    df = pd.DataFrame(
+        [
+            ["sub1", "A"],
+            ["sub1", "B"],
+            ["sub1", "C"],
+            ["sub2", "B"],
+            ["sub2", "C"],
+            ["sub3", "C"],
+            ["sub4", "D"],
+        ],
+        columns=[SUBJ_COL, SLOT_COL],
+    )
+    incidence, _, _ = prep.get_incidence_matrix(
+        df, subject_col=SUBJ_COL, slot_col=SLOT_COL
+    )
+
+    result = prep.get_coded_matches_from_incidence(
+        incidence, prep.get_shared_slots_counts(incidence)
+    )
+    assert result.dtypes.tolist() == [np.int32] * 3
+    assert sorted(map(tuple, result.values.tolist())) == [
+        (1, 0, 1),
+        (2, 0, 1),
+        (2, 0, 2),
+        (2, 1, 2),
+    ]
+
+
+@pytest.mark.parametrize("engine", ["numpy", "sparse", "bitset"])
+@pytest.mark.parametrize("availabilities_by_slot", [False, True])
+def test_get_all_matches_coded_engines(availabilities_by_slot: bool, engine: str):
+    SLOT_COL = "avail"
+    SUBJ_COL = "subj"
+    EXCL_SUBJ_COLS = ["s1", "s2"]
+    availabilities = pd.DataFrame(
+        [
+            ["sub3", "A"],
+            ["sub1", "A"],
+            ["sub2", "B"],
+            ["sub5", "A"],
+            ["sub4", "C"],
+            ["sub5", "B"],
+            ["sub2", "A"],
+            ["sub1", "C"],
+        ],
+        columns=[SUBJ_COL, SLOT_COL],
+    )
+    exclusions = pd.DataFrame(
+        [
+            ["e1", "sub3", "sub1"],
+            ["e2", "sub9", "sub1"],
+        ],
+        columns=["excl", EXCL_SUBJ_COLS[0], EXCL_SUBJ_COLS[1]],
+    )
+    if availabilities_by_slot:
+        availabilities = prep.get_matching_subjects_by_slot(
+            availabilities, subject_col=SUBJ_COL, slot_col=SLOT_COL
+        )
+
+    kwargs = {
+        "availabilities": availabilities,
+        "subject_col": SUBJ_COL,
+        "slot_col": SLOT_COL,
+        "exclusions": exclusions,
+        "exclusions_subject_columns": EXCL_SUBJ_COLS,
+        "availabilities_by_slot": availabilities_by_slot,
+    }
+    expected_result = prep.get_all_matches(**kwargs)
+    result = prep.get_all_matches(**kwargs, engine=engine)
+    assert result.equals(expected_result)
+
+    kwargs["exclusions"] = prep.ExclusionIndex(exclusions, EXCL_SUBJ_COLS)
+    kwargs.pop("exclusions_subject_columns")
+    assert prep.get_all_matches(**kwargs).equals(expected_result)
+    assert prep.get_all_matches(**kwargs, engine=engine).equals(expected_result)
+
+
+def test_get_all_matches_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown engine"):
+        prep.get_all_matches(
+            pd.DataFrame(columns=["subj", "avail"]),
+            subject_col="subj",
+            slot_col="avail",
+            engine="spark",
+        )
+
+
+@pytest.mark.parametrize("engine", ["pandas", "numpy", "sparse", "bitset"])
+def test_get_all_matches_columnar(engine: str):
+    pytest.importorskip("pyarrow", exc_type=ImportError)
+    SLOT_COL = "avail"
+    SUBJ_COL = "subj"
+    availabilities = pd.DataFrame(
+        [
+            ["sub3", "A"],
+            ["sub1", "A"],
+            ["sub2", "B"],
+            ["sub5", "A"],
+            ["sub4", "C"],
+            ["sub5", "B"],
+            ["sub2", "A"],
+            ["sub1", "C"],
+        ],
+        columns=[SUBJ_COL, SLOT_COL],
+    ).astype("category")
+    kwargs = {
+        "availabilities": availabilities,
+        "subject_col": SUBJ_COL,
+        "slot_col": SLOT_COL,
+        "subjects_new_col_name": "pair",
+        "engine": engine,
+    }
+    expected_result = prep.get_all_matches(**kwargs)
+    result = prep.get_all_matches(**kwargs, layout="columnar")
+
+    assert result.columns.tolist() == ["pair_a", "pair_b", SLOT_COL]
+    assert isinstance(result["pair_a"].dtype, pd.CategoricalDtype)
+    assert result["pair_a"].cat.categories.equals(result["pair_b"].cat.categories)
+    assert isinstance(result[SLOT_COL].dtype, pd.ArrowDtype)
+    assert prep.to_tuples(result, ["pair_a", "pair_b"], SLOT_COL, "pair").equals(
+        expected_result
+    )
+    assert prep.to_columnar(expected_result, "pair", SLOT_COL).equals(result)
+
+
+def test_columnar_memory_usage():
+    pytest.importorskip("pyarrow", exc_type=ImportError)
+    rng = np.random.default_rng(0)
+    availabilities = pd.DataFrame(
+        {
+            "subj": [f"subject-{i:05d}" for i in rng.integers(0, 2000, 20_000)],
+            "avail": [
+                f"2023-06-{d:02d}T{h:02d}:00"
+                for d, h in rng.integers(1, 25, (20_000, 2))
+            ],
+        }
+    )
+    kwargs = {
+        "availabilities": availabilities,
+        "subject_col": "subj",
+        "slot_col": "avail",
+    }
+    tuples = prep.get_all_matches(**kwargs, engine="numpy")
+    columnar = prep.get_all_matches(**kwargs, engine="numpy", layout="columnar")
+    assert len(tuples) == len(columnar)
+    memory = columnar.memory_usage(deep=True).sum()
+    assert tuples.memory_usage(deep=True).sum() > 3 * memory
+
+
+def test_get_all_matches_unknown_layout():
+    with pytest.raises(ValueError, match="Unknown layout"):
+        prep.get_all_matches(
+            pd.DataFrame(columns=["subj", "avail"]),
+            subject_col="subj",
+            slot_col="avail",
+            layout="rows",
+        )
+
+
+@pytest.mark.parametrize("group_size", [3, 4])
+def test_get_all_groups(group_size: int):
+    rng = np.random.default_rng(group_size)
+    availabilities = pd.DataFrame(
+        {
+            "subj": [f"sub{i:02d}" for i in rng.integers(0, 40, 200)],
+            "avail": rng.integers(0, 30, 200),
+        }
+    )
+    result = prep.get_all_groups(availabilities, "subj", "avail", group_size)
+
+    slots_by_subject = availabilities.groupby("subj")["avail"].apply(set)
+    expected = []
+    for group in combinations(sorted(slots_by_subject.index), group_size):
+        shared = set.intersection(*(slots_by_subject[s] for s in group))
+        if shared:
+            expected.append((group, tuple(sorted(shared))))
+    assert list(zip(result["subj"], result["avail"], strict=True)) == expected
+
+
+def test_get_all_groups_pairs():
+    rng = np.random.default_rng(0)
+    availabilities = pd.DataFrame(
+        {
+            "subj": [f"sub{i:02d}" for i in rng.integers(0, 40, 200)],
+            "avail": [f"slot{i:03d}" for i in rng.integers(0, 100, 200)],
+        }
+    )
+    kwargs = {
+        "availabilities": availabilities,
+        "subject_col": "subj",
+        "slot_col": "avail",
+    }
+    result = prep.get_all_groups(**kwargs, group_size=2)
+    assert result.equals(prep.get_all_matches(**kwargs, engine="numpy"))
+
+
+def test_get_all_groups_exclusions():
+    availabilities = pd.DataFrame(
+        {
+            "subj": ["a", "b", "c", "d", "a", "b", "c"],
+            "avail": ["A", "A", "A", "A", "B", "B", "B"],
+        }
+    )
+    exclusions = pd.DataFrame({"s1": ["d", "x"], "s2": ["b", "a"]})
+    result = prep.get_all_groups(
+        availabilities,
+        "subj",
+        "avail",
+        group_size=3,
+        exclusions=exclusions,
+        exclusions_subject_columns=["s1", "s2"],
+    )
+    assert result["subj"].tolist() == [("a", "b", "c"), ("a", "c", "d")]
+    assert result["avail"].tolist() == [("A", "B"), ("A",)]
+
+
+def test_get_all_groups_empty():
+    availabilities = pd.DataFrame({"subj": ["a", "b"], "avail": ["A", "B"]})
+    result = prep.get_all_groups(availabilities, "subj", "avail", group_size=3)
+    assert result.empty
+    with pytest.raises(ValueError, match="at least 2"):
+        prep.get_all_groups(availabilities, "subj", "avail", group_size=1)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "sparse", "bitset"])
+def test_get_all_matches_coded_engines_no_matches(engine: str):
+    availabilities = pd.DataFrame({"subj": ["sub1", "sub2"], "avail": ["A", "B"]})
+    kwargs = {
+        "availabilities": availabilities,
+        "subject_col": "subj",
+        "slot_col": "avail",
+    }
+    expected_result = prep.get_all_matches(**kwargs)
+    result = prep.get_all_matches(**kwargs, engine=engine)
+    assert result.empty
+    assert result.dtypes.tolist() == expected_result.dtypes.tolist()
+    assert result.equals(expected_result)
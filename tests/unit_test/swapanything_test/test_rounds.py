@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+from swapanything import prep, rounds, select
+
+
+@pytest.fixture
+def matches() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    subjects = [f"sub{i}" for i in range(20)]
+    availabilities = pd.DataFrame(
+        {
+            "subject": rng.choice(subjects, 120),
+            "slot": rng.choice(list("ABCDEFGH"), 120),
+        }
+    ).drop_duplicates()
+    return prep.get_all_matches(availabilities, "subject", "slot")
+
+
+def _assert_schedule(schedule: pd.DataFrame, subjects_col: str):
+    # No pair is repeated, and each round is a matching
+    assert schedule[subjects_col].is_unique
+    for _, selected in schedule.groupby("round"):
+        subjects = [s for pair in selected[subjects_col] for s in pair]
+        assert len(subjects) == len(set(subjects))
+
+
+@pytest.mark.parametrize(
+    "algorithm", ["networkx", "greedy", "path-growing", "blossom-fast"]
+)
+def test_plan_rounds(matches: pd.DataFrame, algorithm: str):
+    schedule = rounds.plan_rounds(matches, "subject", 5, algorithm=algorithm)
+    _assert_schedule(schedule, "subject")
+    assert schedule["round"].unique().tolist() == [0, 1, 2, 3, 4]
+
+    first = select.select_matches(matches, "subject", "slot", algorithm=algorithm)
+    assert sorted(schedule.loc[schedule["round"] == 0, "subject"]) == sorted(
+        first["subject"]
+    )
+
+
+def test_plan_rounds_same_as_exclusions(matches: pd.DataFrame):
+    # Planning the rounds at once matches excluding the pairs of earlier rounds
+    schedule = rounds.plan_rounds(matches, "subject", 4, algorithm="blossom-fast")
+    remaining = matches
+    for n in range(4):
+        selected = select.select_matches(
+            remaining, "subject", "slot", algorithm="blossom-fast"
+        )
+        planned = schedule[schedule["round"] == n]
+        assert len(planned) == len(selected)
+        remaining = remaining[~remaining["subject"].isin(selected["subject"])]
+
+
+@pytest.mark.parametrize("algorithm", ["networkx", "greedy", "path-growing"])
+def test_plan_rounds_scores(matches: pd.DataFrame, algorithm: str):
+    scores = pd.Series(np.random.default_rng(1).random(len(matches)))
+    schedule = rounds.plan_rounds(
+        matches, "subject", 3, match_scores=scores, algorithm=algorithm
+    )
+    _assert_schedule(schedule, "subject")
+
+    first = select.select_matches(
+        matches, "subject", "slot", match_scores=scores, algorithm=algorithm
+    )
+    assert sorted(schedule.loc[schedule["round"] == 0, "subject"]) == sorted(
+        first["subject"]
+    )
+
+
+def test_plan_rounds_exhausted():
+    matches = pd.DataFrame(
+        {"subject": [("a", "b"), ("b", "c"), ("a", "c")], "slot": [("A",)] * 3}
+    )
+    schedule = rounds.plan_rounds(matches, "subject", 10)
+    assert schedule["round"].tolist() == [0, 1, 2]
+    assert sorted(schedule["subject"]) == sorted(matches["subject"])
+
+
+def test_plan_rounds_columnar(matches: pd.DataFrame):
+    pytest.importorskip("pyarrow", exc_type=ImportError)
+    columnar = prep.to_columnar(matches, "subject", "slot")
+    schedule = rounds.plan_rounds(columnar, ("subject_a", "subject_b"), 3)
+    expected = rounds.plan_rounds(matches, "subject", 3)
+    assert len(schedule) == len(expected)
+    assert not schedule.duplicated(["subject_a", "subject_b"]).any()
+
+
+def test_round_planner_masks(matches: pd.DataFrame):
+    planner = rounds.RoundPlanner(matches, "subject")
+    first = planner.next_round()
+    second = planner.next_round()
+    assert not planner.alive[first].any()
+    assert not planner.alive[second].any()
+    assert not set(first) & set(second)
+
+
+def test_plan_rounds_errors(matches: pd.DataFrame):
+    with pytest.raises(ValueError, match="Unknown algorithm"):
+        rounds.plan_rounds(matches, "subject", 2, algorithm="unknown")
+    with pytest.raises(ValueError, match="does not support"):
+        rounds.plan_rounds(
+            matches, "subject", 2, match_scores=pd.Series(np.ones(len(matches)))
+        )
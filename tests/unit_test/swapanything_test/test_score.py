@@ -0,0 +1,142 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+import pytest
+from swapanything import prep, score
+
+from .test_large_data import get_large_datasets  # noqa: F401
+
+pytest.importorskip("scipy")
+
+
+@pytest.fixture
+def subjects() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Industry": [["AI", "SaaS"], ["SaaS"], ["AI", "SaaS", "Web3"], []],
+            "Role": ["CEO", "CTO", "CEO", np.nan],
+            "Growth Stage": ["Pre-Seed", "Seed", "Series A", "Seed"],
+        },
+        index=pd.Index(["sub1", "sub2", "sub3", "sub4"], name="subject_id"),
+    )
+
+
+def test_one_hot():
+    encoded, categories = score.one_hot(pd.Series([["b", "a", "b"], "c", None, []]))
+    assert categories.tolist() == ["a", "b", "c"]
+    assert encoded.toarray().tolist() == [[1, 1, 0], [0, 0, 1], [0, 0, 0], [0, 0, 0]]
+
+    with pytest.raises(ValueError, match="not in the categories"):
+        score.one_hot(pd.Series(["a", "d"]), categories=["a", "b"])
+
+
+@pytest.mark.parametrize(
+    "feature,expected",
+    [
+        (score.Feature("Industry"), [1 / 2, 2 / 3, 0.0]),
+        (score.Feature("Industry", "overlap"), [1.0, 1.0, 0.0]),
+        (score.Feature("Role", "equal"), [0.0, 1.0, 0.0]),
+        (
+            score.Feature(
+                "Growth Stage", "ordinal", order=["Pre-Seed", "Seed", "Series A"]
+            ),
+            [0.5, 0.0, 1.0],
+        ),
+    ],
+)
+def test_match_scorer_similarities(
+    subjects: pd.DataFrame, feature: score.Feature, expected: list
+):
+    matches = pd.DataFrame(
+        {"subj": [("sub1", "sub2"), ("sub1", "sub3"), ("sub2", "sub4")]},
+        index=[10, 11, 12],
+    )
+    scores = score.MatchScorer(subjects, [feature]).score(matches, "subj")
+    assert scores.index.tolist() == [10, 11, 12]
+    np.testing.assert_allclose(scores.to_numpy(), expected)
+
+
+def test_match_scorer_weights(subjects: pd.DataFrame):
+    matches = pd.DataFrame(
+        {"s1": ["sub1", "sub1", "sub2"], "s2": ["sub2", "sub3", "sub4"]}
+    )
+    features = ["Industry", score.Feature("Role", "equal", weight=2.0)]
+    scores = score.score_matches(
+        matches, subjects, features, subjects_col=("s1", "s2"), batch_size=2
+    )
+    np.testing.assert_allclose(scores.to_numpy(), [1 / 2, 2 / 3 + 2.0, 0.0])
+
+    with pytest.raises(ValueError, match="not in the subjects"):
+        score.score_matches(
+            pd.DataFrame({"s1": ["sub1"], "s2": ["sub9"]}),
+            subjects,
+            features,
+            subjects_col=("s1", "s2"),
+        )
+
+
+def test_feature_validation():
+    with pytest.raises(ValueError, match="Unknown similarity"):
+        score.Feature("Role", "cosine")
+    with pytest.raises(ValueError, match="order"):
+        score.Feature("Growth Stage", "ordinal")
+
+
+def test_score_large_dataset(
+    get_large_datasets: Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame],  # noqa: F811
+):
+    subjects, availabilities, _ = get_large_datasets
+    subjects = subjects.set_index("Index")
+    matches = prep.get_all_matches(
+        availabilities, subject_col="Index", slot_col="Availabilities", engine="numpy"
+    )
+    features = [
+        score.Feature("Industry", weight=2.0),
+        score.Feature("Languages", "overlap"),
+        score.Feature("Goal"),
+        score.Feature(
+            "Growth Stage",
+            "ordinal",
+            order=["Bootstrap", "Pre-Seed", "Seed", "Series A"],
+        ),
+    ]
+    with pytest.raises(ValueError, match="not in the categories"):
+        score.MatchScorer(subjects, features)
+
+    features[-1] = score.Feature("Role", "equal", weight=0.5)
+    scores = score.MatchScorer(subjects, features).score(matches, "Index")
+    assert scores.index.equals(matches.index)
+
+    # Same scores as a pure Python computation
+    def jaccard(a, b):
+        a, b = set(a), set(b)
+        return len(a & b) / len(a | b) if a | b else 0.0
+
+    def overlap(a, b):
+        a, b = set(a), set(b)
+        return len(a & b) / min(len(a), len(b)) if a and b else 0.0
+
+    records = subjects.to_dict("index")
+    expected = [
+        2.0 * jaccard(records[a]["Industry"], records[b]["Industry"])
+        + overlap(records[a]["Languages"], records[b]["Languages"])
+        + jaccard(records[a]["Goal"], records[b]["Goal"])
+        + 0.5 * (records[a]["Role"] == records[b]["Role"])
+        for a, b in matches["Index"]
+    ]
+    np.testing.assert_allclose(scores.to_numpy(), expected)
+
+
+def test_score_matches_cache(subjects: pd.DataFrame):
+    from swapanything.cache import ResultCache
+
+    matches = pd.DataFrame({"subj": [("sub1", "sub2"), ("sub1", "sub3")]})
+    cache = ResultCache()
+    expected = score.score_matches(matches, subjects, ["Industry"], "subj")
+    for _ in range(2):
+        scores = score.score_matches(
+            matches, subjects, ["Industry"], "subj", cache=cache
+        )
+        assert scores.equals(expected)
+    assert cache.stats()["score"].hits == 1
@@ -1,6 +1,7 @@
 from typing import List
 
 import networkx as nx
+import numpy as np
 import pandas as pd
 import pytest
 from swapanything import select
@@ -99,3 +100,274 @@ def test_select_matches(
         return_graph=True,
     )
     assert isinstance(G, nx.Graph)
+
+
+@pytest.mark.parametrize("algorithm", ["greedy", "path-growing", "blossom-fast"])
+def test_select_matches_algorithms(
+    algorithm: str,
+    subjects_col: str,
+    slots_col: str,
+    possible_matches: List[List[tuple]],
+) -> None:
+    matches = pd.DataFrame(possible_matches, columns=[subjects_col, slots_col])
+
+    results = select.select_matches(
+        matches,
+        subjects_col=subjects_col,
+        slots_col=slots_col,
+        algorithm=algorithm,
+    )
+    assert results.columns.tolist() == [subjects_col, slots_col]
+    assert results[subjects_col].is_monotonic_increasing
+    subjects = [s for pair in results[subjects_col] for s in pair]
+    assert len(subjects) == len(set(subjects))
+    if algorithm == "blossom-fast":
+        assert len(results) == 4
+    else:
+        # 1/2-approximations of the maximum matching
+        assert 2 <= len(results) <= 4
+
+
+@pytest.mark.parametrize("algorithm", ["networkx", "greedy", "path-growing"])
+def test_select_matches_report(
+    algorithm: str,
+    subjects_col: str,
+    slots_col: str,
+    possible_matches: List[List[tuple]],
+) -> None:
+    matches = pd.DataFrame(possible_matches, columns=[subjects_col, slots_col])
+
+    results, report = select.select_matches(
+        matches,
+        subjects_col=subjects_col,
+        slots_col=slots_col,
+        match_scores=[1.0, 1.0, 1.0, 1.0, 1.0, 9001.0, 1.0],
+        algorithm=algorithm,
+        return_report=True,
+    )
+    assert results.equals(matches.iloc[[0, 3, 5]].reset_index(drop=True))
+    assert isinstance(report, select.MatchingReport)
+    assert report.algorithm == algorithm
+    assert report.weight == 9003.0
+    assert report.n_matches == 3
+    assert report.weight <= report.upper_bound <= 2 * report.weight
+    assert 0.5 <= report.ratio <= 1.0
+    if algorithm == "networkx":
+        assert report.upper_bound == report.weight
+
+    _, G, report = select.select_matches(
+        matches,
+        subjects_col=subjects_col,
+        slots_col=slots_col,
+        algorithm=algorithm,
+        return_graph=True,
+        return_report=True,
+    )
+    assert isinstance(G, nx.Graph)
+    assert report.weight == report.n_matches
+
+
+def test_select_matches_invalid_algorithm(
+    subjects_col: str,
+    slots_col: str,
+    possible_matches: List[List[tuple]],
+) -> None:
+    matches = pd.DataFrame(possible_matches, columns=[subjects_col, slots_col])
+
+    with pytest.raises(ValueError, match="Unknown algorithm"):
+        select.select_matches(
+            matches, subjects_col=subjects_col, slots_col=slots_col, algorithm="?"
+        )
+    with pytest.raises(ValueError, match="does not support match_scores"):
+        select.select_matches(
+            matches,
+            subjects_col=subjects_col,
+            slots_col=slots_col,
+            match_scores=[1.0] * 7,
+            algorithm="blossom-fast",
+        )
+
+
+@pytest.mark.parametrize(
+    "algorithm", ["networkx", "greedy", "path-growing", "blossom-fast"]
+)
+def test_select_matches_from_arrays(algorithm: str) -> None:
+    # Same graph as `possible_matches`, with subjects coded as sub1 -> 0, ...
+    u = np.array([0, 0, 1, 3, 0, 5, 6])
+    v = np.array([1, 2, 2, 4, 5, 6, 7])
+
+    positions, report = select.select_matches_from_arrays(
+        u, v, algorithm=algorithm, return_report=True
+    )
+    assert positions.dtype == np.int64
+    assert (np.diff(positions) > 0).all()
+    nodes = np.concatenate([u[positions], v[positions]])
+    assert len(np.unique(nodes)) == len(nodes)
+    assert report.n_matches == len(positions)
+    if algorithm in ("networkx", "blossom-fast"):
+        assert positions.tolist() == [2, 3, 4, 6]
+
+    if algorithm != "blossom-fast":
+        positions = select.select_matches_from_arrays(
+            u,
+            v,
+            weights=np.array([1.0, 1.0, 1.0, 1.0, 1.0, 9001.0, 1.0]),
+            n_nodes=10,
+            algorithm=algorithm,
+        )
+        assert positions.tolist() == [0, 3, 5]
+
+
+def test_select_matches_graph(
+    subjects_col: str,
+    slots_col: str,
+    possible_matches: List[List[tuple]],
+) -> None:
+    matches = pd.DataFrame(possible_matches, columns=[subjects_col, slots_col])
+
+    _, G = select.select_matches(
+        matches,
+        subjects_col=subjects_col,
+        slots_col=slots_col,
+        algorithm="blossom-fast",
+        return_graph=True,
+    )
+    assert G.number_of_edges() == len(matches)
+    assert G.edges["sub6", "sub1"] == {"_score": 1, slots_col: ("E", "F")}
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+@pytest.mark.parametrize("algorithm", ["networkx", "path-growing", "blossom-fast"])
+def test_select_matches_from_arrays_components(n_jobs: int, algorithm: str) -> None:
+    rng = np.random.default_rng(42)
+    # Ten components of increasing size, plus a few isolated edges
+    u, v = [np.array([100, 102, 104])], [np.array([101, 103, 105])]
+    for i in range(10):
+        u.append(rng.integers(0, i + 2, 3 * (i + 2)) + 10 * i)
+        v.append(rng.integers(0, i + 2, 3 * (i + 2)) + 10 * i)
+    u, v = np.concatenate(u), np.concatenate(v)
+    weights = None if algorithm == "blossom-fast" else rng.random(len(u))
+
+    expected, expected_report = select.select_matches_from_arrays(
+        u, v, weights=weights, algorithm=algorithm, return_report=True
+    )
+    positions, report = select.select_matches_from_arrays(
+        u,
+        v,
+        weights=weights,
+        algorithm=algorithm,
+        return_report=True,
+        n_jobs=n_jobs,
+        min_component_size=5,
+    )
+    assert (np.diff(positions) > 0).all()
+    nodes = np.concatenate([u[positions], v[positions]])
+    assert len(np.unique(nodes)) == len(nodes)
+    assert report.weight == pytest.approx(expected_report.weight)
+    if algorithm == "path-growing":
+        # Components are matched independently, as in a single run
+        assert positions.tolist() == expected.tolist()
+
+
+def test_select_matches_n_jobs(
+    subjects_col: str,
+    slots_col: str,
+    possible_matches: List[List[tuple]],
+) -> None:
+    matches = pd.DataFrame(possible_matches, columns=[subjects_col, slots_col])
+
+    results = select.select_matches(
+        matches,
+        subjects_col=subjects_col,
+        slots_col=slots_col,
+        n_jobs=2,
+        min_component_size=2,
+    )
+    assert results.equals(matches.iloc[[4, 2, 3, 6]].reset_index(drop=True))
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_select_matches_pair_columns(
+    categorical: bool,
+    subjects_col: str,
+    slots_col: str,
+    possible_matches: List[List[tuple]],
+) -> None:
+    matches = pd.DataFrame(possible_matches, columns=[subjects_col, slots_col])
+    expected_result = select.select_matches(
+        matches, subjects_col=subjects_col, slots_col=slots_col
+    )
+
+    columns = pd.DataFrame(matches[subjects_col].tolist(), columns=["s1", "s2"])
+    if categorical:
+        subjects = pd.unique(columns.to_numpy().ravel())
+        columns = columns.astype(pd.CategoricalDtype(sorted(subjects)))
+    pair_matches = pd.concat([columns, matches[[slots_col]]], axis=1)
+    result, G = select.select_matches(
+        pair_matches, subjects_col=("s1", "s2"), slots_col=slots_col, return_graph=True
+    )
+
+    assert result.columns.tolist() == ["s1", "s2", slots_col]
+    pairs = list(zip(result["s1"], result["s2"], strict=True))
+    assert pairs == expected_result[subjects_col].tolist()
+    assert set(G.nodes) == {f"sub{i}" for i in range(1, 9)}
+
+
+@pytest.fixture
+def possible_groups() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "subj": [
+                ("sub1", "sub2", "sub3"),
+                ("sub1", "sub4", "sub5"),
+                ("sub2", "sub3", "sub6"),
+                ("sub4", "sub5", "sub6"),
+                ("sub7", "sub8", "sub9"),
+            ],
+            "avail": [("A",), ("B",), ("C",), ("D",), ("E", "F")],
+        }
+    )
+
+
+def test_select_groups(possible_groups: pd.DataFrame) -> None:
+    result = select.select_groups(possible_groups, "subj")
+    # Groups of subjects with fewer alternatives are taken first
+    assert result["subj"].tolist() == [
+        ("sub1", "sub2", "sub3"),
+        ("sub4", "sub5", "sub6"),
+        ("sub7", "sub8", "sub9"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "aggregate,expected",
+    [
+        ("mean", [("sub1", "sub4", "sub5"), ("sub2", "sub3", "sub6")]),
+        ("min", [("sub1", "sub2", "sub3"), ("sub4", "sub5", "sub6")]),
+    ],
+)
+def test_select_groups_scores(
+    possible_groups: pd.DataFrame, aggregate: str, expected: List[tuple]
+) -> None:
+    pair_scores = pd.Series(
+        [9.0, 9.0, 1.0, 1.0, 1.0, 1.0],
+        index=[
+            ("sub1", "sub4"),
+            ("sub5", "sub1"),
+            ("sub4", "sub5"),
+            ("sub1", "sub2"),
+            ("sub1", "sub3"),
+            ("sub2", "sub3"),
+        ],
+    )
+    result = select.select_groups(
+        possible_groups, "subj", pair_scores=pair_scores, aggregate=aggregate
+    )
+    assert result["subj"].tolist()[:2] == expected
+    subjects = [s for group in result["subj"] for s in group]
+    assert len(subjects) == len(set(subjects))
+
+
+def test_select_groups_unknown_aggregate(possible_groups: pd.DataFrame) -> None:
+    with pytest.raises(ValueError, match="Unknown aggregate"):
+        select.select_groups(possible_groups, "subj", aggregate="max")
@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from swapanything import prep, stream
+
+
+@pytest.fixture
+def availabilities() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "subj": [f"sub{i}" for i in rng.integers(0, 60, 400)],
+            "avail": [f"slot{i}" for i in rng.integers(0, 25, 400)],
+        }
+    )
+
+
+@pytest.fixture
+def exclusions() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"s1": ["sub1", "sub7", "sub3"], "s2": ["sub2", "sub3", "sub9"]}
+    )
+
+
+def _expected(availabilities, **kwargs) -> pd.DataFrame:
+    matches = prep.get_all_matches(
+        availabilities, subject_col="subj", slot_col="avail", engine="numpy", **kwargs
+    )
+    return matches.sort_values("subj", ignore_index=True)
+
+
+def test_spill_buffer(tmp_path):
+    buffer = stream.SpillBuffer(2, str(tmp_path), memory_budget=1000)
+    frames = [pd.DataFrame({"a": np.arange(i * 50, (i + 1) * 50)}) for i in range(3)]
+    for frame in frames:
+        buffer.append(0, frame)
+    buffer.append(1, frames[0].iloc[:2])
+    assert buffer.n_spilled > 0
+    assert os.listdir(tmp_path) == ["partition-0.pkl"]
+
+    result = pd.concat(buffer.pop(0), ignore_index=True)
+    pd.testing.assert_frame_equal(result, pd.concat(frames, ignore_index=True))
+    assert os.listdir(tmp_path) == []
+    assert buffer.pop(0) == []
+    assert len(buffer.pop(1)[0]) == 2
+
+
+def test_read_availabilities(availabilities: pd.DataFrame, tmp_path):
+    csv_path = tmp_path / "availabilities.csv"
+    availabilities.assign(other=1).to_csv(csv_path, index=False)
+    chunks = list(stream.read_availabilities(csv_path, "subj", "avail", chunksize=150))
+    assert [len(chunk) for chunk in chunks] == [150, 150, 100]
+    pd.testing.assert_frame_equal(pd.concat(chunks), availabilities)
+
+    chunks = list(stream.read_availabilities(availabilities, "subj", "avail"))
+    assert len(chunks) == 1
+
+
+def test_slot_batches():
+    # Slots of 3, 1, 4 and 2 subjects: 3, 0, 6 and 1 pairs
+    slot_codes = np.repeat([0, 1, 2, 3], [3, 1, 4, 2])
+    assert stream._slot_batches(slot_codes, 100).tolist() == [0, 10]
+    assert stream._slot_batches(slot_codes, 7).tolist() == [0, 8, 10]
+    assert stream._slot_batches(slot_codes, 3).tolist() == [0, 3, 8, 10]
+    assert stream._slot_batches(np.empty(0, dtype=int), 1).tolist() == [0, 0]
+
+
+@pytest.mark.parametrize("memory_budget", [2**30, 2000])
+def test_stream_all_matches(
+    availabilities: pd.DataFrame, exclusions: pd.DataFrame, memory_budget: int, tmp_path
+):
+    chunks = (availabilities.iloc[i : i + 70] for i in range(0, 400, 70))
+    blocks = list(
+        stream.stream_all_matches(
+            chunks,
+            subject_col="subj",
+            slot_col="avail",
+            exclusions=exclusions,
+            exclusions_subject_columns=["s1", "s2"],
+            n_partitions=4,
+            memory_budget=memory_budget,
+            spill_dir=str(tmp_path),
+        )
+    )
+    assert 1 < len(blocks) <= 4
+    pairs = [pair for block in blocks for pair in block["subj"]]
+    assert len(pairs) == len(set(pairs))
+
+    result = pd.concat(blocks).sort_values("subj", ignore_index=True)
+    expected = _expected(
+        availabilities, exclusions=exclusions, exclusions_subject_columns=["s1", "s2"]
+    )
+    pd.testing.assert_frame_equal(result, expected)
+    assert os.listdir(tmp_path) == []
+
+
+def test_get_all_matches_from_parquet(availabilities: pd.DataFrame, tmp_path):
+    pytest.importorskip("pyarrow", exc_type=ImportError)
+    path = tmp_path / "availabilities.parquet"
+    availabilities.to_parquet(path)
+    result = stream.get_all_matches(
+        path, subject_col="subj", slot_col="avail", chunksize=100, n_partitions=3
+    )
+    pd.testing.assert_frame_equal(result, _expected(availabilities))
+
+
+def test_get_all_matches_empty():
+    result = stream.get_all_matches(
+        pd.DataFrame({"subj": ["sub1"], "avail": ["A"]}), "subj", "avail"
+    )
+    assert result.empty
+    assert result.columns.tolist() == ["subj", "avail"]
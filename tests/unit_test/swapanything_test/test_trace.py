@@ -0,0 +1,120 @@
+import io
+import json
+import logging
+
+import pandas as pd
+import pytest
+from swapanything import prep, select, trace
+
+
+@pytest.fixture
+def availabilities() -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            ["sub3", "A"],
+            ["sub1", "A"],
+            ["sub2", "B"],
+            ["sub5", "A"],
+            ["sub4", "C"],
+            ["sub5", "B"],
+            ["sub2", "A"],
+            ["sub1", "C"],
+        ],
+        columns=["subj", "avail"],
+    )
+
+
+@pytest.fixture
+def exclusions() -> pd.DataFrame:
+    return pd.DataFrame([["sub3", "sub1"]], columns=["s1", "s2"])
+
+
+def test_span_disabled():
+    with trace.span("stage", rows_in=3) as s:
+        s.rows_out = 2
+    assert s is trace._NULL_SPAN
+    assert s.rows_out is None
+    # Nothing is recorded without a tracer, the span is the shared no-op one
+    with trace.span("other") as other:
+        pass
+    assert other is s
+
+
+@pytest.mark.parametrize("engine", ["pandas", "numpy", "sparse"])
+def test_tracer_pipeline(
+    availabilities: pd.DataFrame, exclusions: pd.DataFrame, engine: str
+):
+    with trace.Tracer() as tracer:
+        matches = prep.get_all_matches(
+            availabilities,
+            subject_col="subj",
+            slot_col="avail",
+            exclusions=exclusions,
+            exclusions_subject_columns=["s1", "s2"],
+            engine=engine,
+        )
+        select.select_matches(matches, "subj", "avail")
+
+    report = tracer.report()
+    assert report["name"].tolist() == [
+        "prep.group_by_slot",
+        "prep.pairs",
+        "prep.exclusions",
+        "prep.group_by_pair",
+        "select.graph",
+        "select.matching",
+    ]
+    assert (report["duration"] >= 0).all()
+    assert report["peak_memory"].isna().all()
+    rows = report.set_index("name")
+    assert rows.loc["prep.group_by_slot", "rows_in"] == len(availabilities)
+    assert rows.loc["prep.exclusions", "rows_in"] == 8
+    assert rows.loc["prep.exclusions", "rows_out"] == 7
+    assert rows.loc["prep.group_by_pair", "rows_out"] == len(matches)
+    assert rows.loc["select.matching", "rows_in"] == len(matches)
+
+    # Nothing is recorded out of the block
+    prep.get_all_matches(availabilities, subject_col="subj", slot_col="avail")
+    assert len(tracer.spans) == 6
+
+
+def test_tracer_nested_memory():
+    with trace.Tracer(memory=True) as tracer:
+        with trace.span("outer"):
+            big = list(range(100_000))
+            del big
+            with trace.span("inner", rows_in=1) as s:
+                small = list(range(1000))
+                s.rows_out = len(small)
+    inner, outer = tracer.spans
+    assert (inner.name, inner.parent, outer.parent) == ("inner", "outer", None)
+    assert inner.rows_out == 1000
+    assert 0 < inner.peak_memory < outer.peak_memory
+
+
+def test_sinks(caplog: pytest.LogCaptureFixture, tmp_path):
+    lines = io.StringIO()
+    otel_spans = []
+    sinks = [
+        trace.LoggingSink(),
+        trace.JSONLinesSink(lines),
+        trace.JSONLinesSink(str(tmp_path / "spans.jsonl")),
+        trace.otel_sink(otel_spans.append),
+    ]
+    with caplog.at_level(logging.INFO, logger="swapanything.trace"):
+        with trace.Tracer(sinks=sinks):
+            with trace.span("stage", rows_in=3, engine="numpy") as s:
+                s.rows_out = 2
+
+    assert "stage took" in caplog.text
+    record = json.loads(lines.getvalue())
+    assert record["name"] == "stage"
+    assert record["attributes"] == {"engine": "numpy"}
+    assert json.loads((tmp_path / "spans.jsonl").read_text()) == record
+    [otel_span] = otel_spans
+    assert otel_span["attributes"] == {
+        "swapanything.rows_in": 3,
+        "swapanything.rows_out": 2,
+        "swapanything.engine": "numpy",
+    }
+    assert otel_span["end_time_unix_nano"] >= otel_span["start_time_unix_nano"]